@@ -1,10 +1,18 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
-import pandas as pd
+import numpy as np
 import json
 import os
-from config.env_config import EnvConfig
+import time
+import hashlib
+import logging
+import threading
+from functools import wraps
+import requests
+from config.env_config import (EnvConfig, TELEGRAM_TOKEN_RE, TELEGRAM_CHAT_ID_RE,
+                               BINANCE_CREDENTIAL_LENGTH, is_configured)
+from config.settings import Config
 
 from services.binance_service import BinanceService
 from services.indicator_service import IndicatorService
@@ -16,14 +24,31 @@ from services.telegram_service import TelegramService
 from services.optimizer_service import OptimizerService
 from services.coin_settings_manager import CoinSettingsManager
 from services.per_coin_optimizer import PerCoinOptimizer
+from services.optimization.klines_cache import klines_cache
 from services.binance_trading_service import BinanceTradingService
+from services.job_manager import JobManager
 from utils.date_utils import validate_date_range
+from utils.frame_utils import frame_to_columns
+from utils.json_provider import OrjsonProvider, ORJSON_AVAILABLE
+from utils.logging_setup import setup_logging
+
+# Dev server (python app.py): same queued logging as app_production, before any service starts
+if __name__ == '__main__':
+    setup_logging()
 
 app = Flask(__name__)
 CORS(app)
 
+# Every jsonify / app.json.dumps goes through orjson when it is installed
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
+
 # Load environment configuration
 env_config = EnvConfig()
+app.logger.debug("Env config loaded: telegram_token_valid=%s, telegram_chat_id_valid=%s, "
+                 "binance_api_key_valid=%s, binance_api_secret_valid=%s",
+                 env_config.IS_TELEGRAM_VALID, env_config.IS_TELEGRAM_CHAT_ID_VALID,
+                 env_config.IS_BINANCE_API_KEY_VALID, env_config.IS_BINANCE_API_SECRET_VALID)
 
 # Initialize services
 binance_service = BinanceService()
@@ -40,10 +65,108 @@ trading_service = BinanceTradingService()
 # Initialize telegram service with trading service
 telegram_service = TelegramService(trading_service=trading_service)
 
+# Telegram services keyed by (bot_token, chat_id), reused across requests
+_telegram_pool = {}
+_telegram_pool_lock = threading.Lock()
+
+def get_telegram(bot_token, chat_id):
+    """Get pooled TelegramService for the given credentials"""
+    key = (bot_token, str(chat_id))
+    with _telegram_pool_lock:
+        service = _telegram_pool.get(key)
+        if service is None:
+            service = TelegramService(bot_token, chat_id, trading_service)
+            _telegram_pool[key] = service
+        return service
+
+def resolve_telegram_creds(data, token_key='bot_token', chat_key='chat_id', prefer_env=True, validate=True):
+    """Resolve Telegram credentials from .env or request body, returns (bot_token, chat_id, error)"""
+    data = data or {}
+    env_token = env_config.TELEGRAM_BOT_TOKEN
+    env_chat = env_config.TELEGRAM_CHAT_ID
+    body_token = str(data.get(token_key) or '').strip()
+    body_chat = str(data.get(chat_key) or '').strip()
+    
+    if prefer_env:
+        # .env wins for consistency, request body only fills unconfigured values
+        bot_token = env_token if is_configured(env_token) else body_token
+        chat_id = env_chat if is_configured(env_chat) else body_chat
+    else:
+        bot_token = body_token or env_token
+        chat_id = body_chat or env_chat
+    
+    if validate and (not bot_token or not chat_id):
+        is_valid, message = env_config.validate_telegram_config()
+        if not is_valid:
+            return bot_token, chat_id, message
+    
+    return bot_token, chat_id, None
+
 optimizer_service = OptimizerService()
 coin_settings_manager = CoinSettingsManager()
 per_coin_optimizer = PerCoinOptimizer()
 
+# symbol_selection value -> symbols for the per-coin optimizer
+_SELECTION_MAP = {
+    'all': lambda: per_coin_optimizer.get_all_available_symbols(),
+    'top_100': lambda: per_coin_optimizer.get_popular_symbols(100),
+    'top_50': lambda: per_coin_optimizer.get_popular_symbols(50),
+    'top_20': lambda: per_coin_optimizer.get_popular_symbols(20),
+    'top_10': lambda: per_coin_optimizer.get_popular_symbols(10),
+}
+
+def resolve_symbols(symbol_selection, explicit_symbols, default_count=10):
+    """Use explicit symbols if given, otherwise auto-select by symbol_selection"""
+    if explicit_symbols:
+        return explicit_symbols
+    
+    select = _SELECTION_MAP.get(symbol_selection)
+    symbols = select() if select else per_coin_optimizer.get_popular_symbols(default_count)
+    app.logger.debug("🔄 Auto-selected %s symbols (%s)", len(symbols), symbol_selection)
+    return symbols
+
+# Long-running start tasks (optimizer, scanner) run here instead of the request thread
+job_manager = JobManager()
+
+def validate_json(*required_fields):
+    """Parse the JSON body once and pass it to the handler as data, 400 on missing fields"""
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(force=True, silent=True, cache=True)
+            if data is None:
+                data = {}
+            if not isinstance(data, dict):
+                return jsonify({'success': False, 'error': 'Request body must be a JSON object'}), 400
+            
+            for field in required_fields:
+                if field not in data:
+                    return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
+            
+            return handler(*args, data=data, **kwargs)
+        return wrapper
+    return decorator
+
+# Failures the service layer can hit in normal operation (bad input, upstream API/network)
+EXPECTED_ERRORS = (ValueError, KeyError, TimeoutError, requests.RequestException)
+
+def safe_endpoint(handler):
+    """Turn expected errors into the usual JSON 500, anything else goes to the 500 handler"""
+    @wraps(handler)
+    def wrapper(*args, **kwargs):
+        try:
+            return handler(*args, **kwargs)
+        except EXPECTED_ERRORS as e:
+            app.logger.exception("Error in %s", handler.__name__)
+            return jsonify({'success': False, 'error': str(e)}), 500
+    return wrapper
+
+@app.errorhandler(500)
+def internal_error(error):
+    """Unexpected errors still answer in the API's JSON shape"""
+    app.logger.error("Internal server error: %s", error)
+    return jsonify({'success': False, 'error': 'Internal server error'}), 500
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -66,10 +189,10 @@ def get_symbols():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/klines', methods=['POST'])
-def get_klines():
+@validate_json()
+def get_klines(data):
     """Get candlestick data for specified symbol and date range"""
     try:
-        data = request.get_json()
         symbol = data.get('symbol')
         start_date = data.get('start_date')
         end_date = data.get('end_date')
@@ -82,23 +205,69 @@ def get_klines():
         if not validate_date_range(start_date, end_date):
             return jsonify({'success': False, 'error': 'Invalid date range'}), 400
         
-        print(f"Requesting data for {symbol} from {start_date} to {end_date} with interval {interval}")
+        if interval not in Config.SUPPORTED_INTERVALS:
+            return jsonify({'success': False, 'error': f'Unsupported interval: {interval}'}), 400
+        
+        app.logger.debug("Requesting data for %s from %s to %s with interval %s", symbol, start_date, end_date, interval)
         
         # Get candlestick data
-        klines = binance_service.get_klines(symbol, interval, start_date, end_date)
-        print(f"Successfully retrieved {len(klines)} data points")
+        klines = binance_service.get_klines_cached(symbol, interval, start_date, end_date)
+        app.logger.debug("Successfully retrieved %s data points", len(klines))
         
-        return jsonify({'success': True, 'data': klines})
+        # Column-oriented: {'time': [epoch ms...], 'open': [...], ...}
+        return jsonify({'success': True, 'data': frame_to_columns(klines, ['open', 'high', 'low', 'close', 'volume'])})
     except Exception as e:
-        print(f"Error in get_klines endpoint: {str(e)}")
+        app.logger.error("Error in get_klines endpoint: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Serialized responses for polled endpoints: key -> {expires_at, payload, body, etag}
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+def cached_json_response(key, ttl, build, cache_control='no-cache'):
+    """Serve build() as JSON through a short TTL cache, with ETag so unchanged polls get 304"""
+    now = time.time()
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+    
+    if entry is None or entry['expires_at'] <= now:
+        payload = build()
+        if entry is not None and payload == entry['payload']:
+            # State unchanged since the last build, reuse the encoded bytes and ETag
+            entry = dict(entry, expires_at=now + ttl)
+        else:
+            body = app.json.dumps(payload).encode('utf-8')
+            entry = {
+                'expires_at': now + ttl,
+                'payload': payload,
+                'body': body,
+                'etag': hashlib.md5(body).hexdigest()
+            }
+        with _response_cache_lock:
+            _response_cache[key] = entry
+    
+    response = Response(entry['body'], mimetype='application/json')
+    response.set_etag(entry['etag'])
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def _stream_backtest_json(results, chart_data, signals_data):
+    """Yield the backtest response JSON piece by piece instead of one big string"""
+    yield '{"success": true, "data": {"results": '
+    yield app.json.dumps(results)
+    yield ', "chart_data": {'
+    # chart_data is column-oriented, emit one column at a time
+    for index, (column, values) in enumerate(chart_data.items()):
+        yield (', ' if index else '') + app.json.dumps(column) + ': ' + app.json.dumps(values)
+    yield '}, "signals": '
+    yield app.json.dumps(signals_data)
+    yield '}}'
+
 @app.route('/api/backtest', methods=['POST'])
-def run_backtest():
+@validate_json()
+def run_backtest(data):
     """Run backtest with specified parameters"""
     try:
-        data = request.get_json()
-        
         # Extract parameters
         symbol = data.get('symbol')
         start_date = data.get('start_date')
@@ -124,11 +293,14 @@ def run_backtest():
         if not all([symbol, start_date, end_date]):
             return jsonify({'success': False, 'error': 'Missing required parameters'}), 400
         
-        print(f"Running backtest for {symbol} from {start_date} to {end_date}")
+        if interval not in Config.SUPPORTED_INTERVALS:
+            return jsonify({'success': False, 'error': f'Unsupported interval: {interval}'}), 400
+        
+        app.logger.debug("Running backtest for %s from %s to %s", symbol, start_date, end_date)
         
         # Get market data
-        klines = binance_service.get_klines(symbol, interval, start_date, end_date)
-        print(f"Retrieved {len(klines)} data points")
+        klines = binance_service.get_klines_cached(symbol, interval, start_date, end_date)
+        app.logger.debug("Retrieved %s data points", len(klines))
         
         # Get coin-specific settings
         coin_settings = coin_settings_manager.load_coin_settings(symbol)
@@ -137,7 +309,7 @@ def run_backtest():
         if coin_settings.get('optimization_score', 0) > 0:
             strategy_params = coin_settings['strategy_params']
             tp_sl_params = coin_settings['tp_sl_params']
-            print(f"Using optimized settings for {symbol} (Score: {coin_settings['optimization_score']:.2f})")
+            app.logger.debug("Using optimized settings for %s (Score: %.2f)", symbol, coin_settings['optimization_score'])
         else:
             # Use parameters from request
             strategy_params = {
@@ -152,65 +324,56 @@ def run_backtest():
                 'max_tps': max_tps,
                 'tp_close': tp_close
             }
-            print(f"Using default/manual settings for {symbol}")
+            app.logger.debug("Using default/manual settings for %s", symbol)
         
-        # Verify data range
-        if not klines.empty:
-            print(f"Market data range: {klines.index.min()} to {klines.index.max()}")
-            
-            # Check if we have enough data
-            expected_days = (pd.Timestamp(end_date) - pd.Timestamp(start_date)).days
-            actual_days = (klines.index.max() - klines.index.min()).days
-            print(f"Expected {expected_days} days, got {actual_days} days of data")
-        
-        df = indicator_service.calculate_indicators(klines, strategy_params)
-        print("Calculated indicators")
-        print(f"Indicators calculated: {list(df.columns)}")
-        
-        # Verify indicators data range
-        if not df.empty:
-            print(f"Indicators data range: {df.index.min()} to {df.index.max()}")
+        # Verify data range (debug only)
+        if not klines.empty and app.logger.isEnabledFor(logging.DEBUG):
+            first, last = klines.index[0], klines.index[-1]
+            expected_days = (datetime.fromisoformat(end_date) - datetime.fromisoformat(start_date)).days
+            app.logger.debug("Market data range: %s to %s - expected %s days, got %s days of data",
+                             first, last, expected_days, (last - first).days)
         
-        signals = indicator_service.generate_signals(df, strategy_params)
-        print(f"Generated {len(signals[signals['signal'] != 0])} signals")
+        df, signals = indicator_service.calculate_indicators_and_signals(klines, strategy_params)
         
-        # Get strategy info for logging
-        strategy_info = indicator_service.get_strategy_info()
-        print(f"Using strategy: {strategy_info['name']}")
+        if app.logger.isEnabledFor(logging.DEBUG):
+            app.logger.debug("Indicators calculated: %s (range %s to %s) - %s signals using %s",
+                             list(df.columns), df.index.min(), df.index.max(),
+                             np.count_nonzero(signals['signal'].to_numpy()),
+                             indicator_service.get_strategy_info()['name'])
         
         # Run backtest
         backtest_results = backtest_service.run_backtest(
             df, signals, balance, leverage, margin, tp_sl_params
         )
-        print("Completed backtest")
         
-        # Print backtest summary
-        print(f"Backtest completed with {backtest_results['statistics']['total_trades']} total trades")
+        # Log backtest summary
         if backtest_results['trades']:
-            first_trade = backtest_results['trades'][0]['entry_time']
-            last_trade = backtest_results['trades'][-1]['exit_time']
-            print(f"Trade period: {first_trade} to {last_trade}")
+            app.logger.debug("Backtest completed with %s total trades, trade period: %s to %s",
+                             backtest_results['statistics']['total_trades'],
+                             backtest_results['trades'][0]['entry_time'],
+                             backtest_results['trades'][-1]['exit_time'])
+        else:
+            app.logger.debug("Backtest completed with 0 total trades")
         
         # Prepare chart data
         chart_data = backtest_service.prepare_chart_data(df, signals)
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'results': backtest_results,
-                'chart_data': chart_data,
-                'signals': signals.to_dict('records')
-            }
-        })
+        # Column-oriented to avoid building one dict per row
+        signals_data = frame_to_columns(signals)
+        
+        return Response(
+            stream_with_context(_stream_backtest_json(backtest_results, chart_data, signals_data)),
+            mimetype='application/json'
+        )
     except Exception as e:
-        print(f"Backtest error: {str(e)}")
+        app.logger.error("Backtest error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/live-data', methods=['POST'])
-def get_live_data():
+@validate_json()
+def get_live_data(data):
     """Get live data for chart"""
     try:
-        data = request.get_json()
         symbol = data.get('symbol', 'BTCUSDT')
         interval = data.get('interval', '1h')
         limit = data.get('limit', 100)
@@ -223,51 +386,45 @@ def get_live_data():
             return jsonify({'success': False, 'error': 'No data available'}), 404
             
     except Exception as e:
-        print(f"Live data error: {str(e)}")
+        app.logger.error("Live data error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/scanner/start', methods=['POST'])
-def start_scanner():
+@validate_json()
+def start_scanner(data):
     """Start the enhanced live scanner with WebSocket"""
     try:
         global enhanced_scanner_service
         
-        data = request.get_json()
-        
-        # Always use .env config for consistency
-        bot_token = env_config.TELEGRAM_BOT_TOKEN
-        chat_id = env_config.TELEGRAM_CHAT_ID
-        
-        # Only use manual input if .env is not configured
-        if not bot_token or bot_token == '' or bot_token == 'YOUR_BOT_TOKEN':
-            bot_token = data.get('telegram_bot_token', '').strip()
-        
-        if not chat_id or chat_id == '' or chat_id == 'YOUR_CHAT_ID':
-            chat_id = data.get('telegram_chat_id', '').strip()
+        bot_token, chat_id, error = resolve_telegram_creds(data, 'telegram_bot_token', 'telegram_chat_id')
         
         timeframe = data.get('timeframe', '1h')
         
         scan_all_symbols = data.get('scan_all_symbols', True)
         custom_symbols = data.get('custom_symbols', [])
         
-        print(f"🔍 Starting scanner with bot_token: {bot_token[:10] if bot_token else 'None'}..., chat_id: {chat_id}")
+        app.logger.debug("🔍 Starting scanner with bot_token: %s..., chat_id: %s", bot_token[:10] if bot_token else 'None', chat_id)
         
-        # Validate Telegram configuration
-        if not bot_token or not chat_id:
-            is_valid, message = env_config.validate_telegram_config()
-            if not is_valid:
-                return jsonify({'success': False, 'error': message}), 400
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        if enhanced_scanner_service and enhanced_scanner_service.is_running:
+        if ((enhanced_scanner_service and enhanced_scanner_service.is_running) or
+                job_manager.has_active_job('scanner_start')):
             return jsonify({'success': False, 'error': 'Scanner is already running'})
         
-        enhanced_scanner_service = EnhancedLiveScannerService(bot_token, chat_id, trading_service)
-        enhanced_scanner_service.start_scanner(timeframe, scan_all_symbols, custom_symbols)
+        def start_scanner_job():
+            global enhanced_scanner_service
+            enhanced_scanner_service = EnhancedLiveScannerService(bot_token, chat_id, trading_service)
+            enhanced_scanner_service.start_scanner(timeframe, scan_all_symbols, custom_symbols)
+            return 'Enhanced WebSocket scanner started successfully'
+        
+        # Historical data initialization can take a while, run it as a background job
+        job_id = job_manager.submit('scanner_start', start_scanner_job)
         
-        return jsonify({'success': True, 'message': 'Enhanced WebSocket scanner started successfully'})
+        return jsonify({'success': True, 'message': 'Enhanced WebSocket scanner starting', 'job_id': job_id})
         
     except Exception as e:
-        print(f"Scanner start error: {str(e)}")
+        app.logger.error("Scanner start error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/scanner/stop', methods=['POST'])
@@ -283,7 +440,7 @@ def stop_scanner():
         return jsonify({'success': True, 'message': 'Scanner stopped successfully'})
         
     except Exception as e:
-        print(f"Scanner stop error: {str(e)}")
+        app.logger.error("Scanner stop error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/scanner/status')
@@ -302,17 +459,18 @@ def get_scanner_status():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/websocket/start', methods=['POST'])
-def start_websocket():
+@validate_json()
+def start_websocket(data):
     """Start WebSocket service for live data"""
     try:
         global websocket_service
         
-        data = request.get_json()
         symbols = data.get('symbols', ['BTCUSDT', 'ETHUSDT'])
         
         # Use .env config if not provided in request
-        bot_token = data.get('telegram_bot_token') or env_config.TELEGRAM_BOT_TOKEN
-        chat_id = data.get('telegram_chat_id') or env_config.TELEGRAM_CHAT_ID
+        bot_token, chat_id, _ = resolve_telegram_creds(
+            data, 'telegram_bot_token', 'telegram_chat_id', prefer_env=False, validate=False
+        )
         
         if websocket_service and websocket_service.is_running:
             return jsonify({'success': False, 'error': 'WebSocket is already running'})
@@ -323,7 +481,7 @@ def start_websocket():
         return jsonify({'success': True, 'message': f'WebSocket started for {len(symbols)} symbols'})
         
     except Exception as e:
-        print(f"WebSocket start error: {str(e)}")
+        app.logger.error("WebSocket start error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/websocket/stop', methods=['POST'])
@@ -339,7 +497,7 @@ def stop_websocket():
         return jsonify({'success': True, 'message': 'WebSocket stopped successfully'})
         
     except Exception as e:
-        print(f"WebSocket stop error: {str(e)}")
+        app.logger.error("WebSocket stop error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/websocket/data/<symbol>')
@@ -359,11 +517,12 @@ def get_websocket_data(symbol):
             return jsonify({'success': False, 'error': 'No data available for symbol'}), 404
             
     except Exception as e:
-        print(f"WebSocket data error: {str(e)}")
+        app.logger.error("WebSocket data error: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/scanner/symbols', methods=['POST'])
-def manage_scanner_symbols():
+@validate_json()
+def manage_scanner_symbols(data):
     """Add or remove symbols from scanner"""
     try:
         global enhanced_scanner_service
@@ -371,7 +530,6 @@ def manage_scanner_symbols():
         if not enhanced_scanner_service:
             return jsonify({'success': False, 'error': 'Scanner not running'}), 400
         
-        data = request.get_json()
         action = data.get('action')  # 'add' or 'remove'
         symbol = data.get('symbol')
         
@@ -391,12 +549,12 @@ def manage_scanner_symbols():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/scanner/settings', methods=['POST'])
-def update_scanner_settings():
+@validate_json()
+def update_scanner_settings(data):
     """Update scanner settings"""
     try:
         global enhanced_scanner_service
         
-        data = request.get_json()
         min_signal_strength = data.get('min_signal_strength')
         max_symbols = data.get('max_symbols')
         timeframe = data.get('timeframe')
@@ -410,37 +568,25 @@ def update_scanner_settings():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/telegram/test', methods=['POST'])
-def test_telegram():
+@validate_json()
+def test_telegram(data):
     """Test telegram connection"""
     try:
-        data = request.get_json()
-        
-        # Always use .env config for consistency
-        bot_token = env_config.TELEGRAM_BOT_TOKEN
-        chat_id = env_config.TELEGRAM_CHAT_ID
-        
-        # Only use manual input if .env is not configured
-        if not bot_token or bot_token == '' or bot_token == 'YOUR_BOT_TOKEN':
-            bot_token = data.get('bot_token', '').strip()
+        bot_token, chat_id, _ = resolve_telegram_creds(data, validate=False)
         
-        if not chat_id or chat_id == '' or chat_id == 'YOUR_CHAT_ID':
-            chat_id = data.get('chat_id', '').strip()
+        app.logger.debug("🔍 Testing Telegram with bot_token: %s..., chat_id: %s", bot_token[:10] if bot_token else 'None', chat_id)
         
-        print(f"🔍 Testing Telegram with bot_token: {bot_token[:10] if bot_token else 'None'}..., chat_id: {chat_id}")
-        
-        if not bot_token or bot_token == '' or bot_token == 'YOUR_BOT_TOKEN':
+        if not is_configured(bot_token):
             return jsonify({'success': False, 'error': 'Bot token not configured. Get it from @BotFather on Telegram'}), 400
         
-        if not chat_id or chat_id == '' or chat_id == 'YOUR_CHAT_ID':
+        if not is_configured(chat_id):
             return jsonify({'success': False, 'error': 'Chat ID not configured. Get it from @userinfobot on Telegram'}), 400
         
         # Additional validation
-        if ':' not in bot_token or len(bot_token) < 35:
+        if not TELEGRAM_TOKEN_RE.match(bot_token):
             return jsonify({'success': False, 'error': 'Invalid bot token format. Should be like: 123456789:ABCdefGHIjklMNOpqrsTUVwxyz'}), 400
         
-        try:
-            int(chat_id)
-        except ValueError:
+        if not TELEGRAM_CHAT_ID_RE.match(str(chat_id)):
             return jsonify({'success': False, 'error': 'Chat ID must be a number. Get it from @userinfobot'}), 400
         
         # Check env config validation if using env values
@@ -449,7 +595,7 @@ def test_telegram():
             if not is_valid:
                 return jsonify({'success': False, 'error': message}), 400
         
-        test_service = TelegramService(bot_token, chat_id)
+        test_service = get_telegram(bot_token, chat_id)
         success = test_service.test_connection()
         
         if success:
@@ -458,34 +604,22 @@ def test_telegram():
             return jsonify({'success': False, 'error': 'Connection failed. Check bot token, chat ID, and make sure bot is added to the chat'}), 400
             
     except Exception as e:
-        print(f"Error in telegram test endpoint: {str(e)}")
+        app.logger.error("Error in telegram test endpoint: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/telegram/broadcast-mode', methods=['POST'])
-def configure_broadcast_mode():
+@validate_json()
+def configure_broadcast_mode(data):
     """Configure bot for broadcast mode"""
     try:
-        data = request.get_json()
+        bot_token, chat_id, error = resolve_telegram_creds(data)
         
-        # Always use .env config for consistency
-        bot_token = env_config.TELEGRAM_BOT_TOKEN
-        chat_id = env_config.TELEGRAM_CHAT_ID
+        app.logger.debug("🔍 Configuring broadcast mode with bot_token: %s..., chat_id: %s", bot_token[:10] if bot_token else 'None', chat_id)
         
-        # Only use manual input if .env is not configured
-        if not bot_token or bot_token == '' or bot_token == 'YOUR_BOT_TOKEN':
-            bot_token = data.get('bot_token', '').strip()
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        if not chat_id or chat_id == '' or chat_id == 'YOUR_CHAT_ID':
-            chat_id = data.get('chat_id', '').strip()
-        
-        print(f"🔍 Configuring broadcast mode with bot_token: {bot_token[:10] if bot_token else 'None'}..., chat_id: {chat_id}")
-        
-        if not bot_token or not chat_id:
-            is_valid, message = env_config.validate_telegram_config()
-            if not is_valid:
-                return jsonify({'success': False, 'error': message}), 400
-        
-        broadcast_service = TelegramService(bot_token, chat_id, trading_service)
+        broadcast_service = get_telegram(bot_token, chat_id)
         
         # Configure broadcast mode
         broadcast_service._configure_broadcast_mode()
@@ -517,24 +651,20 @@ def configure_broadcast_mode():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/telegram/entry-callback', methods=['POST'])
-def handle_entry_callback():
+@validate_json()
+def handle_entry_callback(data):
     """Handle entry button callback"""
     try:
-        data = request.get_json()
         symbol = data.get('symbol')
         signal_type = data.get('signal_type')
         entry_price = data.get('entry_price')
         
         # Use .env config if not provided in request
-        bot_token = data.get('bot_token') or env_config.TELEGRAM_BOT_TOKEN
-        chat_id = data.get('chat_id') or env_config.TELEGRAM_CHAT_ID
+        bot_token, chat_id, error = resolve_telegram_creds(data, prefer_env=False)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        if not bot_token or not chat_id:
-            is_valid, message = env_config.validate_telegram_config()
-            if not is_valid:
-                return jsonify({'success': False, 'error': message}), 400
-        
-        telegram_service = TelegramService(bot_token, chat_id)
+        telegram_service = get_telegram(bot_token, chat_id)
         success = telegram_service.handle_entry_callback(symbol, signal_type, entry_price)
         
         if success:
@@ -546,22 +676,18 @@ def handle_entry_callback():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/telegram/done-callback', methods=['POST'])
-def handle_done_callback():
+@validate_json()
+def handle_done_callback(data):
     """Handle done button callback"""
     try:
-        data = request.get_json()
         symbol = data.get('symbol')
         
         # Use .env config if not provided in request
-        bot_token = data.get('bot_token') or env_config.TELEGRAM_BOT_TOKEN
-        chat_id = data.get('chat_id') or env_config.TELEGRAM_CHAT_ID
-        
-        if not bot_token or not chat_id:
-            is_valid, message = env_config.validate_telegram_config()
-            if not is_valid:
-                return jsonify({'success': False, 'error': message}), 400
+        bot_token, chat_id, error = resolve_telegram_creds(data, prefer_env=False)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        telegram_service = TelegramService(bot_token, chat_id)
+        telegram_service = get_telegram(bot_token, chat_id)
         success = telegram_service.handle_done_callback(symbol)
         
         if success:
@@ -577,15 +703,11 @@ def get_active_entries():
     """Get active entry tracking status"""
     try:
         # Use .env config
-        bot_token = env_config.TELEGRAM_BOT_TOKEN
-        chat_id = env_config.TELEGRAM_CHAT_ID
-        
-        if not bot_token or not chat_id:
-            is_valid, message = env_config.validate_telegram_config()
-            if not is_valid:
-                return jsonify({'success': False, 'error': message}), 400
+        bot_token, chat_id, error = resolve_telegram_creds(None)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        telegram_service = TelegramService(bot_token, chat_id)
+        telegram_service = get_telegram(bot_token, chat_id)
         status = telegram_service.get_active_entries_status()
         
         return jsonify({'success': True, 'data': status})
@@ -603,10 +725,10 @@ def get_coin_settings(symbol):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/coin-settings/<symbol>', methods=['POST'])
-def save_coin_settings(symbol):
+@validate_json()
+def save_coin_settings(symbol, data):
     """Save settings for a specific coin"""
     try:
-        data = request.get_json()
         success = coin_settings_manager.save_coin_settings(symbol, data)
         
         if success:
@@ -616,6 +738,15 @@ def save_coin_settings(symbol):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/coin-settings/flush', methods=['POST'])
+def flush_coin_settings():
+    """Write pending coin settings changes to disk now"""
+    try:
+        flushed_count = coin_settings_manager.flush()
+        return jsonify({'success': True, 'flushed': flushed_count})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/coin-settings/summary')
 def get_settings_summary():
     """Get summary of all coin settings"""
@@ -638,10 +769,10 @@ def export_coin_settings():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/coin-settings/import', methods=['POST'])
-def import_coin_settings():
+@validate_json()
+def import_coin_settings(data):
     """Import coin settings from CSV"""
     try:
-        data = request.get_json()
         filepath = data.get('filepath')
         
         if not filepath:
@@ -656,61 +787,47 @@ def import_coin_settings():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def _run_optimizer_start(start_func, symbols, optimization_params):
+    """Job wrapper turning (success, message) results into job result/error"""
+    success, message = start_func(symbols, optimization_params)
+    if not success:
+        raise Exception(message)
+    return message
+
+@app.route('/api/jobs/<job_id>')
+def get_job_status(job_id):
+    """Get background job status"""
+    try:
+        job = job_manager.get_job(job_id)
+        if job is None:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        return jsonify({'success': True, 'data': job})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/per-coin-optimizer/start', methods=['POST'])
-def start_per_coin_optimization():
+@validate_json('param_ranges', 'trading_params')
+def start_per_coin_optimization(data):
     """Start per-coin optimization"""
     try:
-        data = request.get_json()
-        
         # Get symbols list
         symbols = data.get('symbols', [])
         symbol_selection = data.get('symbol_selection', 'top_50')  # New parameter
         
-        if not symbols:
-            # Auto-select symbols based on selection type
-            if symbol_selection == 'all':
-                # Get all available symbols
-                all_symbols = per_coin_optimizer.get_all_available_symbols()
-                symbols = all_symbols
-                print(f"🔄 Auto-selected ALL {len(symbols)} available symbols for bulk optimization")
-            elif symbol_selection == 'top_100':
-                symbols = per_coin_optimizer.get_popular_symbols(100)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for optimization")
-            elif symbol_selection == 'top_50':
-                symbols = per_coin_optimizer.get_popular_symbols(50)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for optimization")
-            elif symbol_selection == 'top_20':
-                symbols = per_coin_optimizer.get_popular_symbols(20)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for optimization")
-            elif symbol_selection == 'top_10':
-                symbols = per_coin_optimizer.get_popular_symbols(10)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for optimization")
-            else:
-                # Default to top 10 (minimum recommended)
-                symbols = per_coin_optimizer.get_popular_symbols(10)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for optimization (default minimum)")
+        symbols = resolve_symbols(symbol_selection, symbols)
         
         # Ensure minimum 10 symbols for per-coin optimization
         if len(symbols) < 10:
-            # Auto-expand to minimum 10 if less provided
+            # Auto-expand to minimum 10 if less provided (order-preserving, requested symbols first)
             popular_symbols = per_coin_optimizer.get_popular_symbols(10)
-            symbols = list(set(symbols + popular_symbols))[:10]
-            print(f"⚠️ Expanded to minimum 10 symbols: {symbols}")
+            symbols = list(dict.fromkeys(symbols + popular_symbols))[:10]
+            app.logger.debug("⚠️ Expanded to minimum 10 symbols: %s", symbols)
         
         # Enhanced logging for parallel processing
         max_workers = data.get('max_workers', 8)
-        print(f"🚀 Starting per-coin optimization with enhanced parallel processing:")
-        print(f"   📊 Symbols: {len(symbols)}")
-        print(f"   ⚡ Max Workers: {max_workers}")
-        print(f"   🔄 Parallel Data Fetching: Enabled")
-        print(f"   📦 Batch Processing: Up to 20 symbols simultaneously")
-        print(f"   ⏭️ Smart Skip: Enabled (will skip already optimized coins)")
-        
-        # Validate required parameters
-        required_fields = ['param_ranges', 'trading_params']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
+        app.logger.debug("🚀 Starting per-coin optimization: %s symbols, %s max workers "
+                         "(parallel fetch, batches of up to 20, skipping optimized coins)",
+                         len(symbols), max_workers)
         
         # Create optimization parameters template
         optimization_params = {
@@ -719,70 +836,46 @@ def start_per_coin_optimization():
             'end_date': data.get('end_date'),
             'param_ranges': data['param_ranges'],
             'trading_params': data['trading_params'],
-            'max_workers': max_workers
+            'max_workers': max_workers,
+            'search_strategy': data.get('search_strategy', Config.OPTIMIZER_SEARCH_STRATEGY),
+            'n_trials': data.get('n_trials', 60),
+            'early_stopping': data.get('early_stopping', False)
         }
         
         # Validate date range
         if not validate_date_range(optimization_params['start_date'], optimization_params['end_date']):
             return jsonify({'success': False, 'error': 'Invalid date range'}), 400
         
-        # Start per-coin optimization
-        success, message = per_coin_optimizer.start_per_coin_optimization(symbols, optimization_params)
+        if per_coin_optimizer.is_running or job_manager.has_active_job('per_coin_optimization'):
+            return jsonify({'success': False, 'error': 'Per-coin optimization is already running'}), 400
         
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message}), 400
+        # Start per-coin optimization as a background job
+        job_id = job_manager.submit(
+            'per_coin_optimization', _run_optimizer_start, per_coin_optimizer.start_per_coin_optimization, symbols, optimization_params
+        )
+        
+        return jsonify({'success': True, 'message': 'Starting per-coin optimization', 'job_id': job_id})
             
     except Exception as e:
-        print(f"Error starting per-coin optimization: {str(e)}")
+        app.logger.error("Error starting per-coin optimization: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/per-coin-optimizer/start-force', methods=['POST'])
-def start_per_coin_optimization_force():
+@validate_json('param_ranges', 'trading_params')
+def start_per_coin_optimization_force(data):
     """Start per-coin optimization with force re-optimize"""
     try:
-        data = request.get_json()
-        
         # Get symbols list
         symbols = data.get('symbols', [])
         symbol_selection = data.get('symbol_selection', 'top_50')
         
-        if not symbols:
-            # Auto-select symbols based on selection type
-            if symbol_selection == 'all':
-                all_symbols = per_coin_optimizer.get_all_available_symbols()
-                symbols = all_symbols
-                print(f"🔄 Auto-selected ALL {len(symbols)} available symbols for FORCE optimization")
-            elif symbol_selection == 'top_100':
-                symbols = per_coin_optimizer.get_popular_symbols(100)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for FORCE optimization")
-            elif symbol_selection == 'top_50':
-                symbols = per_coin_optimizer.get_popular_symbols(50)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for FORCE optimization")
-            elif symbol_selection == 'top_20':
-                symbols = per_coin_optimizer.get_popular_symbols(20)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for FORCE optimization")
-            elif symbol_selection == 'top_10':
-                symbols = per_coin_optimizer.get_popular_symbols(10)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for FORCE optimization")
-            else:
-                symbols = per_coin_optimizer.get_popular_symbols(10)
-                print(f"🔄 Auto-selected top {len(symbols)} symbols for FORCE optimization (default)")
+        symbols = resolve_symbols(symbol_selection, symbols)
         
         # Enhanced logging for force optimization
         max_workers = data.get('max_workers', 8)
-        print(f"🚀 Starting FORCE per-coin optimization:")
-        print(f"   📊 Symbols: {len(symbols)}")
-        print(f"   ⚡ Max Workers: {max_workers}")
-        print(f"   🔄 Force Mode: ALL coins will be re-optimized")
-        print(f"   ⚠️ Existing results will be overwritten")
-        
-        # Validate required parameters
-        required_fields = ['param_ranges', 'trading_params']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
+        app.logger.debug("🚀 Starting FORCE per-coin optimization: %s symbols, %s max workers "
+                         "(all coins re-optimized, existing results overwritten)",
+                         len(symbols), max_workers)
         
         # Create optimization parameters template
         optimization_params = {
@@ -791,137 +884,133 @@ def start_per_coin_optimization_force():
             'end_date': data.get('end_date'),
             'param_ranges': data['param_ranges'],
             'trading_params': data['trading_params'],
-            'max_workers': max_workers
+            'max_workers': max_workers,
+            'search_strategy': data.get('search_strategy', Config.OPTIMIZER_SEARCH_STRATEGY),
+            'n_trials': data.get('n_trials', 60),
+            'early_stopping': data.get('early_stopping', False)
         }
         
         # Validate date range
         if not validate_date_range(optimization_params['start_date'], optimization_params['end_date']):
             return jsonify({'success': False, 'error': 'Invalid date range'}), 400
         
-        # Start force per-coin optimization
-        success, message = per_coin_optimizer.start_per_coin_optimization_force(symbols, optimization_params)
+        if per_coin_optimizer.is_running or job_manager.has_active_job('per_coin_optimization'):
+            return jsonify({'success': False, 'error': 'Per-coin optimization is already running'}), 400
         
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message}), 400
+        # Start force per-coin optimization as a background job
+        job_id = job_manager.submit(
+            'per_coin_optimization', _run_optimizer_start, per_coin_optimizer.start_per_coin_optimization_force, symbols, optimization_params
+        )
+        
+        return jsonify({'success': True, 'message': 'Starting force per-coin optimization', 'job_id': job_id})
             
     except Exception as e:
-        print(f"Error starting force per-coin optimization: {str(e)}")
+        app.logger.error("Error starting force per-coin optimization: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/per-coin-optimizer/stop', methods=['POST'])
+@safe_endpoint
 def stop_per_coin_optimization():
     """Stop per-coin optimization"""
+    success = per_coin_optimizer.stop_optimization()
+    
+    if success:
+        return jsonify({'success': True, 'message': 'Per-coin optimization stopped'})
+    else:
+        return jsonify({'success': False, 'error': 'No per-coin optimization running'})
+
+@app.route('/api/per-coin-optimizer/status')
+def get_per_coin_optimization_status():
+    """Get per-coin optimization status"""
     try:
-        success = per_coin_optimizer.stop_optimization()
+        # Coalesce bursts of polls (several tabs) into one status build
+        return cached_json_response('per_coin_status', 0.5, lambda: {
+            'success': True, 'data': per_coin_optimizer.get_status()
+        })
         
-        if success:
-            return jsonify({'success': True, 'message': 'Per-coin optimization stopped'})
-        else:
-            return jsonify({'success': False, 'error': 'No per-coin optimization running'})
-            
     except Exception as e:
-        print(f"Error stopping per-coin optimization: {str(e)}")
+        app.logger.error("Error getting per-coin optimization status: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
-@app.route('/api/per-coin-optimizer/status')
-def get_per_coin_optimization_status():
-    """Get per-coin optimization status"""
+@app.route('/api/per-coin-optimizer/results')
+def get_per_coin_optimization_results():
+    """Get per-coin optimization results, paginated by score"""
     try:
-        status = per_coin_optimizer.get_status()
-        return jsonify({'success': True, 'data': status})
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        results = per_coin_optimizer.get_results(limit, offset, request.args.get('run_id'))
+        return jsonify({'success': True, 'data': results})
         
     except Exception as e:
-        print(f"Error getting per-coin optimization status: {str(e)}")
+        app.logger.error("Error getting per-coin optimization results: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/per-coin-optimizer/estimate', methods=['POST'])
-def get_optimization_estimate():
+@validate_json()
+def get_optimization_estimate(data):
     """Get optimization time estimate"""
     try:
-        data = request.get_json()
-        
         # Handle symbol selection
         symbols = data.get('symbols', [])
         symbol_selection = data.get('symbol_selection', 'top_50')
         
-        if not symbols:
-            if symbol_selection == 'all':
-                symbols = per_coin_optimizer.get_all_available_symbols()
-            elif symbol_selection == 'top_100':
-                symbols = per_coin_optimizer.get_popular_symbols(100)
-            elif symbol_selection == 'top_50':
-                symbols = per_coin_optimizer.get_popular_symbols(50)
-            elif symbol_selection == 'top_20':
-                symbols = per_coin_optimizer.get_popular_symbols(20)
-            else:
-                symbols = per_coin_optimizer.get_popular_symbols(50)  # Default
+        symbols = resolve_symbols(symbol_selection, symbols, default_count=50)
         
         optimization_params = {
+            'interval': data.get('interval', '1h'),
+            'start_date': data.get('start_date'),
+            'end_date': data.get('end_date'),
             'param_ranges': data.get('param_ranges', {}),
-            'max_workers': data.get('max_workers', 4)
+            'max_workers': data.get('max_workers', 4),
+            'search_strategy': data.get('search_strategy', Config.OPTIMIZER_SEARCH_STRATEGY),
+            'n_trials': data.get('n_trials', 60)
         }
         
         estimate = per_coin_optimizer.get_optimization_queue_estimate(symbols, optimization_params)
         return jsonify({'success': True, 'data': estimate})
         
     except Exception as e:
-        print(f"Error getting optimization estimate: {str(e)}")
+        app.logger.error("Error getting optimization estimate: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/optimizer/start', methods=['POST'])
-def start_optimization():
+@safe_endpoint
+@validate_json('symbol', 'start_date', 'end_date', 'param_ranges', 'trading_params')
+def start_optimization(data):
     """Start parameter optimization"""
-    try:
-        data = request.get_json()
-        
-        # Validate required parameters
-        required_fields = ['symbol', 'start_date', 'end_date', 'param_ranges', 'trading_params']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
-        
-        # Validate date range
-        if not validate_date_range(data['start_date'], data['end_date']):
-            return jsonify({'success': False, 'error': 'Invalid date range'}), 400
-        
-        # Start optimization
-        success, message = optimizer_service.start_optimization(data)
-        
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message}), 400
-            
-    except Exception as e:
-        print(f"Error starting optimization: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    # Validate date range
+    if not validate_date_range(data['start_date'], data['end_date']):
+        return jsonify({'success': False, 'error': 'Invalid date range'}), 400
+    
+    # Start optimization
+    success, message = optimizer_service.start_optimization(data)
+    
+    if success:
+        return jsonify({'success': True, 'message': message})
+    else:
+        return jsonify({'success': False, 'error': message}), 400
 
 @app.route('/api/optimizer/stop', methods=['POST'])
+@safe_endpoint
 def stop_optimization():
     """Stop parameter optimization"""
-    try:
-        success = optimizer_service.stop_optimization()
-        
-        if success:
-            return jsonify({'success': True, 'message': 'Optimization stopped'})
-        else:
-            return jsonify({'success': False, 'error': 'No optimization running'})
-            
-    except Exception as e:
-        print(f"Error stopping optimization: {str(e)}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+    success = optimizer_service.stop_optimization()
+    
+    if success:
+        return jsonify({'success': True, 'message': 'Optimization stopped'})
+    else:
+        return jsonify({'success': False, 'error': 'No optimization running'})
 
 @app.route('/api/optimizer/status')
 def get_optimization_status():
     """Get optimization status and results"""
     try:
-        status = optimizer_service.get_optimization_status()
-        return jsonify({'success': True, 'data': status})
+        return cached_json_response('optimizer_status', 0.5, lambda: {
+            'success': True, 'data': optimizer_service.get_optimization_status()
+        })
         
     except Exception as e:
-        print(f"Error getting optimization status: {str(e)}")
+        app.logger.error("Error getting optimization status: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/optimizer/cache')
@@ -932,14 +1021,24 @@ def get_cache_info():
         return jsonify({'success': True, 'data': cached_files})
         
     except Exception as e:
-        print(f"Error getting cache info: {str(e)}")
+        app.logger.error("Error getting cache info: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/optimizer/cache/stats')
+def get_cache_stats():
+    """Get optimizer klines cache hit/miss statistics"""
+    try:
+        return jsonify({'success': True, 'data': klines_cache.stats()})
+        
+    except Exception as e:
+        app.logger.error("Error getting cache stats: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/optimizer/cache/clear', methods=['POST'])
-def clear_cache():
+@validate_json()
+def clear_cache(data):
     """Clear cached data"""
     try:
-        data = request.get_json() or {}
         older_than_hours = data.get('older_than_hours', 24)
         
         cleared_count = optimizer_service.clear_cache(older_than_hours)
@@ -951,72 +1050,43 @@ def clear_cache():
         })
         
     except Exception as e:
-        print(f"Error clearing cache: {str(e)}")
+        app.logger.error("Error clearing cache: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/env/telegram')
 def get_telegram_env():
     """Get Telegram configuration from environment"""
     try:
-        print("Getting Telegram environment configuration...")
-        config = env_config.get_telegram_config()
-        
-        # Better validation
-        bot_token_valid = (config['bot_token'] and 
-                          config['bot_token'] != '' and 
-                          config['bot_token'] != 'YOUR_BOT_TOKEN' and
-                          ':' in config['bot_token'])
-        
-        chat_id_valid = (config['chat_id'] and 
-                        config['chat_id'] != '' and 
-                        config['chat_id'] != 'YOUR_CHAT_ID')
-        
-        print(f"Telegram config loaded: bot_token_valid={bot_token_valid}, chat_id_valid={chat_id_valid}")
-        
         # Don't expose full token, just indicate if it's configured
         return jsonify({
             'success': True,
             'data': {
-                'bot_token_configured': bot_token_valid,
-                'chat_id_configured': chat_id_valid,
-                'bot_token_preview': config['bot_token'][:10] + '...' if bot_token_valid else 'Not configured',
-                'chat_id': config['chat_id']
+                'bot_token_configured': env_config.IS_TELEGRAM_VALID,
+                'chat_id_configured': env_config.IS_TELEGRAM_CHAT_ID_VALID,
+                'bot_token_preview': env_config.TELEGRAM_TOKEN_PREVIEW,
+                'chat_id': env_config.TELEGRAM_CHAT_ID
             }
         })
     except Exception as e:
-        print(f"Error getting Telegram env config: {str(e)}")
+        app.logger.error("Error getting Telegram env config: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/env/binance')
 def get_binance_env():
     """Get Binance API configuration from environment"""
     try:
-        print("Getting Binance API environment configuration...")
-        config = env_config.get_binance_config()
-        
-        # Better validation
-        api_key_valid = (config['api_key'] and 
-                        config['api_key'] != '' and 
-                        len(config['api_key']) == 64)
-        
-        api_secret_valid = (config['api_secret'] and 
-                           config['api_secret'] != '' and 
-                           len(config['api_secret']) == 64)
-        
-        print(f"Binance config loaded: api_key_valid={api_key_valid}, api_secret_valid={api_secret_valid}")
-        
         # Don't expose full credentials, just indicate if configured
         return jsonify({
             'success': True,
             'data': {
-                'api_key_configured': api_key_valid,
-                'api_secret_configured': api_secret_valid,
-                'api_key_preview': config['api_key'][:8] + '...' if api_key_valid else 'Not configured',
+                'api_key_configured': env_config.IS_BINANCE_API_KEY_VALID,
+                'api_secret_configured': env_config.IS_BINANCE_API_SECRET_VALID,
+                'api_key_preview': env_config.BINANCE_API_KEY_PREVIEW,
                 'is_connected': trading_service.is_connected
             }
         })
     except Exception as e:
-        print(f"Error getting Binance env config: {str(e)}")
+        app.logger.error("Error getting Binance env config: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/trading/settings', methods=['GET'])
@@ -1029,10 +1099,10 @@ def get_trading_settings():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/trading/settings', methods=['POST'])
-def update_trading_settings():
+@validate_json()
+def update_trading_settings(data):
     """Update trading settings"""
     try:
-        data = request.get_json()
         success = trading_service.update_trading_settings(data)
         
         if success:
@@ -1043,10 +1113,10 @@ def update_trading_settings():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/trading/connect', methods=['POST'])
-def connect_trading():
+@validate_json()
+def connect_trading(data):
     """Connect to Binance API for trading"""
     try:
-        data = request.get_json()
         api_key = data.get('api_key')
         api_secret = data.get('api_secret')
         
@@ -1054,10 +1124,10 @@ def connect_trading():
             return jsonify({'success': False, 'error': 'API key and secret required'}), 400
         
         # Validate API key format
-        if len(api_key) != 64:
+        if len(api_key) != BINANCE_CREDENTIAL_LENGTH:
             return jsonify({'success': False, 'error': 'Invalid API key format. Should be 64 characters long.'}), 400
         
-        if len(api_secret) != 64:
+        if len(api_secret) != BINANCE_CREDENTIAL_LENGTH:
             return jsonify({'success': False, 'error': 'Invalid API secret format. Should be 64 characters long.'}), 400
         
         # Update trading service credentials
@@ -1082,112 +1152,107 @@ def connect_trading():
             return jsonify({'success': False, 'error': 'Failed to connect to Binance'})
             
     except Exception as e:
-        print(f"Error in connect_trading endpoint: {str(e)}")
+        app.logger.error("Error in connect_trading endpoint: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/trading/test', methods=['POST'])
+@safe_endpoint
 def test_trading_connection():
     """Test Binance API connection"""
-    try:
-        success, message = trading_service.test_connection()
-        
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message})
-            
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    success, message = trading_service.test_connection()
+    
+    if success:
+        return jsonify({'success': True, 'message': message})
+    else:
+        return jsonify({'success': False, 'error': message})
 
 @app.route('/api/trading/positions')
 def get_trading_positions():
     """Get active trading positions"""
     try:
-        positions = trading_service.get_active_positions()
-        return jsonify({'success': True, 'data': positions})
+        return cached_json_response('trading_positions', 0.5, lambda: {
+            'success': True, 'data': trading_service.get_active_positions()
+        })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/trading/close-position', methods=['POST'])
-def close_trading_position():
+@safe_endpoint
+@validate_json()
+def close_trading_position(data):
     """Close trading position"""
-    try:
-        data = request.get_json()
-        symbol = data.get('symbol')
-        reason = data.get('reason', 'Manual close')
-        
-        if not symbol:
-            return jsonify({'success': False, 'error': 'Symbol required'}), 400
-        
-        success, message = trading_service.close_position(symbol, reason)
-        
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message})
-            
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    symbol = data.get('symbol')
+    reason = data.get('reason', 'Manual close')
+    
+    if not symbol:
+        return jsonify({'success': False, 'error': 'Symbol required'}), 400
+    
+    success, message = trading_service.close_position(symbol, reason)
+    
+    if success:
+        return jsonify({'success': True, 'message': message})
+    else:
+        return jsonify({'success': False, 'error': message})
 
 @app.route('/api/trading/execute-manual', methods=['POST'])
-def execute_manual_trade():
+@safe_endpoint
+@validate_json()
+def execute_manual_trade(data):
     """Execute manual trade from Entry button"""
-    try:
-        data = request.get_json()
-        symbol = data.get('symbol')
-        signal_type = data.get('signal_type')
-        entry_price = data.get('entry_price')
-        
-        if not all([symbol, signal_type, entry_price]):
-            return jsonify({'success': False, 'error': 'Missing required parameters'}), 400
-        
-        success, message = trading_service.execute_manual_trade(symbol, signal_type, float(entry_price))
-        
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message})
-            
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    symbol = data.get('symbol')
+    signal_type = data.get('signal_type')
+    entry_price = data.get('entry_price')
+    
+    if not all([symbol, signal_type, entry_price]):
+        return jsonify({'success': False, 'error': 'Missing required parameters'}), 400
+    
+    success, message = trading_service.execute_manual_trade(symbol, signal_type, float(entry_price))
+    
+    if success:
+        return jsonify({'success': True, 'message': message})
+    else:
+        return jsonify({'success': False, 'error': message})
 
 @app.route('/api/trading/execute-auto', methods=['POST'])
-def execute_auto_trade():
+@safe_endpoint
+@validate_json()
+def execute_auto_trade(data):
     """Execute auto trade"""
-    try:
-        data = request.get_json()
-        symbol = data.get('symbol')
-        signal_type = data.get('signal_type')
-        entry_price = data.get('entry_price')
-        signal_data = data.get('signal_data', {})
-        
-        if not all([symbol, signal_type, entry_price]):
-            return jsonify({'success': False, 'error': 'Missing required parameters'}), 400
-        
-        success, message = trading_service.execute_auto_trade(symbol, signal_type, float(entry_price), signal_data)
-        
-        if success:
-            return jsonify({'success': True, 'message': message})
-        else:
-            return jsonify({'success': False, 'error': message})
-            
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    symbol = data.get('symbol')
+    signal_type = data.get('signal_type')
+    entry_price = data.get('entry_price')
+    signal_data = data.get('signal_data', {})
+    
+    if not all([symbol, signal_type, entry_price]):
+        return jsonify({'success': False, 'error': 'Missing required parameters'}), 400
+    
+    success, message = trading_service.execute_auto_trade(symbol, signal_type, float(entry_price), signal_data)
+    
+    if success:
+        return jsonify({'success': True, 'message': message})
+    else:
+        return jsonify({'success': False, 'error': message})
 
 @app.route('/api/symbols/count')
 def get_symbols_count():
     """Get total count of available symbols"""
     try:
-        symbols = binance_service.get_futures_symbols()
-        return jsonify({
-            'success': True, 
-            'data': {
-                'total_symbols': len(symbols),
-                'symbol_names': [s['symbol'] for s in symbols]
+        def build():
+            symbols = binance_service.get_futures_symbols()
+            return {
+                'success': True,
+                'data': {
+                    'total_symbols': len(symbols),
+                    'symbol_names': [s['symbol'] for s in symbols]
+                }
             }
-        })
+        
+        # Symbol universe changes at most daily
+        return cached_json_response('symbols_count', 3600, build, 'public, max-age=3600')
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 if __name__ == '__main__':
+    # Development server only - for production use:
+    #   gunicorn -c gunicorn.conf.py wsgi:application
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
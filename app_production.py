@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
 Production version of app.py with enhanced configuration
+Served by gunicorn via wsgi.py (see gunicorn.conf.py), never by the Werkzeug dev server
 """
 import os
 import sys
@@ -11,27 +12,9 @@ from pathlib import Path
 project_dir = Path(__file__).parent.absolute()
 sys.path.insert(0, str(project_dir))
 
-# Set up production logging
-def setup_production_logging():
-    """Setup production logging"""
-    log_dir = project_dir / "logs"
-    log_dir.mkdir(exist_ok=True)
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_dir / "app.log"),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-    
-    # Reduce noise from some libraries
-    logging.getLogger('urllib3').setLevel(logging.WARNING)
-    logging.getLogger('requests').setLevel(logging.WARNING)
-
-# Setup logging
-setup_production_logging()
+# Set up production logging (before app is imported, so its services log through it)
+from utils.logging_setup import setup_logging
+setup_logging(project_dir / "logs")
 
 # Import production config
 from production_config import ProductionConfig
@@ -51,19 +34,14 @@ app.config['MAX_CONTENT_LENGTH'] = ProductionConfig.MAX_CONTENT_LENGTH
 def not_found_error(error):
     return {'error': 'Not found'}, 404
 
-@app.errorhandler(500)
-def internal_error(error):
-    logging.error(f"Internal server error: {str(error)}")
-    return {'error': 'Internal server error'}, 500
+# 500s are answered by app.py's handler ({'success': False, ...}), which also logs them
 
-@app.before_first_request
-def before_first_request():
-    """Initialize production environment"""
-    logging.info("🚀 Crypto Backtest Signal starting in production mode")
-    logging.info(f"📁 Project directory: {project_dir}")
-    logging.info(f"🐍 Python path: {sys.executable}")
+# Startup info (before_first_request was removed in Flask 2.3; log once at import)
+logging.info("🚀 Crypto Backtest Signal starting in production mode")
+logging.info(f"📁 Project directory: {project_dir}")
+logging.info(f"🐍 Python path: {sys.executable}")
 
 if __name__ == '__main__':
-    # This will only run if called directly (not via WSGI)
-    print("🚀 Starting in development mode...")
-    app.run(debug=False, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # No built-in server in production - serve through gunicorn gevent workers
+    print("Run with: gunicorn -c gunicorn.conf.py wsgi:application")
+    sys.exit(1)
@@ -1,9 +1,29 @@
+import hmac
 import os
+import re
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Telegram credential formats, e.g. 123456789:ABCdefGHIjklMNOpqrsTUVwxyz / -1001234567890
+TELEGRAM_TOKEN_RE = re.compile(r'^\d{6,}:[A-Za-z0-9_-]{30,}$')
+TELEGRAM_CHAT_ID_RE = re.compile(r'^-?\d+$')
+
+# Values in .env that mean "not configured yet"
+CREDENTIAL_PLACEHOLDERS = (b'YOUR_BOT_TOKEN', b'YOUR_CHAT_ID')
+BINANCE_CREDENTIAL_LENGTH = 64
+
+def is_configured(value):
+    """True for a non-empty credential that is not a placeholder (constant-time compare)"""
+    if not value:
+        return False
+    encoded = str(value).encode()
+    # Check every placeholder so timing does not depend on which one matched
+    matches = [hmac.compare_digest(encoded, placeholder) for placeholder in CREDENTIAL_PLACEHOLDERS]
+    return not any(matches)
+
 class EnvConfig:
     """Environment configuration class"""
     
@@ -30,8 +50,9 @@ class EnvConfig:
     LIVE_DATA_CACHE_DURATION = int(os.getenv('LIVE_DATA_CACHE_DURATION', '60'))
     
     @classmethod
+    @lru_cache(maxsize=1)
     def validate_telegram_config(cls):
-        """Validate Telegram configuration"""
+        """Validate Telegram configuration (cached - env is read once at import)"""
         if not cls.TELEGRAM_BOT_TOKEN or cls.TELEGRAM_BOT_TOKEN == '':
             return False, "TELEGRAM_BOT_TOKEN must be configured in .env file. Get it from @BotFather"
         
@@ -39,19 +60,35 @@ class EnvConfig:
             return False, "TELEGRAM_CHAT_ID must be configured in .env file. Get it from @userinfobot"
         
         # Validate bot token format
-        if ':' not in cls.TELEGRAM_BOT_TOKEN or len(cls.TELEGRAM_BOT_TOKEN) < 35:
+        if not TELEGRAM_TOKEN_RE.match(cls.TELEGRAM_BOT_TOKEN):
             return False, "Invalid bot token format. Should be like: 123456789:ABCdefGHIjklMNOpqrsTUVwxyz"
         
         # Validate chat ID format
-        try:
-            chat_id_int = int(cls.TELEGRAM_CHAT_ID)
-            if chat_id_int == 0:
-                return False, "Chat ID cannot be 0. Get correct chat_id from @userinfobot"
-        except ValueError:
+        if not TELEGRAM_CHAT_ID_RE.match(cls.TELEGRAM_CHAT_ID):
             return False, "Chat ID must be a number. Get it from @userinfobot"
         
+        if cls.TELEGRAM_CHAT_ID.lstrip('-0') == '':
+            return False, "Chat ID cannot be 0. Get correct chat_id from @userinfobot"
+        
         return True, "Telegram configuration is valid"
     
+    @classmethod
+    def refresh_flags(cls):
+        """Derive configured flags and previews once instead of per request"""
+        cls.IS_TELEGRAM_VALID = is_configured(cls.TELEGRAM_BOT_TOKEN) and ':' in cls.TELEGRAM_BOT_TOKEN
+        cls.IS_TELEGRAM_CHAT_ID_VALID = is_configured(cls.TELEGRAM_CHAT_ID)
+        cls.TELEGRAM_TOKEN_PREVIEW = cls.TELEGRAM_BOT_TOKEN[:10] + '...' if cls.IS_TELEGRAM_VALID else 'Not configured'
+        
+        cls.IS_BINANCE_API_KEY_VALID = len(cls.BINANCE_API_KEY) == BINANCE_CREDENTIAL_LENGTH
+        cls.IS_BINANCE_API_SECRET_VALID = len(cls.BINANCE_API_SECRET) == BINANCE_CREDENTIAL_LENGTH
+        cls.BINANCE_API_KEY_PREVIEW = cls.BINANCE_API_KEY[:8] + '...' if cls.IS_BINANCE_API_KEY_VALID else 'Not configured'
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Clear cached validation results after changing config values"""
+        cls.validate_telegram_config.cache_clear()
+        cls.refresh_flags()
+    
     @classmethod
     def get_telegram_config(cls):
         """Get Telegram configuration"""
@@ -78,10 +115,12 @@ class EnvConfig:
             return False, "BINANCE_API_SECRET must be configured in .env file"
         
         # Validate API key format
-        if len(cls.BINANCE_API_KEY) != 64:
+        if not cls.IS_BINANCE_API_KEY_VALID:
             return False, "Invalid API key format. Should be exactly 64 characters"
         
-        if len(cls.BINANCE_API_SECRET) != 64:
+        if not cls.IS_BINANCE_API_SECRET_VALID:
             return False, "Invalid API secret format. Should be exactly 64 characters"
         
-        return True, "Binance API configuration is valid"
\ No newline at end of file
+        return True, "Binance API configuration is valid"
+
+EnvConfig.refresh_flags()
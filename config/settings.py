@@ -9,8 +9,34 @@ class Config:
     DEFAULT_MARGIN_PERCENT = 10
     DEFAULT_BALANCE = 10000
     
-    # Supported intervals
-    SUPPORTED_INTERVALS = ['1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d']
+    # Supported intervals (frozenset - membership checks are a single hash lookup)
+    SUPPORTED_INTERVALS = frozenset(['1m', '3m', '5m', '15m', '30m', '1h', '2h', '4h', '6h', '8h', '12h', '1d'])
+    
+    # Candle length per Binance interval, for time math without parsing interval strings
+    INTERVAL_SECONDS = {
+        '1m': 60, '3m': 180, '5m': 300, '15m': 900, '30m': 1800,
+        '1h': 3600, '2h': 7200, '4h': 14400, '6h': 21600, '8h': 28800, '12h': 43200,
+        '1d': 86400, '3d': 259200, '1w': 604800, '1M': 2592000
+    }
+    
+    # Kline OHLCV dtype - 'float32' halves memory for large/bulk datasets,
+    # indicators upcast to float64 for talib and PnL math uses Python floats
+    KLINES_FLOAT_DTYPE = os.environ.get('KLINES_FLOAT_DTYPE', 'float64')
+    
+    # Optimizer kernel price dtype - 'float32' halves memory bandwidth in the numba kernel,
+    # checked against float64 on the first symbol of each run before it is used
+    OPTIMIZER_FLOAT_DTYPE = os.environ.get('OPTIMIZER_FLOAT_DTYPE', 'float64')
+    
+    # Optimizer search - 'grid' tests every combination, 'tpe' (opt-in) samples n_trials per symbol
+    OPTIMIZER_SEARCH_STRATEGY = 'grid'
+    
+    # Klines cache (historical windows are immutable, open windows expire quickly)
+    KLINES_CACHE_SIZE = 64
+    KLINES_CACHE_TTL = 60  # seconds, window still open
+    KLINES_CACHE_HISTORICAL_TTL = 86400  # seconds, window fully in the past
+    
+    # Futures symbol list (exchange info changes rarely) - memory + optimizer_cache/futures_symbols.json
+    FUTURES_SYMBOLS_CACHE_TTL = 3600  # seconds
     
     # TA-lib indicator parameters
     RSI_PERIOD = 14
@@ -4,38 +4,389 @@ Ubuntu Apache WSGI Auto Deployment Script
 Setup otomatis untuk production deployment dengan Apache + mod_wsgi
 """
 
+import argparse
 import os
 import sys
 import subprocess
 import platform
 import socket
 import getpass
+import hashlib
+import importlib.util
+import ipaddress
+import json
+import math
+import time
+import urllib.request
+from functools import cached_property, lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from production_config import ProductionConfig
+
+# Public IP found by a previous run (skips the ipify round-trip on re-runs)
+IP_CACHE_FILE = '/tmp/.deploy_ip_cache'
+IP_CACHE_TTL = 86400  # seconds
+
+# Resolve each host once per run - urllib retries and later lookups reuse the answer
+_cached_getaddrinfo = lru_cache(maxsize=32)(socket.getaddrinfo)
+
+# apt-get update is skipped when the package lists were refreshed within this window
+APT_UPDATE_STAMP = '/var/lib/apt/periodic/update-success-stamp'
+APT_UPDATE_MAX_AGE = 3600  # seconds
+
+WSGI_TEMPLATE = '''#!/usr/bin/env python3
+"""
+WSGI Application for Crypto Backtest Signal
+"""
+import sys
+import os
+
+# Add project directory to Python path
+project_dir = '{project_dir}'
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+
+# Set environment variables
+os.environ['PYTHONPATH'] = project_dir
+
+# Change to project directory
+os.chdir(project_dir)
+
+# Import Flask application
+from app import app as application
+
+if __name__ == "__main__":
+    application.run()
+'''
+
+VHOST_TEMPLATE = '''<VirtualHost *:80>
+    ServerName {public_ip}
+    ServerAlias {local_ip} localhost
+    DocumentRoot {project_dir}
+    
+    # HTTP/2 (needs mpm_event, set up by configure_mpm_event)
+    Protocols h2 h2c http/1.1
+    
+    # Reuse connections across a page load's asset requests, release idle ones quickly
+    KeepAlive On
+    MaxKeepAliveRequests 500
+    KeepAliveTimeout 2
+    
+    # Long optimizer requests: match the daemon's socket-timeout for this site only
+    Timeout {wsgi_socket_timeout}
+    
+    WSGIDaemonProcess {project_name} python-home={venv_path} python-path={project_dir} \\
+        processes={wsgi_processes} threads={wsgi_threads} maximum-requests={wsgi_max_requests} \\
+        display-name=%{{GROUP}} queue-timeout={wsgi_queue_timeout} socket-timeout={wsgi_socket_timeout} \\
+        connect-timeout={wsgi_connect_timeout} request-timeout={wsgi_request_timeout} \\
+        inactivity-timeout={wsgi_inactivity_timeout}
+    WSGIProcessGroup {project_name}
+    # Preload the app when a daemon process starts, not on its first request
+    WSGIImportScript {project_dir}/app.wsgi process-group={project_name} application-group=%{{GLOBAL}}
+    WSGIScriptAlias / {project_dir}/app.wsgi
+    
+    <Directory {project_dir}>
+        WSGIApplicationGroup %{{GLOBAL}}
+        Require all granted
+    </Directory>
+    
+    # Static files
+    Alias /static {project_dir}/static
+    <Directory {project_dir}/static>
+        Require all granted
+        ExpiresActive On
+        ExpiresDefault "access plus 1 year"
+        Header set Cache-Control "public, max-age=31536000, immutable"
+    </Directory>
+    
+    # Compression (brotli first when the client accepts it, gzip otherwise)
+    <IfModule mod_brotli.c>
+        AddOutputFilterByType BROTLI_COMPRESS application/json text/html text/css application/javascript
+    </IfModule>
+    <IfModule mod_deflate.c>
+        AddOutputFilterByType DEFLATE application/json text/html text/css application/javascript
+    </IfModule>
+    
+    # Logs
+    ErrorLog ${{APACHE_LOG_DIR}}/{project_name}_error.log
+    CustomLog ${{APACHE_LOG_DIR}}/{project_name}_access.log combined
+    LogLevel info
+    
+    # Security headers
+    Header always set X-Content-Type-Options nosniff
+    Header always set X-Frame-Options DENY
+    Header always set X-XSS-Protection "1; mode=block"
+    
+    # WSGI Configuration
+    WSGIScriptReloading On
+    WSGIApplicationGroup %{{GLOBAL}}
+</VirtualHost>'''
+
+# Placeholder program so backup/restore/update/monitor scripts keep a stable name to manage.
+# All background work (scanner, optimizer) runs inside the WSGI daemon; the placeholder is a
+# plain `sleep infinity` instead of a resident Python interpreter. Replace the command when a
+# real worker exists.
+SUPERVISOR_TEMPLATE = '''[program:{project_name}-worker]
+command=/bin/sleep infinity
+directory={project_dir}
+user=www-data
+autostart=true
+autorestart=true
+redirect_stderr=true
+stdout_logfile=/var/log/{project_name}-worker.log
+environment=PYTHONPATH="{project_dir}"
+'''
+
+START_SCRIPT_TEMPLATE = '''#!/bin/bash
+# Crypto Backtest Signal - Start Script
+
+echo "🚀 Starting Crypto Backtest Signal (Apache + WSGI)..."
+
+# Activate virtual environment
+source {venv_path}/bin/activate
+
+# Set environment variables
+export PYTHONPATH="{project_dir}"
+export FLASK_ENV=production
+
+# Create necessary directories
+mkdir -p {project_dir}/optimizer_cache
+mkdir -p {project_dir}/coin_settings
+mkdir -p {project_dir}/trading_settings
+mkdir -p {project_dir}/logs
+
+# Set permissions
+sudo chown -R www-data:www-data {project_dir}/optimizer_cache
+sudo chown -R www-data:www-data {project_dir}/coin_settings
+sudo chown -R www-data:www-data {project_dir}/trading_settings
+sudo chown -R www-data:www-data {project_dir}/logs
+
+# Start Apache
+sudo systemctl start apache2
+sudo systemctl start supervisor
+
+echo "✅ Services started!"
+echo "🌐 Access at: http://{public_ip}"
+'''
+
+STOP_SCRIPT_TEMPLATE = '''#!/bin/bash
+# Crypto Backtest Signal - Stop Script
+
+echo "🛑 Stopping Crypto Backtest Signal..."
+
+# Stop services
+sudo systemctl stop apache2
+sudo supervisorctl stop {project_name}-worker
+
+echo "✅ Services stopped!"
+'''
+
+STATUS_SCRIPT_TEMPLATE = '''#!/bin/bash
+# Crypto Backtest Signal - Status Script
+
+echo "📊 Crypto Backtest Signal Status"
+echo "================================"
+
+echo "🌐 Apache Status:"
+sudo systemctl status apache2 --no-pager -l
+
+echo ""
+echo "👥 Supervisor Status:"
+sudo supervisorctl status
+
+echo ""
+echo "🔥 Firewall Status:"
+sudo ufw status
+
+echo ""
+echo "📊 System Resources:"
+echo "Memory: $(free -h | grep '^Mem:' | awk '{{print $3 "/" $2}}')"
+echo "Disk: $(df -h {project_dir} | tail -1 | awk '{{print $3 "/" $2 " (" $5 " used)"}}')"
+echo "Load: $(uptime | awk -F'load average:' '{{print $2}}')"
+
+echo ""
+echo "🌐 Access URLs:"
+echo "  • http://{public_ip}"
+echo "  • http://{local_ip}"
+echo "  • http://localhost"
+'''
+
+CHECK_REQUIREMENTS_TEMPLATE = '''#!/bin/bash
+# Check if requirements are installed in virtual environment
+
+echo "🔍 Checking Python requirements..."
+
+# Activate virtual environment
+source {venv_path}/bin/activate
+
+# Probe packages in-process (find_spec, nothing is imported)
+python3 {project_dir}/deploy_apache.py check
+'''
+
+# Import name -> pip package name for the requirements check
+REQUIRED_PACKAGES = {
+    'flask': 'flask',
+    'flask_cors': 'flask-cors',
+    'requests': 'requests',
+    'pandas': 'pandas',
+    'numpy': 'numpy',
+    'talib': 'TA-Lib',
+    'plotly': 'plotly',
+    'binance': 'python-binance',
+    'dotenv': 'python-dotenv',
+    'psutil': 'psutil'
+}
+
+@lru_cache(maxsize=1)
+def get_distro_id():
+    """Distribution ID from /etc/os-release (e.g. 'ubuntu'), empty string if unknown"""
+    try:
+        with open('/etc/os-release') as f:
+            fields = dict(line.split('=', 1) for line in f.read().splitlines() if '=' in line)
+    except OSError:
+        return ''
+    return fields.get('ID', '').strip('"\'')
+
+class _TemplateVars(dict):
+    """format_map values - keys not set up front (e.g. public_ip) are read from the deployer on first use"""
+    
+    def __init__(self, deployer, **values):
+        super().__init__(values)
+        self._deployer = deployer
+    
+    def __missing__(self, key):
+        value = getattr(self._deployer, key)
+        self[key] = value
+        return value
+
 class UbuntuApacheDeployment:
-    def __init__(self):
+    def __init__(self, dry_run=False, force=False):
+        self.dry_run = dry_run  # print the changes instead of making them
+        self.force = force  # rewrite files and restart Apache even when nothing changed
+        
+        # Fail fast on a non-root run, before any network lookup
+        if not dry_run:
+            self.check_root_privileges()
+        
+        # What this run actually changed - decides whether Apache needs a reload/restart
+        self.state = {'apache_changed': False, 'vhost_changed': False, 'mpm_changed': False}
+        
         self.project_dir = os.getcwd()
         self.project_name = "crypto-backtest"
         self.user = getpass.getuser()
-        self.public_ip = self.get_public_ip()
-        self.local_ip = self.get_local_ip()
         self.venv_path = os.path.join(self.project_dir, "venv")
         self.python_path = os.path.join(self.venv_path, "bin", "python")
         
-    def get_public_ip(self):
-        """Dapatkan IP publik"""
+        # Shared values for every generated file (daemon sizing from ProductionConfig)
+        self._template_vars = _TemplateVars(
+            self,
+            project_dir=self.project_dir,
+            project_name=self.project_name,
+            venv_path=self.venv_path,
+            python_path=self.python_path,
+            wsgi_processes=ProductionConfig.WSGI_PROCESSES,
+            wsgi_threads=ProductionConfig.WSGI_THREADS,
+            wsgi_max_requests=ProductionConfig.WSGI_MAX_REQUESTS,
+            wsgi_queue_timeout=ProductionConfig.WSGI_QUEUE_TIMEOUT,
+            wsgi_socket_timeout=ProductionConfig.WSGI_SOCKET_TIMEOUT,
+            wsgi_connect_timeout=ProductionConfig.WSGI_CONNECT_TIMEOUT,
+            wsgi_request_timeout=ProductionConfig.WSGI_REQUEST_TIMEOUT,
+            wsgi_inactivity_timeout=ProductionConfig.WSGI_INACTIVITY_TIMEOUT
+        )
+    
+    @cached_property
+    def public_ip(self):
+        """Public IP, looked up on first use"""
+        return self.get_public_ip()
+    
+    @cached_property
+    def local_ip(self):
+        """Local IP, looked up on first use"""
+        return self.get_local_ip()
+    
+    def _render(self, template):
+        """Fill a module-level template with the deployment values"""
+        return template.format_map(self._template_vars)
+    
+    def _run(self, cmd, **kwargs):
+        """subprocess.run for commands that change the system (printed only on --dry-run)"""
+        if self.dry_run:
+            print(f"   [dry-run] {' '.join(cmd)}")
+            return subprocess.CompletedProcess(cmd, 0, '', '')
+        return subprocess.run(cmd, **kwargs)
+    
+    def _write_file(self, path, content, mode=0o644):
+        """Write a generated file with its final mode in one open/write/close, returns False if unchanged"""
+        data = content.encode()
+        if not self.force:
+            try:
+                with open(path, 'rb') as f:
+                    unchanged = hashlib.sha256(f.read()).digest() == hashlib.sha256(data).digest()
+            except OSError:
+                unchanged = False
+            if unchanged:
+                print(f"   Unchanged: {path}")
+                return False
+        
+        if self.dry_run:
+            print(f"   [dry-run] write {path}")
+            return True
+        
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
         try:
-            import requests
-            response = requests.get('https://api.ipify.org', timeout=5)
-            return response.text.strip()
+            os.write(fd, data)
+            os.fchmod(fd, mode)  # O_CREAT's mode only applies to new files
+        finally:
+            os.close(fd)
+        return True
+    
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_public_ip():
+        """Dapatkan IP publik (IP_OVERRIDE, hostname, cache file, lalu HTTP)"""
+        override = os.environ.get('IP_OVERRIDE')
+        if override:
+            return override
+        
+        # Host already resolves to a public address - no HTTP round-trip needed
+        try:
+            ip = socket.gethostbyname(socket.gethostname())
+            if ipaddress.ip_address(ip).is_global:
+                return ip
+        except (OSError, ValueError):
+            pass
+        
+        # Re-runs reuse the address found by the previous run
+        try:
+            if time.time() - os.path.getmtime(IP_CACHE_FILE) < IP_CACHE_TTL:
+                with open(IP_CACHE_FILE) as f:
+                    cached_ip = f.read().strip()
+                if cached_ip:
+                    return cached_ip
+        except OSError:
+            pass
+        
+        try:
+            with urllib.request.urlopen('https://api.ipify.org', timeout=5) as response:
+                ip = response.read().decode().strip()
         except:
             try:
-                response = requests.get('https://httpbin.org/ip', timeout=5)
-                return response.json()['origin']
+                with urllib.request.urlopen('https://httpbin.org/ip', timeout=5) as response:
+                    ip = json.loads(response.read().decode())['origin']
             except:
                 return "Unable to detect"
+        
+        try:
+            with open(IP_CACHE_FILE, 'w') as f:
+                f.write(ip)
+        except OSError:
+            pass
+        return ip
     
-    def get_local_ip(self):
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_local_ip():
         """Dapatkan IP lokal"""
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -46,7 +397,8 @@ class UbuntuApacheDeployment:
         except:
             return "127.0.0.1"
     
-    def check_root_privileges(self):
+    @staticmethod
+    def check_root_privileges():
         """Check if running with sudo privileges"""
         if os.geteuid() != 0:
             print("❌ This script requires sudo privileges for Apache configuration")
@@ -66,18 +418,63 @@ class UbuntuApacheDeployment:
             'ufw'
         ]
         
-        # Update package list
-        subprocess.run(['apt', 'update'], check=True)
+        # One dpkg-query for all packages - already installed ones are left out of apt-get
+        installed = self.get_installed_packages(packages)
+        if not self.force:
+            packages = [package for package in packages if package not in installed]
+            if not packages:
+                print("✅ System packages already installed")
+                return
+        
+        apt_env = {**os.environ, 'DEBIAN_FRONTEND': 'noninteractive'}
+        apt_options = ['-o', 'Dpkg::Use-Pty=0', '-o', 'Acquire::http::Pipeline-Depth=10']
+        
+        # Update package list (skipped when the lists are still fresh)
+        try:
+            lists_age = time.time() - os.path.getmtime(APT_UPDATE_STAMP)
+        except OSError:
+            lists_age = math.inf
+        if lists_age < APT_UPDATE_MAX_AGE:
+            print(f"Package lists updated {int(lists_age // 60)} min ago, skipping apt-get update")
+        else:
+            self._run(['apt-get', 'update', *apt_options,
+                            '-o', 'Acquire::Languages=none',
+                            '-o', 'Acquire::CompressionTypes::Order::=gz'],
+                           check=True, env=apt_env)
+        
+        # Install all packages in one apt-get run (one lock, one dependency solve, one trigger pass)
+        print(f"Installing {', '.join(packages)}...")
+        result = self._run(['apt-get', 'install', '-y', '--no-install-recommends', *apt_options, *packages],
+                                capture_output=True, text=True, env=apt_env)
+        if result.returncode == 0:
+            return
+        
+        # apt-get aborts the whole batch on an unknown package - retry without those
+        failed = [package for package in packages
+                  if f"Unable to locate package {package}" in result.stderr]
+        print(f"⚠️ Warning: Failed to install {', '.join(failed) or 'some packages'}")
+        print(f"Error: {result.stderr}")
         
-        # Install packages
-        for package in packages:
-            print(f"Installing {package}...")
-            result = subprocess.run(['apt', 'install', '-y', package], 
-                                  capture_output=True, text=True)
+        remaining = [package for package in packages if package not in failed]
+        if failed and remaining:
+            result = self._run(['apt-get', 'install', '-y', '--no-install-recommends', *apt_options, *remaining],
+                                    capture_output=True, text=True, env=apt_env)
             if result.returncode != 0:
-                print(f"⚠️ Warning: Failed to install {package}")
+                print(f"⚠️ Warning: Failed to install {', '.join(remaining)}")
                 print(f"Error: {result.stderr}")
     
+    @staticmethod
+    def get_installed_packages(packages):
+        """Names of the given packages dpkg reports as installed"""
+        result = subprocess.run(['dpkg-query', '-W', '-f=${Package} ${db:Status-Abbrev}\n', *packages],
+                                capture_output=True, text=True)
+        installed = set()
+        for line in result.stdout.splitlines():
+            name, _, status = line.partition(' ')
+            if status.startswith('ii'):
+                installed.add(name)
+        return installed
+    
     def create_virtual_environment(self):
         """Create virtual environment"""
         print("🐍 Creating virtual environment...")
@@ -87,7 +484,7 @@ class UbuntuApacheDeployment:
             return
         
         # Create virtual environment
-        subprocess.run([
+        self._run([
             'python3', '-m', 'venv', self.venv_path
         ], check=True)
         
@@ -99,105 +496,55 @@ class UbuntuApacheDeployment:
         """Create WSGI application file"""
         print("📄 Creating WSGI application file...")
         
-        wsgi_content = f'''#!/usr/bin/env python3
-"""
-WSGI Application for Crypto Backtest Signal
-"""
-import sys
-import os
-
-# Add project directory to Python path
-project_dir = '{self.project_dir}'
-if project_dir not in sys.path:
-    sys.path.insert(0, project_dir)
-
-# Set environment variables
-os.environ['PYTHONPATH'] = project_dir
-
-# Change to project directory
-os.chdir(project_dir)
-
-# Import Flask application
-from app import app as application
-
-if __name__ == "__main__":
-    application.run()
-'''
+        wsgi_content = self._render(WSGI_TEMPLATE)
         
         wsgi_file = os.path.join(self.project_dir, "app.wsgi")
-        with open(wsgi_file, 'w') as f:
-            f.write(wsgi_content)
-        
-        # Make executable
-        os.chmod(wsgi_file, 0o755)
-        print(f"✅ WSGI file created: {wsgi_file}")
+        if self._write_file(wsgi_file, wsgi_content, 0o755):
+            print(f"✅ WSGI file created: {wsgi_file}")
     
     def create_apache_vhost(self):
         """Create Apache virtual host configuration"""
         print("🌐 Creating Apache virtual host...")
         
-        vhost_content = f'''<VirtualHost *:80>
-    ServerName {self.public_ip}
-    ServerAlias {self.local_ip} localhost
-    DocumentRoot {self.project_dir}
-    
-    WSGIDaemonProcess {self.project_name} python-home={self.venv_path} python-path={self.project_dir}
-    WSGIProcessGroup {self.project_name}
-    WSGIScriptAlias / {self.project_dir}/app.wsgi
-    
-    <Directory {self.project_dir}>
-        WSGIApplicationGroup %{{GLOBAL}}
-        Require all granted
-    </Directory>
-    
-    # Static files
-    Alias /static {self.project_dir}/static
-    <Directory {self.project_dir}/static>
-        Require all granted
-        ExpiresActive On
-        ExpiresDefault "access plus 1 year"
-    </Directory>
-    
-    # Logs
-    ErrorLog ${{APACHE_LOG_DIR}}/{self.project_name}_error.log
-    CustomLog ${{APACHE_LOG_DIR}}/{self.project_name}_access.log combined
-    LogLevel info
-    
-    # Security headers
-    Header always set X-Content-Type-Options nosniff
-    Header always set X-Frame-Options DENY
-    Header always set X-XSS-Protection "1; mode=block"
-    
-    # WSGI Configuration
-    WSGIScriptReloading On
-    WSGIApplicationGroup %{{GLOBAL}}
-</VirtualHost>'''
+        # Daemon sizing from ProductionConfig (defaults: one process, 15 threads)
+        print(f"   WSGI daemon: {ProductionConfig.WSGI_PROCESSES} processes x {ProductionConfig.WSGI_THREADS} threads")
         
-        vhost_file = f'/etc/apache2/sites-available/{self.project_name}.conf'
+        vhost_content = self._render(VHOST_TEMPLATE)
         
-        with open(vhost_file, 'w') as f:
-            f.write(vhost_content)
+        vhost_file = f'/etc/apache2/sites-available/{self.project_name}.conf'
         
-        print(f"✅ Apache vhost created: {vhost_file}")
+        if self._write_file(vhost_file, vhost_content):
+            self.state['vhost_changed'] = True
+            print(f"✅ Apache vhost created: {vhost_file}")
         return vhost_file
     
     def configure_apache(self):
         """Configure Apache server"""
         print("⚙️ Configuring Apache...")
         
-        # Enable required modules
-        modules = ['wsgi', 'rewrite', 'headers', 'expires']
-        for module in modules:
-            subprocess.run(['a2enmod', module], check=False)
+        # Event MPM: threaded connection handling, Python runs in the WSGI daemon processes
+        self.configure_mpm_event()
+        
+        # Enable required modules (only those not enabled yet)
+        modules = ['wsgi', 'rewrite', 'headers', 'expires', 'http2', 'deflate', 'brotli']
+        to_enable = [module for module in modules
+                     if self.force or not os.path.exists(f'/etc/apache2/mods-enabled/{module}.load')]
+        if to_enable:
+            self._run(['a2enmod', *to_enable], check=False)
+            self.state['apache_changed'] = True
         
         # Create and enable site
         vhost_file = self.create_apache_vhost()
         
         # Disable default site
-        subprocess.run(['a2dissite', '000-default'], check=False)
+        if os.path.exists('/etc/apache2/sites-enabled/000-default.conf'):
+            self._run(['a2dissite', '000-default'], check=False)
+            self.state['apache_changed'] = True
         
         # Enable our site
-        subprocess.run(['a2ensite', self.project_name], check=True)
+        if self.force or not os.path.exists(f'/etc/apache2/sites-enabled/{self.project_name}.conf'):
+            self._run(['a2ensite', self.project_name], check=True)
+            self.state['apache_changed'] = True
         
         # Test Apache configuration
         result = subprocess.run(['apache2ctl', 'configtest'], 
@@ -210,24 +557,69 @@ if __name__ == "__main__":
         # Set proper permissions
         self.set_permissions()
         
-        # Restart Apache
-        subprocess.run(['systemctl', 'restart', 'apache2'], check=True)
-        subprocess.run(['systemctl', 'enable', 'apache2'], check=True)
+        # Graceful reload keeps the warm WSGI daemons; an MPM switch or a stopped Apache needs a restart
+        self.reload_apache()
+        self._run(['systemctl', 'enable', 'apache2'], check=True)
+        
+        # WSGIScriptReloading picks up the new app.wsgi without killing the daemon processes
+        if not self.dry_run:
+            Path(self.project_dir, 'app.wsgi').touch()
+        
+        print("✅ Apache configured")
+    
+    def reload_apache(self):
+        """Apply this run's Apache changes: nothing, graceful reload or restart"""
+        running = subprocess.run(['systemctl', 'is-active', '--quiet', 'apache2']).returncode == 0
+        changed = self.force or self.state['apache_changed'] or self.state['vhost_changed']
+        
+        if running and not changed:
+            print("Apache configuration unchanged, no reload needed")
+            return
+        if running and not self.state['mpm_changed']:
+            if self._run(['systemctl', 'reload', 'apache2']).returncode == 0:
+                return
+            print("⚠️ Apache reload failed, restarting")
+        self._run(['systemctl', 'restart', 'apache2'], check=True)
+    
+    def configure_mpm_event(self):
+        """Switch Apache to the event MPM with tuned worker limits"""
+        print("⚡ Switching Apache to mpm_event...")
+        
+        mpm_config = '''<IfModule mpm_event_module>
+    StartServers             2
+    MinSpareThreads          25
+    MaxSpareThreads          75
+    ThreadLimit              64
+    ThreadsPerChild          25
+    MaxRequestWorkers        150
+    MaxConnectionsPerChild   10000
+</IfModule>
+'''
         
-        print("✅ Apache configured and restarted")
+        if self._write_file('/etc/apache2/mods-available/mpm_event.conf', mpm_config):
+            self.state['apache_changed'] = True
+        
+        # Changing the MPM cannot be done with a graceful reload
+        if self.force or not os.path.exists('/etc/apache2/mods-enabled/mpm_event.load'):
+            self._run(['a2dismod', 'mpm_prefork', 'mpm_worker'], check=False)
+            self._run(['a2enmod', 'mpm_event'], check=True)
+            self.state['apache_changed'] = True
+            self.state['mpm_changed'] = True
     
     def set_permissions(self):
         """Set proper file permissions"""
         print("🔐 Setting file permissions...")
         
         # Set ownership to www-data for Apache
-        subprocess.run(['chown', '-R', f'www-data:{self.user}', self.project_dir], check=False)
+        self._run(['chown', '-R', f'www-data:{self.user}', self.project_dir], check=False)
         
         # Set directory permissions
-        subprocess.run(['chmod', '-R', '755', self.project_dir], check=False)
+        self._run(['chmod', '-R', '755', self.project_dir], check=False)
         
-        # Set specific permissions for sensitive files
-        subprocess.run(['chmod', '644', os.path.join(self.project_dir, 'app.wsgi')], check=False)
+        # Set specific permissions for sensitive files (in-process, no fork)
+        wsgi_path = os.path.join(self.project_dir, 'app.wsgi')
+        if os.path.exists(wsgi_path) and not self.dry_run:
+            os.chmod(wsgi_path, 0o644)
         
         # Create necessary directories with proper permissions
         dirs_to_create = [
@@ -237,11 +629,14 @@ if __name__ == "__main__":
             'logs'
         ]
         
-        for dir_name in dirs_to_create:
-            dir_path = os.path.join(self.project_dir, dir_name)
-            os.makedirs(dir_path, exist_ok=True)
-            subprocess.run(['chown', '-R', 'www-data:www-data', dir_path], check=False)
-            subprocess.run(['chmod', '-R', '755', dir_path], check=False)
+        all_dirs = [os.path.join(self.project_dir, dir_name) for dir_name in dirs_to_create]
+        if not self.dry_run:
+            for dir_path in all_dirs:
+                os.makedirs(dir_path, exist_ok=True)
+        
+        # One chown/chmod over all data dirs instead of two forks per directory
+        self._run(['chown', '-R', 'www-data:www-data', *all_dirs], check=False)
+        self._run(['chmod', '-R', '755', *all_dirs], check=False)
         
         print("✅ Permissions set")
     
@@ -249,49 +644,29 @@ if __name__ == "__main__":
         """Create Supervisor configuration for background tasks"""
         print("👥 Creating Supervisor configuration...")
         
-        supervisor_config = f'''[program:{self.project_name}-worker]
-command={self.python_path} -c "
-import sys
-sys.path.insert(0, '{self.project_dir}')
-import time
-print('Background worker started for {self.project_name}')
-while True:
-    time.sleep(60)
-    # Add any background tasks here if needed
-"
-directory={self.project_dir}
-user=www-data
-autostart=true
-autorestart=true
-redirect_stderr=true
-stdout_logfile=/var/log/{self.project_name}-worker.log
-environment=PYTHONPATH="{self.project_dir}"
-'''
+        supervisor_config = self._render(SUPERVISOR_TEMPLATE)
         
         config_file = f'/etc/supervisor/conf.d/{self.project_name}-worker.conf'
         
-        with open(config_file, 'w') as f:
-            f.write(supervisor_config)
-        
-        # Reload supervisor
-        subprocess.run(['supervisorctl', 'reread'], check=False)
-        subprocess.run(['supervisorctl', 'update'], check=False)
-        subprocess.run(['supervisorctl', 'start', f'{self.project_name}-worker'], check=False)
-        
-        print(f"✅ Supervisor configuration created: {config_file}")
+        # Reload supervisor only when the program definition changed
+        if self._write_file(config_file, supervisor_config):
+            self._run(['supervisorctl', 'reread'], check=False)
+            self._run(['supervisorctl', 'update'], check=False)
+            print(f"✅ Supervisor configuration created: {config_file}")
+        self._run(['supervisorctl', 'start', f'{self.project_name}-worker'], check=False)
     
     def setup_firewall(self):
         """Setup UFW firewall"""
         print("🔒 Configuring firewall...")
         
         # Enable UFW
-        subprocess.run(['ufw', '--force', 'enable'], check=False)
+        self._run(['ufw', '--force', 'enable'], check=False)
         
-        # Allow essential ports
+        # Allow essential ports in one rule (ufw takes a comma-separated port list with proto)
         ports = ['22', '80', '443']  # SSH, HTTP, HTTPS
-        for port in ports:
-            subprocess.run(['ufw', 'allow', port], check=False)
-            print(f"Allowed port {port}")
+        self._run(['ufw', 'allow', 'proto', 'tcp', 'from', 'any', 'to', 'any', 'port', ','.join(ports)],
+                  check=False)
+        print(f"Allowed ports {', '.join(ports)}")
         
         # Show status
         result = subprocess.run(['ufw', 'status'], capture_output=True, text=True)
@@ -303,81 +678,13 @@ environment=PYTHONPATH="{self.project_dir}"
         print("📜 Creating management scripts...")
         
         # Start script
-        start_script = f'''#!/bin/bash
-# Crypto Backtest Signal - Start Script
-
-echo "🚀 Starting Crypto Backtest Signal (Apache + WSGI)..."
-
-# Activate virtual environment
-source {self.venv_path}/bin/activate
-
-# Set environment variables
-export PYTHONPATH="{self.project_dir}"
-export FLASK_ENV=production
-
-# Create necessary directories
-mkdir -p {self.project_dir}/optimizer_cache
-mkdir -p {self.project_dir}/coin_settings
-mkdir -p {self.project_dir}/trading_settings
-mkdir -p {self.project_dir}/logs
-
-# Set permissions
-sudo chown -R www-data:www-data {self.project_dir}/optimizer_cache
-sudo chown -R www-data:www-data {self.project_dir}/coin_settings
-sudo chown -R www-data:www-data {self.project_dir}/trading_settings
-sudo chown -R www-data:www-data {self.project_dir}/logs
-
-# Start Apache
-sudo systemctl start apache2
-sudo systemctl start supervisor
-
-echo "✅ Services started!"
-echo "🌐 Access at: http://{self.public_ip}"
-'''
+        start_script = self._render(START_SCRIPT_TEMPLATE)
         
         # Stop script
-        stop_script = f'''#!/bin/bash
-# Crypto Backtest Signal - Stop Script
-
-echo "🛑 Stopping Crypto Backtest Signal..."
-
-# Stop services
-sudo systemctl stop apache2
-sudo supervisorctl stop {self.project_name}-worker
-
-echo "✅ Services stopped!"
-'''
+        stop_script = self._render(STOP_SCRIPT_TEMPLATE)
         
         # Status script
-        status_script = f'''#!/bin/bash
-# Crypto Backtest Signal - Status Script
-
-echo "📊 Crypto Backtest Signal Status"
-echo "================================"
-
-echo "🌐 Apache Status:"
-sudo systemctl status apache2 --no-pager -l
-
-echo ""
-echo "👥 Supervisor Status:"
-sudo supervisorctl status
-
-echo ""
-echo "🔥 Firewall Status:"
-sudo ufw status
-
-echo ""
-echo "📊 System Resources:"
-echo "Memory: $(free -h | grep '^Mem:' | awk '{{print $3 "/" $2}}')"
-echo "Disk: $(df -h {self.project_dir} | tail -1 | awk '{{print $3 "/" $2 " (" $5 " used)"}}')"
-echo "Load: $(uptime | awk -F'load average:' '{{print $2}}')"
-
-echo ""
-echo "🌐 Access URLs:"
-echo "  • http://{self.public_ip}"
-echo "  • http://{self.local_ip}"
-echo "  • http://localhost"
-'''
+        status_script = self._render(STATUS_SCRIPT_TEMPLATE)
         
         # Write scripts
         scripts = {
@@ -388,59 +695,42 @@ echo "  • http://localhost"
         
         for script_name, script_content in scripts.items():
             script_path = os.path.join(self.project_dir, script_name)
-            with open(script_path, 'w') as f:
-                f.write(script_content)
-            os.chmod(script_path, 0o755)
-            print(f"✅ Created: {script_path}")
+            if self._write_file(script_path, script_content, 0o755):
+                print(f"✅ Created: {script_path}")
     
     def create_requirements_check(self):
         """Create script to check if requirements are installed"""
         print("📋 Creating requirements checker...")
         
-        check_script = f'''#!/bin/bash
-# Check if requirements are installed in virtual environment
-
-echo "🔍 Checking Python requirements..."
-
-# Activate virtual environment
-source {self.venv_path}/bin/activate
-
-# Check if key packages are installed
-python3 -c "
-import sys
-required_packages = [
-    'flask', 'flask_cors', 'requests', 'pandas', 
-    'numpy', 'talib', 'plotly', 'binance', 
-    'python-dotenv', 'psutil'
-]
-
-missing_packages = []
-for package in required_packages:
-    try:
-        __import__(package.replace('-', '_'))
-        print(f'✅ {{package}}')
-    except ImportError:
-        missing_packages.append(package)
-        print(f'❌ {{package}} - NOT INSTALLED')
-
-if missing_packages:
-    print(f'\\n⚠️ Missing packages: {{missing_packages}}')
-    print('\\n📦 To install missing packages:')
-    print(f'source {self.venv_path}/bin/activate')
-    print(f'pip install {{\" \".join(missing_packages)}}')
-    sys.exit(1)
-else:
-    print('\\n✅ All required packages are installed!')
-    sys.exit(0)
-"
-'''
+        check_script = self._render(CHECK_REQUIREMENTS_TEMPLATE)
         
         check_file = os.path.join(self.project_dir, 'check_requirements.sh')
-        with open(check_file, 'w') as f:
-            f.write(check_script)
-        os.chmod(check_file, 0o755)
+        if self._write_file(check_file, check_script, 0o755):
+            print(f"✅ Requirements checker created: {check_file}")
+    
+    @staticmethod
+    def check_requirements():
+        """Check that the required packages are importable, without importing them"""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            specs = dict(zip(REQUIRED_PACKAGES, executor.map(importlib.util.find_spec, REQUIRED_PACKAGES)))
+        
+        missing_packages = []
+        for module_name, package in REQUIRED_PACKAGES.items():
+            if specs[module_name] is not None:
+                print(f'✅ {package}')
+            else:
+                missing_packages.append(package)
+                print(f'❌ {package} - NOT INSTALLED')
+        
+        if missing_packages:
+            print(f'\n⚠️ Missing packages: {missing_packages}')
+            print('\n📦 To install missing packages:')
+            print(f'source {sys.prefix}/bin/activate')
+            print(f'pip install {" ".join(missing_packages)}')
+            return False
         
-        print(f"✅ Requirements checker created: {check_file}")
+        print('\n✅ All required packages are installed!')
+        return True
     
     def display_deployment_info(self):
         """Display deployment information"""
@@ -488,7 +778,7 @@ else:
         print(f"\n⚠️ **Important Notes:**")
         print(f"   • Application runs under www-data user")
         print(f"   • Apache serves the application on port 80")
-        print(f"   • Supervisor manages background workers")
+        print(f"   • Supervisor worker is an idle placeholder (background tasks run in the WSGI daemon)")
         print(f"   • Firewall configured for HTTP/HTTPS access")
         print(f"   • Virtual environment isolated from system Python")
         
@@ -505,34 +795,33 @@ else:
         print("-" * 70)
         
         try:
-            # Check root privileges
-            self.check_root_privileges()
-            
-            # Step 1: Install system packages
-            self.install_system_packages()
-            
-            # Step 2: Create virtual environment
-            self.create_virtual_environment()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                # Step 1: Install system packages (network bound), meanwhile
+                # write the WSGI file, management scripts and requirements checker
+                apt_job = executor.submit(self.install_system_packages)
+                file_jobs = [
+                    executor.submit(self.create_wsgi_file),
+                    executor.submit(self.create_startup_script),
+                    executor.submit(self.create_requirements_check)
+                ]
+                apt_job.result()
+                
+                # Step 2: Virtual environment (needs python3-venv) and firewall (needs ufw)
+                venv_job = executor.submit(self.create_virtual_environment)
+                firewall_job = executor.submit(self.setup_firewall)
+                for job in file_jobs:
+                    job.result()
+                venv_job.result()
+                
+                # Step 3: Configure Apache (needs mod_wsgi, the venv and app.wsgi)
+                self.configure_apache()
+                
+                # Step 4: Create Supervisor config
+                self.create_supervisor_config()
+                
+                firewall_job.result()
             
-            # Step 3: Create WSGI file
-            self.create_wsgi_file()
-            
-            # Step 4: Configure Apache
-            self.configure_apache()
-            
-            # Step 5: Create Supervisor config
-            self.create_supervisor_config()
-            
-            # Step 6: Setup firewall
-            self.setup_firewall()
-            
-            # Step 7: Create management scripts
-            self.create_startup_script()
-            
-            # Step 8: Create requirements checker
-            self.create_requirements_check()
-            
-            # Step 9: Display information
+            # Step 5: Display information
             self.display_deployment_info()
             
             return True
@@ -543,11 +832,24 @@ else:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Crypto Backtest Signal - Ubuntu Apache + WSGI Deployment")
+    parser.add_argument('command', nargs='?', choices=['deploy', 'check'], default='deploy',
+                        help="deploy (default) or check (requirements probe used by check_requirements.sh)")
+    parser.add_argument('--dry-run', action='store_true', help="print what would change without changing it")
+    parser.add_argument('--force', action='store_true', help="redo every step even if its result is already in place")
+    args = parser.parse_args()
+    
+    if args.command == 'check':
+        sys.exit(0 if UbuntuApacheDeployment.check_requirements() else 1)
+    
     print("🔧 Crypto Backtest Signal - Ubuntu Apache + WSGI Deployment")
     print("=" * 60)
     
+    # DNS cache for the HTTP lookups made by this script
+    socket.getaddrinfo = _cached_getaddrinfo
+    
     # Check if running on Ubuntu
-    if not os.path.exists('/etc/ubuntu-release') and 'ubuntu' not in platform.platform().lower():
+    if get_distro_id() != 'ubuntu':
         print("⚠️ This script is designed for Ubuntu systems")
         response = input("Continue anyway? (y/n): ").lower().strip()
         if response not in ['y', 'yes']:
@@ -555,7 +857,7 @@ def main():
             sys.exit(1)
     
     # Run deployment
-    deployer = UbuntuApacheDeployment()
+    deployer = UbuntuApacheDeployment(dry_run=args.dry_run, force=args.force)
     success = deployer.run_deployment()
     
     if success:
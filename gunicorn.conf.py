@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for Crypto Backtest Signal
+Jalankan dengan: gunicorn -c gunicorn.conf.py wsgi:application
+Setara dengan: gunicorn -k gevent --workers 1 --worker-connections 1000 wsgi:application
+"""
+import os
+
+# Server socket
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Worker processes - gevent workers so blocking Binance/Telegram I/O
+# does not serialize requests. The gevent worker monkey-patches the
+# stdlib (socket, ssl, threading) before the app is imported.
+# One worker: the scanner, trading positions, optimizer progress, JobManager
+# jobs and the response cache all live in process memory. With more workers
+# job/status polls land on a process that doesn't know the job, and every
+# worker can start its own scanner (duplicate Telegram signals and trades).
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Long backtests / optimizer calls can take a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+# Worker recycling restarts the only worker and drops that in-process state,
+# so it is off unless explicitly requested
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = 100 if max_requests else 0
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
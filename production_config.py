@@ -12,10 +12,20 @@ class ProductionConfig:
     VENV_PATH = PROJECT_ROOT / "venv"
     PYTHON_PATH = VENV_PATH / "bin" / "python"
     
-    # Apache/WSGI settings
-    WSGI_PROCESSES = 4
-    WSGI_THREADS = 2
-    WSGI_MAX_REQUESTS = 1000
+    # Apache/WSGI settings - one daemon process, scaled with threads. The scanner, trading
+    # positions, optimizer progress, jobs and response cache live in process memory, so a
+    # second process (or recycling this one via maximum-requests) would split or drop them
+    WSGI_PROCESSES = int(os.environ.get('WSGI_PROCESSES', 1))
+    WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 15))
+    WSGI_MAX_REQUESTS = int(os.environ.get('WSGI_MAX_REQUESTS', 0))
+    
+    # mod_wsgi timeouts (seconds) - recycle stuck daemons instead of hanging silently.
+    # Socket/request timeouts match gunicorn's 300 s, long backtests run inside the request
+    WSGI_QUEUE_TIMEOUT = 45
+    WSGI_SOCKET_TIMEOUT = 300
+    WSGI_CONNECT_TIMEOUT = 15
+    WSGI_REQUEST_TIMEOUT = 300
+    WSGI_INACTIVITY_TIMEOUT = 0
     
     # Security settings
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'production-secret-key-change-this'
@@ -52,6 +62,11 @@ class ProductionConfig:
             'processes': cls.WSGI_PROCESSES,
             'threads': cls.WSGI_THREADS,
             'max_requests': cls.WSGI_MAX_REQUESTS,
+            'queue_timeout': cls.WSGI_QUEUE_TIMEOUT,
+            'socket_timeout': cls.WSGI_SOCKET_TIMEOUT,
+            'connect_timeout': cls.WSGI_CONNECT_TIMEOUT,
+            'request_timeout': cls.WSGI_REQUEST_TIMEOUT,
+            'inactivity_timeout': cls.WSGI_INACTIVITY_TIMEOUT,
             'python_home': str(cls.VENV_PATH),
             'python_path': str(cls.PROJECT_ROOT)
         }
\ No newline at end of file
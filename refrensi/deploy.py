@@ -4,21 +4,49 @@ Auto Deployment Script untuk Crypto Backtest Signal
 Menjalankan setup otomatis untuk deployment ke VPS
 """
 
+import json
 import os
 import sys
 import subprocess
 import platform
+import shlex
 import socket
+import tempfile
 import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+# requests is optional here: the IP lookup is a single tiny GET that urllib handles fine
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    _HAS_REQUESTS = True
+except ImportError:
+    import urllib.request as _urlreq
+    _HAS_REQUESTS = False
+
 class AutoDeployment:
+    # requests.Session shared by every HTTP lookup (keep-alive pool + retries), created on first use
+    _session = None
+    
     def __init__(self):
         self.system = platform.system().lower()
-        self.is_vps = self.detect_vps_environment()
-        self.public_ip = self.get_public_ip()
-        self.local_ip = self.get_local_ip()
+        
+        # Shell commands collected by the setup steps, run as one script by run_queued_commands
+        self.commands = []
+        # Rendered config files waiting to be installed by that script
+        self.staged_files = []
+        
+        # Independent lookups (HTTP, UDP socket, hostname) run side by side
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            vps_job = executor.submit(self.detect_vps_environment)
+            public_ip_job = executor.submit(self.get_public_ip)
+            local_ip_job = executor.submit(self.get_local_ip)
+            self.is_vps = vps_job.result()
+            self.public_ip = public_ip_job.result()
+            self.local_ip = local_ip_job.result()
         
     def detect_vps_environment(self):
         """Deteksi apakah berjalan di VPS"""
@@ -39,17 +67,48 @@ class AutoDeployment:
         return any(keyword in hostname for keyword in vps_keywords)
     
     def get_public_ip(self):
-        """Dapatkan IP publik"""
+        """Dapatkan IP publik (ipify dan httpbin diminta bersamaan, jawaban pertama dipakai)"""
+        providers = {
+            'https://api.ipify.org': lambda body: body.strip(),
+            'https://httpbin.org/ip': lambda body: json.loads(body)['origin']
+        }
+        
+        def fetch(url):
+            if _HAS_REQUESTS:
+                response = self._http_session().get(url, timeout=(1, 3))  # (connect, read)
+                response.raise_for_status()
+                body = response.text
+            else:
+                with _urlreq.urlopen(url, timeout=3) as response:
+                    body = response.read().decode()
+            return providers[url](body)
+        
+        executor = ThreadPoolExecutor(max_workers=len(providers))
+        pending = {executor.submit(fetch, url) for url in providers}
         try:
-            import requests
-            response = requests.get('https://api.ipify.org', timeout=5)
-            return response.text.strip()
-        except:
-            try:
-                response = requests.get('https://httpbin.org/ip', timeout=5)
-                return response.json()['origin']
-            except:
-                return "Unable to detect"
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for job in done:
+                    if job.exception() is None:
+                        return job.result()
+            return "Unable to detect"
+        finally:
+            # Don't wait for the slower provider
+            for job in pending:
+                job.cancel()
+            executor.shutdown(wait=False)
+    
+    @classmethod
+    def _http_session(cls):
+        """Shared requests session with a small connection pool and retry/backoff"""
+        if cls._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                  max_retries=Retry(total=2, backoff_factor=0.2))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            cls._session = session
+        return cls._session
     
     def get_local_ip(self):
         """Dapatkan IP lokal"""
@@ -62,13 +121,55 @@ class AutoDeployment:
         except:
             return "127.0.0.1"
     
+    @staticmethod
+    def uses_systemd():
+        """systemd runs the app when it is PID 1, supervisor otherwise"""
+        return os.path.isdir('/run/systemd/system')
+    
+    def queue_command(self, *argv):
+        """Add a command to the deployment script (steps queue instead of forking right away)"""
+        self.commands.append(shlex.join(argv))
+    
+    def queue_file(self, path, content):
+        """Stage a config file and queue its install (target dirs only exist once apt has run)"""
+        fd, staged_path = tempfile.mkstemp(prefix='crypto-backtest-', suffix='.conf')
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        os.chmod(staged_path, 0o644)
+        self.staged_files.append(staged_path)
+        self.queue_command('install', '-D', '-m644', staged_path, path)
+    
+    def run_queued_commands(self):
+        """Write the queued commands to one script and run it with a single sudo/bash process"""
+        if not self.commands:
+            return
+        
+        print(f"⚙️ Running {len(self.commands)} setup commands...")
+        fd, script_path = tempfile.mkstemp(prefix='crypto-backtest-deploy-', suffix='.sh')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                # Stop at the first failing step (e.g. nginx -t must pass before the reload)
+                f.write('#!/bin/bash\nset -e\n' + '\n'.join(self.commands) + '\n')
+            os.chmod(script_path, 0o755)
+            
+            runner = ['sudo', script_path] if self.system == 'linux' and os.geteuid() != 0 else [script_path]
+            result = subprocess.run(runner, check=False)
+            if result.returncode != 0:
+                raise RuntimeError(f"Setup script failed with exit code {result.returncode}")
+        finally:
+            os.remove(script_path)
+            for staged_path in self.staged_files:
+                os.remove(staged_path)
+            self.commands = []
+            self.staged_files = []
+    
     def install_dependencies(self):
         """Install dependencies yang diperlukan"""
         print("🔧 Installing system dependencies...")
         
         if self.system == 'linux':
             # Update package list
-            subprocess.run(['sudo', 'apt', 'update'], check=False)
+            self.queue_command('env', 'DEBIAN_FRONTEND=noninteractive', 'apt-get', 'update')
             
             # Install required packages
             packages = [
@@ -82,33 +183,39 @@ class AutoDeployment:
                 'git'
             ]
             
-            for package in packages:
-                print(f"Installing {package}...")
-                subprocess.run(['sudo', 'apt', 'install', '-y', package], check=False)
+            # One apt transaction: dpkg lock, cache read and dependency solve happen once
+            print(f"Installing {', '.join(packages)}...")
+            self.queue_command('env', 'DEBIAN_FRONTEND=noninteractive',
+                               'apt-get', 'install', '-y', '--no-install-recommends', *packages)
+            
+            # pip below needs python3-pip, so the apt part of the script runs now
+            self.run_queued_commands()
         
-        # Install Python dependencies
+        # Install Python dependencies (single pip resolve) as the invoking user, not inside
+        # the sudo script, so a user venv gets no root-owned files. Not fatal, as before:
+        # e.g. PEP 668 distros refuse pip on the system python
         print("📦 Installing Python dependencies...")
-        subprocess.run([sys.executable, '-m', 'pip', 'install', '--upgrade', 'pip'], check=False)
-        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], check=False)
-        subprocess.run([sys.executable, '-m', 'pip', 'install', 'gunicorn', 'gevent'], check=False)
+        result = subprocess.run([sys.executable, '-m', 'pip', 'install', '--upgrade', 'pip', 'gunicorn', 'gevent',
+                                 '-r', os.path.abspath('requirements.txt')], check=False)
+        if result.returncode != 0:
+            print(f"⚠️ pip install failed with exit code {result.returncode}, install the requirements manually")
     
     def setup_firewall(self):
         """Setup firewall untuk keamanan"""
         if self.system == 'linux' and self.is_vps:
             print("🔒 Setting up firewall...")
             
-            # Enable UFW
-            subprocess.run(['sudo', 'ufw', '--force', 'enable'], check=False)
-            
-            # Allow SSH
-            subprocess.run(['sudo', 'ufw', 'allow', 'ssh'], check=False)
-            
-            # Allow HTTP and HTTPS
-            subprocess.run(['sudo', 'ufw', 'allow', '80'], check=False)
-            subprocess.run(['sudo', 'ufw', 'allow', '443'], check=False)
-            
-            # Allow Flask port
-            subprocess.run(['sudo', 'ufw', 'allow', '5000'], check=False)
+            # SSH, HTTP, HTTPS and the Flask port in one shell. Rules are added first and
+            # UFW enabled last, so a fresh firewall loads them once (SSH is never blocked)
+            ufw_commands = [
+                'ufw allow ssh',
+                'ufw allow 80',
+                'ufw allow 443',
+                'ufw allow 5000',
+                'ufw --force enable',
+                'ufw reload'
+            ]
+            self.commands.append(' && '.join(ufw_commands))
             
             print("✅ Firewall configured")
     
@@ -148,28 +255,20 @@ server {{
             
             config_path = '/etc/nginx/sites-available/crypto-backtest'
             
-            try:
-                with open(config_path, 'w') as f:
-                    f.write(nginx_config)
-                
-                # Enable site
-                subprocess.run(['sudo', 'ln', '-sf', config_path, '/etc/nginx/sites-enabled/'], check=False)
-                
-                # Remove default site
-                subprocess.run(['sudo', 'rm', '-f', '/etc/nginx/sites-enabled/default'], check=False)
-                
-                # Test and reload nginx
-                subprocess.run(['sudo', 'nginx', '-t'], check=False)
-                subprocess.run(['sudo', 'systemctl', 'reload', 'nginx'], check=False)
-                subprocess.run(['sudo', 'systemctl', 'enable', 'nginx'], check=False)
-                
-                print("✅ Nginx configured")
-                
-            except PermissionError:
-                print("⚠️ Need sudo access to configure Nginx")
-                print(f"Please run: sudo tee {config_path} << 'EOF'")
-                print(nginx_config)
-                print("EOF")
+            self.queue_file(config_path, nginx_config)
+            
+            # Enable site
+            self.queue_command('ln', '-sf', config_path, '/etc/nginx/sites-enabled/')
+            
+            # Remove default site
+            self.queue_command('rm', '-f', '/etc/nginx/sites-enabled/default')
+            
+            # Test and reload nginx
+            self.queue_command('nginx', '-t')
+            self.queue_command('systemctl', 'reload', 'nginx')
+            self.queue_command('systemctl', 'enable', 'nginx')
+            
+            print("✅ Nginx configured")
     
     def create_supervisor_config(self):
         """Buat konfigurasi Supervisor untuk auto-restart"""
@@ -188,34 +287,40 @@ environment=PYTHONPATH="{os.getcwd()}"
             
             config_path = '/etc/supervisor/conf.d/crypto-backtest.conf'
             
-            try:
-                with open(config_path, 'w') as f:
-                    f.write(supervisor_config)
-                
-                # Reload supervisor
-                subprocess.run(['sudo', 'supervisorctl', 'reread'], check=False)
-                subprocess.run(['sudo', 'supervisorctl', 'update'], check=False)
-                subprocess.run(['sudo', 'supervisorctl', 'start', 'crypto-backtest'], check=False)
-                
-                print("✅ Supervisor configured")
-                
-            except PermissionError:
-                print("⚠️ Need sudo access to configure Supervisor")
+            self.queue_file(config_path, supervisor_config)
+            
+            # Reload supervisor
+            self.queue_command('supervisorctl', 'reread')
+            self.queue_command('supervisorctl', 'update')
+            self.queue_command('supervisorctl', 'start', 'crypto-backtest')
+            
+            print("✅ Supervisor configured")
     
     def create_systemd_service(self):
         """Buat systemd service sebagai alternatif"""
         if self.system == 'linux':
+            # Run gunicorn as a module of the interpreter pip installed it into (install_dependencies),
+            # so it resolves even when sys.executable is a distro python without a gunicorn script.
+            # gunicorn.conf.py sets the single gevent worker; no --preload, so wsgi.py (and with it
+            # app_production's logging and the services' threads) loads in the worker after gevent
+            # has patched ssl/socket. Type=notify waits for gunicorn's READY instead of assuming
+            # the fork succeeded
             service_config = f"""
 [Unit]
 Description=Crypto Backtest Signal App
 After=network.target
 
 [Service]
-Type=simple
+Type=notify
 User=www-data
 WorkingDirectory={os.getcwd()}
 Environment=PYTHONPATH={os.getcwd()}
-ExecStart={sys.executable} {os.getcwd()}/app.py
+Environment=PYTHONUNBUFFERED=1
+Environment=MALLOC_ARENA_MAX=2
+Environment=PYTHONMALLOC=malloc
+Environment=GUNICORN_BIND=127.0.0.1:5000
+ExecStart={sys.executable} -m gunicorn -c {os.getcwd()}/gunicorn.conf.py wsgi:application
+LimitNOFILE=65535
 Restart=always
 RestartSec=3
 
@@ -225,19 +330,14 @@ WantedBy=multi-user.target
             
             service_path = '/etc/systemd/system/crypto-backtest.service'
             
-            try:
-                with open(service_path, 'w') as f:
-                    f.write(service_config)
-                
-                # Enable and start service
-                subprocess.run(['sudo', 'systemctl', 'daemon-reload'], check=False)
-                subprocess.run(['sudo', 'systemctl', 'enable', 'crypto-backtest'], check=False)
-                subprocess.run(['sudo', 'systemctl', 'start', 'crypto-backtest'], check=False)
-                
-                print("✅ Systemd service configured")
-                
-            except PermissionError:
-                print("⚠️ Need sudo access to configure Systemd service")
+            self.queue_file(service_path, service_config)
+            
+            # Enable and start service
+            self.queue_command('systemctl', 'daemon-reload')
+            self.queue_command('systemctl', 'enable', 'crypto-backtest')
+            self.queue_command('systemctl', 'start', 'crypto-backtest')
+            
+            print("✅ Systemd service configured")
     
     def setup_ssl_certificate(self):
         """Setup SSL certificate dengan Let's Encrypt (opsional)"""
@@ -267,7 +367,7 @@ mkdir -p logs
 # Start the application
 if command -v gunicorn &> /dev/null; then
     echo "Starting with Gunicorn..."
-    gunicorn --bind 0.0.0.0:5000 --workers 4 --worker-class gevent --worker-connections 1000 app:app
+    gunicorn -c gunicorn.conf.py wsgi:application
 else
     echo "Starting with Flask development server..."
     python3 app.py
@@ -303,14 +403,19 @@ fi
         print(f"   • Optimizer: /optimizer")
         
         print(f"\n🔧 Management Commands:")
-        if self.system == 'linux':
+        if self.system == 'linux' and self.uses_systemd():
             print(f"   • Check status: sudo systemctl status crypto-backtest")
             print(f"   • Restart: sudo systemctl restart crypto-backtest")
             print(f"   • View logs: sudo journalctl -u crypto-backtest -f")
             print(f"   • Nginx status: sudo systemctl status nginx")
+        elif self.system == 'linux':
+            print(f"   • Check status: sudo supervisorctl status crypto-backtest")
+            print(f"   • Restart: sudo supervisorctl restart crypto-backtest")
         
         print(f"\n📝 Log Files:")
-        print(f"   • App logs: /var/log/crypto-backtest.log")
+        print(f"   • App logs: {os.getcwd()}/logs/app.log")
+        if self.system == 'linux' and not self.uses_systemd():
+            print(f"   • Supervisor output: /var/log/crypto-backtest.log")
         print(f"   • Nginx logs: /var/log/nginx/")
         
         print("\n⚠️  Important Notes:")
@@ -341,11 +446,17 @@ fi
             # Step 4: Configure web server (if VPS)
             if self.is_vps and self.system == 'linux':
                 self.create_nginx_config()
-                self.create_supervisor_config()
-                self.create_systemd_service()
+                # One process manager only: both would start the app on port 5000
+                if self.uses_systemd():
+                    self.create_systemd_service()
+                else:
+                    self.create_supervisor_config()
                 self.setup_ssl_certificate()
             
-            # Step 5: Display access information
+            # Step 5: Run everything the steps queued (ufw, nginx, systemd or supervisor)
+            self.run_queued_commands()
+            
+            # Step 6: Display access information
             self.display_access_info()
             
             return True
@@ -0,0 +1,356 @@
+"""
+Compiled backtest kernel for the optimizer hot loop (MACD + SMA strategy on ndarrays)
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+from config.settings import Config
+from utils._njit import njit, NUMBA_AVAILABLE
+
+# Kernel only pays off when compiled; without numba the pandas path is faster.
+# fastmath is limited to _simulate_trades - the indicator kernels rely on NaN checks.
+KERNEL_AVAILABLE = NUMBA_AVAILABLE
+
+# Prices may be float32 (Config.OPTIMIZER_FLOAT_DTYPE); running sums and PnL stay float64
+KERNEL_FLOAT_DTYPE = np.dtype(Config.OPTIMIZER_FLOAT_DTYPE)
+PARITY_RTOL = 1e-4
+
+COMMISSION_RATE = 0.0004
+SIGNAL_STRENGTH_WINDOW = 20
+MIN_SIGNAL_STRENGTH = 0.2
+
+# Grid pruning (opt-in): upper bound on the optimization score a trial can still reach,
+# mirroring BacktestRunner._calculate_optimization_score. Return (capped at 5), win rate and
+# trade count are taken at their maximum; only the drawdown penalty is known early, because
+# max drawdown never shrinks. A trial is dropped once this bound is below the best score,
+# so pruning never changes which parameters win.
+SCORE_BOUND_BASE = (5 * 0.4 + 1 * 0.3 + 1 * 0.1) * 10
+SCORE_BOUND_DRAWDOWN_WEIGHT = 0.2 * 10
+SCORE_ROUNDING = 0.01  # scores are rounded to 2 decimals before ranking
+
+
+@njit(cache=True, nogil=True)
+def _sma_loop(values, period):
+    """Running-sum SMA like talib.SMA (leading NaNs skipped, NaN until window is full)"""
+    n = values.shape[0]
+    out = np.empty(n, dtype=values.dtype)
+    out[:] = np.nan
+    start = 0
+    while start < n and np.isnan(values[start]):
+        start += 1
+    if period < 1 or start + period > n:
+        return out
+    total = 0.0
+    for i in range(start, start + period):
+        total += values[i]
+    out[start + period - 1] = total / period
+    for i in range(start + period, n):
+        total += values[i] - values[i - period]
+        out[i] = total / period
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _fill_nan(values):
+    """Forward fill then back fill NaNs (DataFrame.ffill().bfill())"""
+    n = values.shape[0]
+    out = values.copy()
+    last = np.nan
+    for i in range(n):
+        if np.isnan(out[i]):
+            out[i] = last
+        else:
+            last = out[i]
+    nxt = np.nan
+    for i in range(n - 1, -1, -1):
+        if np.isnan(out[i]):
+            out[i] = nxt
+        else:
+            nxt = out[i]
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _macd_loop(close, fast_length, slow_length, signal_length, sma_length):
+    """SMA-based MACD components, NaN-filled like MACDSMAStrategy.calculate_indicators"""
+    fast_ma = _sma_loop(close, fast_length)
+    slow_ma = _sma_loop(close, slow_length)
+    very_slow_ma = _sma_loop(close, sma_length)
+    macd = fast_ma - slow_ma
+    macd_signal = _sma_loop(macd, signal_length)
+    hist = macd - macd_signal
+    return (_fill_nan(fast_ma), _fill_nan(slow_ma), _fill_nan(very_slow_ma),
+            _fill_nan(macd), _fill_nan(hist))
+
+
+@njit(cache=True, nogil=True)
+def _rolling_abs_mean(values, window):
+    """Rolling mean of |values| (NaN until the window is full)"""
+    n = values.shape[0]
+    out = np.empty(n, dtype=values.dtype)
+    out[:] = np.nan
+    total = 0.0
+    for i in range(n):
+        total += abs(values[i])
+        if i >= window:
+            total -= abs(values[i - window])
+        if i >= window - 1:
+            out[i] = total / window
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _signals_loop(close, fast_ma, slow_ma, very_slow_ma, macd, hist, lag):
+    """Entry signals with strength filter, same rules as MACDSMAStrategy._build_signals"""
+    n = close.shape[0]
+    out = np.zeros(n, dtype=np.int64)
+    macd_mean = _rolling_abs_mean(macd, SIGNAL_STRENGTH_WINDOW)
+    hist_mean = _rolling_abs_mean(hist, SIGNAL_STRENGTH_WINDOW)
+    for i in range(1, n):
+        if i < lag:
+            continue
+        direction = 0
+        trend = 0.0
+        past_close = close[i - lag]
+        if (hist[i] > 0 and hist[i - 1] <= 0 and macd[i] > 0 and
+                fast_ma[i] > slow_ma[i] and past_close > very_slow_ma[i] and
+                not slow_ma[i] < very_slow_ma[i]):
+            direction = 1
+            trend = max(0.0, (close[i] - very_slow_ma[i]) / very_slow_ma[i])
+        elif (hist[i] < 0 and hist[i - 1] >= 0 and macd[i] < 0 and
+                fast_ma[i] < slow_ma[i] and past_close < very_slow_ma[i] and
+                not slow_ma[i] > very_slow_ma[i]):
+            direction = -1
+            trend = max(0.0, (very_slow_ma[i] - close[i]) / very_slow_ma[i])
+        else:
+            continue
+        # Strength is NaN before the rolling window fills; NaN < 0.2 is False so the signal stays
+        strength = min(1.0, (abs(macd[i]) / (macd_mean[i] + 1e-8) * 0.4 +
+                             abs(hist[i]) / (hist_mean[i] + 1e-8) * 0.4 +
+                             trend * 0.2))
+        if not strength < MIN_SIGNAL_STRENGTH:
+            out[i] = direction
+    return out
+
+
+@njit(cache=True, nogil=True, fastmath=True)
+def _simulate_trades(close, signal, initial_balance, leverage, margin_ratio,
+                     tp_base, stop_loss, max_tps, tp_close, commission_rate,
+                     prune, best_score):
+    """Futures TP/SL simulation, same rules as FuturesBacktestService.run_backtest
+
+    Returns (final_balance, total_pnl, n_trades, winning_trades, max_drawdown,
+    gross_profit, gross_loss, sharpe_ratio, pruned). With prune set, the run stops with
+    pruned=True as soon as the best score the trial could still reach is below best_score.
+    """
+    n = close.shape[0]
+    balance = initial_balance
+    total_pnl = 0.0
+    n_trades = 0
+    winning = 0
+    gross_profit = 0.0
+    gross_loss = 0.0
+    max_dd = 0.0
+    peak = initial_balance
+
+    in_position = False
+    entry = 0.0
+    direction = 0
+    remaining = 0.0
+    tps_hit = 0
+    trailing = 0.0
+
+    prev_equity = 0.0
+    ret_count = 0
+    ret_sum = 0.0
+    ret_sq_sum = 0.0
+
+    for i in range(n):
+        price = close[i]
+
+        if in_position:
+            if direction == 1:
+                fixed_sl = entry * (1 - stop_loss / 100)
+            else:
+                fixed_sl = entry * (1 + stop_loss / 100)
+
+            close_pct = 0.0
+            is_tp = False
+            if (direction == 1 and price <= fixed_sl) or (direction == -1 and price >= fixed_sl):
+                close_pct = 1.0
+            elif trailing > 0 and ((direction == 1 and price <= max(trailing, fixed_sl)) or
+                                   (direction == -1 and price >= min(trailing, fixed_sl))):
+                close_pct = 1.0
+            elif tps_hit < max_tps:
+                tp_pct = tp_base * (tps_hit + 1)
+                if direction == 1:
+                    tp_price = entry * (1 + tp_pct / 100)
+                else:
+                    tp_price = entry * (1 - tp_pct / 100)
+                if (direction == 1 and price >= tp_price) or (direction == -1 and price <= tp_price):
+                    tps_hit += 1
+                    close_pct = tp_close
+                    is_tp = True
+
+            if close_pct > 0:
+                position_value = remaining * close_pct * entry
+                if direction == 1:
+                    change_pct = (price - entry) / entry * 100
+                else:
+                    change_pct = (entry - price) / entry * 100
+                pnl = change_pct / 100 * position_value * leverage - position_value * commission_rate * 2
+
+                balance += pnl
+                total_pnl += pnl
+                n_trades += 1
+                if pnl > 0:
+                    winning += 1
+                    gross_profit += pnl
+                elif pnl < 0:
+                    gross_loss -= pnl
+
+                if close_pct < 1.0:
+                    remaining *= (1 - close_pct)
+                    if is_tp:
+                        if tps_hit == 1:
+                            # Breakeven, never worse than fixed SL
+                            trailing = max(entry, fixed_sl) if direction == 1 else min(entry, fixed_sl)
+                        else:
+                            prev_pct = tp_base * (tps_hit - 1)
+                            if direction == 1:
+                                trailing = max(entry * (1 + prev_pct / 100), fixed_sl)
+                            else:
+                                trailing = min(entry * (1 - prev_pct / 100), fixed_sl)
+                else:
+                    in_position = False
+                    direction = 0
+                    remaining = 0.0
+                    tps_hit = 0
+                    trailing = 0.0
+
+        if signal[i] != 0 and not in_position:
+            margin_amount = balance * (margin_ratio / 100)
+            if balance >= margin_amount:
+                in_position = True
+                entry = price
+                direction = signal[i]
+                remaining = margin_amount * leverage / price
+                tps_hit = 0
+                trailing = 0.0
+
+        unrealized = 0.0
+        if in_position:
+            change = price - entry
+            if direction == -1:
+                change = -change
+            unrealized = (change / entry) * 100 * leverage * (balance * margin_ratio / 100) / 100
+        equity = balance + unrealized
+
+        if equity > peak:
+            peak = equity
+        else:
+            dd = (peak - equity) / peak
+            if dd > max_dd:
+                max_dd = dd
+                if prune:
+                    score_bound = SCORE_BOUND_BASE + SCORE_BOUND_DRAWDOWN_WEIGHT * max(0.0, 1 - max_dd * 100 / 50)
+                    if score_bound + SCORE_ROUNDING < best_score:
+                        return (balance, total_pnl, n_trades, winning, max_dd,
+                                gross_profit, gross_loss, 0.0, True)
+
+        if i > 0 and prev_equity > 0:
+            r = (equity - prev_equity) / prev_equity
+            ret_count += 1
+            ret_sum += r
+            ret_sq_sum += r * r
+        prev_equity = equity
+
+    sharpe = 0.0
+    if ret_count > 0:
+        mean = ret_sum / ret_count
+        var = ret_sq_sum / ret_count - mean * mean
+        if var > 0:
+            sharpe = mean / np.sqrt(var) * np.sqrt(365.0)
+
+    return (balance, total_pnl, n_trades, winning, max_dd,
+            gross_profit, gross_loss, sharpe, False)
+
+
+def to_close_array(df, dtype=KERNEL_FLOAT_DTYPE):
+    """Extract close prices once per symbol as a contiguous array of the kernel dtype"""
+    return np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64), dtype=dtype)
+
+
+def check_float32_parity(close, params, trading_params, rtol=PARITY_RTOL):
+    """Compare float32 kernel stats against a float64 baseline, returns (ok, stats64, stats32)"""
+    close64 = np.ascontiguousarray(close, dtype=np.float64)
+    stats64 = run_kernel_backtest(close64, params, trading_params)
+    stats32 = run_kernel_backtest(close64.astype(np.float32), params, trading_params)
+    keys = ('final_balance', 'total_pnl', 'total_trades', 'max_drawdown')
+    ok = bool(np.allclose([stats64[k] for k in keys], [stats32[k] for k in keys], rtol=rtol))
+    return ok, stats64, stats32
+
+
+def run_kernel_backtest(close, params, trading_params, best_score=None):
+    """Run indicators, signals and trade simulation for one parameter set
+
+    Returns a stats dict, or None when the trial was pruned because it can no longer
+    reach best_score (no pruning when best_score is None).
+    """
+    sma_length = int(params['sma_length'])
+    if close.shape[0] < sma_length:
+        raise Exception(f"Insufficient data points. Need at least {sma_length} candles")
+
+    fast_ma, slow_ma, very_slow_ma, macd, hist = _macd_loop(
+        close, int(params['macd_fast']), int(params['macd_slow']), int(params['macd_signal']), sma_length
+    )
+    signal = _signals_loop(close, fast_ma, slow_ma, very_slow_ma, macd, hist, int(params['macd_slow']))
+
+    initial_balance = float(trading_params['balance'])
+    (final_balance, total_pnl, n_trades, winning, max_dd,
+     gross_profit, gross_loss, sharpe, pruned) = _simulate_trades(
+        close, signal, initial_balance,
+        float(trading_params['leverage']), float(trading_params['margin']),
+        float(params['tp_base']), float(params['stop_loss']),
+        int(trading_params.get('max_tps', 10)), float(trading_params.get('tp_close', 25)) / 100,
+        COMMISSION_RATE, best_score is not None, float(best_score or 0.0)
+    )
+    if pruned:
+        return None
+
+    if gross_loss == 0:
+        profit_factor = float('inf') if gross_profit > 0 else 0
+    else:
+        profit_factor = gross_profit / gross_loss
+
+    return {
+        'initial_balance': initial_balance,
+        'final_balance': final_balance,
+        'total_return': (final_balance - initial_balance) / initial_balance * 100,
+        'total_pnl': total_pnl,
+        'total_trades': int(n_trades),
+        'winning_trades': int(winning),
+        'win_rate': (winning / n_trades * 100) if n_trades > 0 else 0,
+        'max_drawdown': max_dd * 100,
+        'profit_factor': profit_factor,
+        'sharpe_ratio': round(sharpe, 4)
+    }
+
+
+def _run_on_buffer(buffer, shape, dtype, params, trading_params, best_score=None):
+    """Run the kernel on a zero-copy view of buffer, returns (stats, error)"""
+    close = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer)
+    try:
+        return run_kernel_backtest(close, params, trading_params, best_score), None
+    except Exception as e:
+        # No traceback (and no view of the buffer) may outlive this frame
+        return None, str(e)
+
+
+def eval_params_shared(shm_name, shape, dtype, params, trading_params, best_score=None):
+    """Process pool worker: backtest one parameter set on close prices in shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _run_on_buffer(shm.buf, shape, dtype, params, trading_params, best_score)
+    finally:
+        shm.close()
@@ -1,7 +1,151 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from utils._njit import njit, prange, NUMBA_AVAILABLE
+
+# OHLCV (always present) followed by the indicator columns that may be missing or NaN
+CHART_COLUMNS = ['open', 'high', 'low', 'close', 'volume',
+                 'macd', 'macd_signal', 'macd_histogram', 'fast_ma', 'slow_ma', 'very_slow_ma']
+
+# Above this many bars the drawdown scan runs as a parallel numba kernel
+PARALLEL_DRAWDOWN_MIN_BARS = 1_000_000
+DRAWDOWN_CHUNKS = 64
+
+
+@njit(cache=True, nogil=True)
+def _run_backtest_core(prices, sigs, events, initial_balance, leverage, margin_ratio, commission_rate):
+    """Signal-flip simulation visiting only the bars in `events` (non-zero signals)
+
+    Position changes only happen on signal bars, so the rest of the bars are left to
+    the vectorized equity pass. The running balance is kept only for the margin check;
+    trade PnL is recomputed in bulk by _trade_pnl. Returns (entry_idx, exit_idx, direction)
+    per closed trade plus (open_idx, open_direction) of a position still open at the end
+    (-1, 0 when flat).
+    """
+    n_events = events.shape[0]
+    entry_idx = np.empty(n_events, dtype=np.int64)
+    exit_idx = np.empty(n_events, dtype=np.int64)
+    direction = np.empty(n_events, dtype=np.int8)
+
+    balance = initial_balance
+    position = 0  # 0: no position, 1: long, -1: short
+    entry_price = 0.0
+    entry_i = -1
+    n_trades = 0
+
+    for k in range(n_events):
+        i = events[k]
+        price = prices[i]
+        signal = sigs[i]
+
+        # Close existing position if opposite signal
+        if position != 0 and signal != position:
+            if position == 1:
+                gross = (price - entry_price) * leverage
+            else:
+                gross = (entry_price - price) * leverage
+            balance += gross - abs(gross) * commission_rate
+
+            entry_idx[n_trades] = entry_i
+            exit_idx[n_trades] = i
+            direction[n_trades] = position
+            n_trades += 1
+            position = 0
+
+        # Open new position (margin_ratio is a percentage)
+        if position == 0 and balance >= balance * margin_ratio / 100:
+            position = signal
+            entry_price = price
+            entry_i = i
+
+    if position == 0:
+        entry_i = -1
+    return entry_idx[:n_trades], exit_idx[:n_trades], direction[:n_trades], entry_i, position
+
+
+def _trade_pnl(prices, entry_idx, exit_idx, direction, leverage, commission_rate):
+    """Net PnL and commission of all closed trades in three array operations"""
+    gross = (prices[exit_idx] - prices[entry_idx]) * leverage * direction
+    commission = np.abs(gross) * commission_rate
+    return gross - commission, commission
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _max_drawdown_parallel(equity, initial_peak):
+    """Max drawdown as a two-pass segmented scan: chunk maxima in parallel, carried-in
+    peaks serially over the chunks, then each chunk's worst drawdown in parallel"""
+    n = equity.shape[0]
+    size = (n + DRAWDOWN_CHUNKS - 1) // DRAWDOWN_CHUNKS
+
+    chunk_max = np.empty(DRAWDOWN_CHUNKS, dtype=np.float64)
+    for c in prange(DRAWDOWN_CHUNKS):
+        best = -np.inf
+        for i in range(c * size, min((c + 1) * size, n)):
+            if equity[i] > best:
+                best = equity[i]
+        chunk_max[c] = best
+
+    carry = np.empty(DRAWDOWN_CHUNKS, dtype=np.float64)
+    peak = initial_peak
+    for c in range(DRAWDOWN_CHUNKS):
+        carry[c] = peak
+        if chunk_max[c] > peak:
+            peak = chunk_max[c]
+
+    chunk_dd = np.zeros(DRAWDOWN_CHUNKS, dtype=np.float64)
+    for c in prange(DRAWDOWN_CHUNKS):
+        peak = carry[c]
+        worst = 0.0
+        for i in range(c * size, min((c + 1) * size, n)):
+            if equity[i] > peak:
+                peak = equity[i]
+            else:
+                dd = (peak - equity[i]) / peak
+                if dd > worst:
+                    worst = dd
+        chunk_dd[c] = worst
+    return chunk_dd.max()
+
+
+def _max_drawdown(equity, initial_balance):
+    """Largest drop from the running equity peak (starting at the initial balance), as a fraction"""
+    if not len(equity):
+        return 0
+    if NUMBA_AVAILABLE and len(equity) >= PARALLEL_DRAWDOWN_MIN_BARS:
+        return float(_max_drawdown_parallel(equity, float(initial_balance)))
+    peak = np.maximum.accumulate(np.maximum(equity, initial_balance))
+    return float(((peak - equity) / peak).max())
+
+
+def _equity_arrays(prices, initial_balance, leverage, entry_idx, exit_idx, direction, pnl, open_idx, open_direction):
+    """Per-bar balance and unrealized PnL from the trade list, without a per-bar loop"""
+    n = prices.shape[0]
+    
+    # Realized PnL lands on the exit bar; the initial balance rides on bar 0 so the
+    # cumulative sum adds up in the same order as a running balance
+    realized = np.zeros(n, dtype=np.float64)
+    if n:
+        realized[exit_idx] = pnl
+        realized[0] += initial_balance
+    balance = np.cumsum(realized)
+    
+    # Holding segments [entry, exit) - the tail segment of an open position runs to the end
+    starts, ends, sides = entry_idx, exit_idx, direction
+    if open_idx >= 0:
+        starts = np.append(starts, open_idx)
+        ends = np.append(ends, n)
+        sides = np.append(sides, np.int8(open_direction))
+    
+    unrealized = np.zeros(n, dtype=np.float64)
+    if len(starts):
+        bars = np.arange(n)
+        segment = np.searchsorted(starts, bars, side='right') - 1
+        held = (segment >= 0) & (bars < ends[np.maximum(segment, 0)])
+        segment = segment[held]
+        unrealized[held] = (prices[held] - prices[starts[segment]]) * leverage * sides[segment]
+    return balance, unrealized
+
+
 class BacktestService:
     def __init__(self):
         self.commission_rate = 0.0004  # 0.04% commission
@@ -9,148 +153,102 @@ class BacktestService:
     def run_backtest(self, df, signals, initial_balance, leverage, margin_ratio):
         """Run backtest simulation"""
         try:
-            results = {
-                'trades': [],
-                'equity_curve': [],
-                'statistics': {}
-            }
+            prices = signals['price'].to_numpy(dtype=np.float64)
+            sigs = signals['signal'].to_numpy(dtype=np.int8)
             
-            balance = initial_balance
-            position = 0  # 0: no position, 1: long, -1: short
-            entry_price = 0
-            entry_time = None
-            total_trades = 0
-            winning_trades = 0
-            total_pnl = 0
-            max_drawdown = 0
-            peak_balance = initial_balance
+            # Only signal bars can change the position
+            events = np.flatnonzero(sigs)
+            entry_idx, exit_idx, direction, open_idx, open_direction = _run_backtest_core(
+                prices, sigs, events, float(initial_balance), float(leverage), float(margin_ratio),
+                self.commission_rate
+            )
+            pnl, commission = _trade_pnl(prices, entry_idx, exit_idx, direction,
+                                         float(leverage), self.commission_rate)
+            balance, unrealized = _equity_arrays(
+                prices, float(initial_balance), float(leverage),
+                entry_idx, exit_idx, direction, pnl, open_idx, open_direction
+            )
+            equity = balance + unrealized
             
-            for timestamp, row in signals.iterrows():
-                current_price = row['price']
-                signal = row['signal']
-                
-                # Close existing position if opposite signal
-                if position != 0 and signal != 0 and signal != position:
-                    # Calculate PnL
-                    if position == 1:  # Close long
-                        pnl = (current_price - entry_price) * leverage
-                    else:  # Close short
-                        pnl = (entry_price - current_price) * leverage
-                    
-                    # Apply commission
-                    commission = abs(pnl) * self.commission_rate
-                    net_pnl = pnl - commission
-                    
-                    balance += net_pnl
-                    total_pnl += net_pnl
-                    total_trades += 1
-                    
-                    if net_pnl > 0:
-                        winning_trades += 1
-                    
-                    # Record trade
-                    results['trades'].append({
-                        'entry_time': entry_time,
-                        'exit_time': timestamp,
-                        'entry_price': entry_price,
-                        'exit_price': current_price,
-                        'position': 'Long' if position == 1 else 'Short',
-                        'pnl': net_pnl,
-                        'commission': commission
-                    })
-                    
-                    position = 0
-                
-                # Open new position
-                if signal != 0 and position == 0:
-                    # Check if we have enough margin (margin_ratio is now percentage)
-                    required_margin = (balance * margin_ratio / 100)
-                    if balance >= required_margin:
-                        position = signal
-                        entry_price = current_price
-                        entry_time = timestamp
-                
-                # Update equity curve
-                unrealized_pnl = 0
-                if position != 0:
-                    if position == 1:  # Long position
-                        unrealized_pnl = (current_price - entry_price) * leverage
-                    else:  # Short position
-                        unrealized_pnl = (entry_price - current_price) * leverage
-                
-                current_equity = balance + unrealized_pnl
-                results['equity_curve'].append({
+            # Trade and equity dicts are only built once the simulation is done
+            timestamps = signals.index
+            trades = [
+                {
+                    'entry_time': timestamps[entry],
+                    'exit_time': timestamps[exit_],
+                    'entry_price': prices[entry].item(),
+                    'exit_price': prices[exit_].item(),
+                    'position': 'Long' if side == 1 else 'Short',
+                    'pnl': trade_pnl,
+                    'commission': fee
+                }
+                for entry, exit_, side, trade_pnl, fee in zip(
+                    entry_idx.tolist(), exit_idx.tolist(), direction.tolist(), pnl.tolist(), commission.tolist()
+                )
+            ]
+            equity_curve = [
+                {
                     'timestamp': timestamp,
-                    'balance': balance,
-                    'unrealized_pnl': unrealized_pnl,
-                    'equity': current_equity
-                })
-                
-                # Track drawdown
-                if current_equity > peak_balance:
-                    peak_balance = current_equity
-                else:
-                    drawdown = (peak_balance - current_equity) / peak_balance
-                    max_drawdown = max(max_drawdown, drawdown)
+                    'balance': bar_balance,
+                    'unrealized_pnl': bar_unrealized,
+                    'equity': bar_equity
+                }
+                for timestamp, bar_balance, bar_unrealized, bar_equity in zip(
+                    timestamps, balance.tolist(), unrealized.tolist(), equity.tolist()
+                )
+            ]
+            
+            max_drawdown = _max_drawdown(equity, initial_balance)
             
             # Calculate statistics
+            total_trades = len(trades)
+            winning_trades = int((pnl > 0).sum())
             win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            final_balance = balance
+            final_balance = float(balance[-1]) if len(balance) else initial_balance
             total_return = ((final_balance - initial_balance) / initial_balance) * 100
             
-            results['statistics'] = {
-                'initial_balance': initial_balance,
-                'final_balance': final_balance,
-                'total_return': total_return,
-                'total_pnl': total_pnl,
-                'total_trades': total_trades,
-                'winning_trades': winning_trades,
-                'win_rate': win_rate,
-                'max_drawdown': max_drawdown * 100,
-                'leverage_used': leverage
+            return {
+                'trades': trades,
+                'equity_curve': equity_curve,
+                'statistics': {
+                    'initial_balance': initial_balance,
+                    'final_balance': final_balance,
+                    'total_return': total_return,
+                    'total_pnl': float(pnl.sum()),
+                    'total_trades': total_trades,
+                    'winning_trades': winning_trades,
+                    'win_rate': win_rate,
+                    'max_drawdown': max_drawdown * 100,
+                    'leverage_used': leverage
+                }
             }
-            
-            return results
         except Exception as e:
             raise Exception(f"Error running backtest: {str(e)}")
     
     def prepare_chart_data(self, df, signals):
         """Prepare data for candlestick chart with signals"""
         try:
-            chart_data = []
+            # One join + bulk casts instead of a .loc lookup and isna checks per row
+            merged = df.reindex(columns=CHART_COLUMNS).astype('float64').join(
+                signals[['signal', 'signal_strength']], how='left'
+            ).fillna({'signal': 0, 'signal_strength': 0})
+            merged = merged.astype({'signal': 'int32', 'signal_strength': 'float64'})
             
-            for timestamp, row in df.iterrows():
-                signal_info = signals.loc[timestamp] if timestamp in signals.index else None
-                
-                candle = {
-                    'timestamp': timestamp.isoformat(),
-                    'open': float(row['open']),
-                    'high': float(row['high']),
-                    'low': float(row['low']),
-                    'close': float(row['close']),
-                    'volume': float(row['volume']),
-                    'macd': float(row['macd']) if 'macd' in row and not pd.isna(row['macd']) else None,
-                    'macd_signal': float(row['macd_signal']) if 'macd_signal' in row and not pd.isna(row['macd_signal']) else None,
-                    'macd_histogram': float(row['macd_histogram']) if 'macd_histogram' in row and not pd.isna(row['macd_histogram']) else None,
-                    'fast_ma': float(row['fast_ma']) if 'fast_ma' in row and not pd.isna(row['fast_ma']) else None,
-                    'slow_ma': float(row['slow_ma']) if 'slow_ma' in row and not pd.isna(row['slow_ma']) else None,
-                    'very_slow_ma': float(row['very_slow_ma']) if 'very_slow_ma' in row and not pd.isna(row['very_slow_ma']) else None
-                }
-                
-                if signal_info is not None:
-                    candle['signal'] = int(signal_info['signal'])
-                    candle['signal_strength'] = float(signal_info['signal_strength'])
-                else:
-                    candle['signal'] = 0
-                    candle['signal_strength'] = 0
-                
-                chart_data.append(candle)
+            # NaN -> None (object dtype, otherwise pandas turns None back into NaN)
+            indicator_columns = CHART_COLUMNS[5:]
+            merged[indicator_columns] = merged[indicator_columns].astype(object).where(
+                merged[indicator_columns].notna(), None
+            )
+            merged.insert(0, 'timestamp', merged.index.strftime('%Y-%m-%dT%H:%M:%S'))
+            
+            chart_data = merged.to_dict('records')
             
             # Debug: Count signals in chart data
-            buy_count = len([d for d in chart_data if d['signal'] == 1])
-            sell_count = len([d for d in chart_data if d['signal'] == -1])
+            signal_values = merged['signal'].to_numpy()
+            buy_count = int((signal_values == 1).sum())
+            sell_count = int((signal_values == -1).sum())
             print(f"Chart data prepared: {buy_count} buy signals, {sell_count} sell signals out of {len(chart_data)} candles")
             
             return chart_data
         except Exception as e:
-            raise Exception(f"Error preparing chart data: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error preparing chart data: {str(e)}")
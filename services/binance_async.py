@@ -0,0 +1,191 @@
+"""
+Async Binance futures klines fetcher for bulk data loads
+"""
+import asyncio
+import time
+from itertools import chain
+
+import aiohttp
+import pandas as pd
+
+from services.binance_service import klines_to_frame
+
+FAPI_KLINES_URL = "https://fapi.binance.com/fapi/v1/klines"
+MAX_KLINES_PER_REQUEST = 1500  # Futures klines endpoint limit
+MAX_CONCURRENT_REQUESTS = 20
+MAX_CONCURRENT_WINDOWS = 10  # Per-symbol window fetches in flight (keeps request weight bursts moderate)
+MAX_WEIGHT_PER_MINUTE = 2400  # Futures REST request weight limit per IP
+WINDOW_RETRIES = 5  # Attempts after the first before a window fails the whole fetch
+RETRY_BACKOFF_SECONDS = 1.0  # Doubled on every retry when Binance sends no Retry-After
+MAX_RETRY_AFTER_SECONDS = 120  # Longer Retry-After (e.g. a 418 IP ban) fails instead of blocking
+RETRYABLE_STATUSES = {418, 429, 500, 502, 503, 504}
+
+class BinanceRateLimiter:
+    """Pause only when the weight Binance reports (X-MBX-USED-WEIGHT-1M) nears the per-minute limit"""
+    
+    def __init__(self, max_weight=MAX_WEIGHT_PER_MINUTE, threshold=0.9):
+        self.max_weight = max_weight
+        self.threshold = threshold
+        self.minute = int(time.time() // 60)
+        self.used = 0
+    
+    def update(self, headers):
+        """Record the used weight from a response"""
+        used = headers.get('X-MBX-USED-WEIGHT-1M')
+        if used is not None:
+            self.minute = int(time.time() // 60)
+            self.used = int(used)
+    
+    def delay(self):
+        """Seconds to wait before the next request, 0 while under the threshold"""
+        now = time.time()
+        if int(now // 60) != self.minute:
+            # Binance resets the weight counter every clock minute
+            self.minute = int(now // 60)
+            self.used = 0
+        if self.used > self.threshold * self.max_weight:
+            return 60 - now % 60
+        return 0
+    
+    async def wait(self):
+        """Sleep until the next minute if the weight budget is nearly used up"""
+        delay = self.delay()
+        if delay > 0:
+            print(f"⏳ Binance weight {self.used}/{self.max_weight}, pausing {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+# Weight limits are per IP, so every fetch in the process shares one limiter
+rate_limiter = BinanceRateLimiter()
+
+async def _fetch_symbol_klines(session, semaphore, symbol, interval, start_ts, end_ts):
+    """Fetch all kline pages for one symbol"""
+    batches = []
+    current_start = start_ts
+    
+    while current_start < end_ts:
+        params = {
+            'symbol': symbol,
+            'interval': interval,
+            'startTime': current_start,
+            'endTime': end_ts,
+            'limit': MAX_KLINES_PER_REQUEST
+        }
+        async with semaphore:
+            await rate_limiter.wait()
+            async with session.get(FAPI_KLINES_URL, params=params) as response:
+                rate_limiter.update(response.headers)
+                response.raise_for_status()
+                batch = await response.json()
+        
+        if not batch:
+            break
+        
+        batches.append(batch)
+        
+        # Next page starts after the last kline's close time (already an int in the JSON)
+        current_start = batch[-1][6] + 1
+        if len(batch) < MAX_KLINES_PER_REQUEST:
+            break
+    
+    return list(chain.from_iterable(batches))
+
+def _retry_after(error):
+    """Seconds Binance asked us to wait (Retry-After header), None if not sent"""
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers['Retry-After'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+async def _fetch_window(session, semaphore, symbol, interval, start_ts, end_ts, limit):
+    """Fetch one fixed [start_ts, end_ts] window of klines, retrying rate limits, 5xx and timeouts"""
+    params = {
+        'symbol': symbol,
+        'interval': interval,
+        'startTime': start_ts,
+        'endTime': end_ts,
+        'limit': limit
+    }
+    for attempt in range(WINDOW_RETRIES + 1):
+        try:
+            async with semaphore:
+                await rate_limiter.wait()
+                async with session.get(FAPI_KLINES_URL, params=params) as response:
+                    rate_limiter.update(response.headers)
+                    response.raise_for_status()
+                    return await response.json()
+        except aiohttp.ClientResponseError as e:
+            if e.status not in RETRYABLE_STATUSES or attempt == WINDOW_RETRIES:
+                raise
+            delay = _retry_after(e)
+            if delay is not None and delay > MAX_RETRY_AFTER_SECONDS:
+                raise
+            error = f"HTTP {e.status}"
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+            if attempt == WINDOW_RETRIES:
+                raise
+            delay = None
+            error = type(e).__name__
+        
+        # Sleep outside the semaphore so other windows keep going
+        if delay is None:
+            delay = RETRY_BACKOFF_SECONDS * 2 ** attempt
+        print(f"⏳ {symbol} window {start_ts}-{end_ts}: {error}, retry {attempt + 1}/{WINDOW_RETRIES} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+async def fetch_klines_windows(symbol, interval, start_ts, end_ts, interval_ms, limit=MAX_KLINES_PER_REQUEST,
+                               max_concurrency=MAX_CONCURRENT_WINDOWS):
+    """Fetch one symbol's range as precomputed windows of `limit` klines, all requested concurrently
+
+    Returns the batches in time order; raises if a window still fails after its retries,
+    so a range is never returned (and cached) with a hole in it.
+    """
+    step = limit * interval_ms
+    windows = [(start, min(start + step - 1, end_ts)) for start in range(start_ts, end_ts, step)]
+    
+    semaphore = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=120)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        results = await asyncio.gather(*[
+            _fetch_window(session, semaphore, symbol, interval, start, end, limit)
+            for start, end in windows
+        ], return_exceptions=True)
+    
+    for (start, end), result in zip(windows, results):
+        if isinstance(result, Exception):
+            print(f"Error in batch request {start}-{end}: {str(result)}")
+            raise result
+    return results
+
+async def _fetch_symbol_frame(session, semaphore, symbol, interval, start_date, end_date):
+    """Fetch one symbol as a DataFrame, None on failure"""
+    try:
+        start_ts = int(pd.Timestamp(start_date).timestamp() * 1000)
+        end_ts = int(pd.Timestamp(end_date).timestamp() * 1000)
+        
+        klines = await _fetch_symbol_klines(session, semaphore, symbol, interval, start_ts, end_ts)
+        if not klines:
+            print(f"  ❌ No klines returned for {symbol}")
+            return None
+        
+        df = klines_to_frame(klines, start_date, end_date)
+        return df if not df.empty else None
+    except Exception as e:
+        print(f"  ❌ Async fetch failed for {symbol}: {str(e)}")
+        return None
+
+async def fetch_many_klines(symbols, interval, start_date, end_date, max_concurrency=MAX_CONCURRENT_REQUESTS):
+    """Fetch klines for many symbols concurrently over one keep-alive session, returns {symbol: df or None}"""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    connector = aiohttp.TCPConnector(limit=max_concurrency, keepalive_timeout=60)
+    timeout = aiohttp.ClientTimeout(total=120)
+    
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        frames = await asyncio.gather(*[
+            _fetch_symbol_frame(session, semaphore, symbol, interval, start_date, end_date)
+            for symbol in symbols
+        ])
+    
+    return dict(zip(symbols, frames))
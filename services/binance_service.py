@@ -1,8 +1,47 @@
 from binance import Client
+import asyncio
 import pandas as pd
+import numpy as np
 from datetime import datetime
+import json
+import os
 import time
+import threading
+from collections import OrderedDict
+from itertools import chain
 from config.settings import Config
+from services.optimization.klines_cache import daily_klines_store
+
+# Raw kline row layout from the API; only timestamp + OHLCV are kept
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base',
+    'taker_buy_quote', 'ignore'
+]
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def klines_to_frame(klines, start_date, end_date):
+    """Convert raw Binance kline rows to an OHLCV DataFrame indexed by timestamp"""
+    rows = np.asarray(klines, dtype=object).reshape(-1, len(KLINE_COLUMNS))
+    
+    # Typed columns built straight from the row array: one float conversion for
+    # all OHLCV values, no intermediate object-dtype DataFrame columns
+    float_dtype = np.dtype(Config.KLINES_FLOAT_DTYPE)
+    ohlcv = rows[:, 1:6].astype(np.float64)
+    index = pd.DatetimeIndex(pd.to_datetime(rows[:, 0].astype(np.int64), unit='ms'), name='timestamp')
+    df = pd.DataFrame(
+        {col: np.ascontiguousarray(ohlcv[:, i], dtype=float_dtype) for i, col in enumerate(OHLCV_COLUMNS)},
+        index=index
+    )
+    
+    # Remove duplicates and sort
+    df = df[~df.index.duplicated(keep='first')]
+    df = df.sort_index()
+    
+    # Filter by exact date range
+    start_filter = pd.Timestamp(start_date)
+    end_filter = pd.Timestamp(end_date)
+    return df[(df.index >= start_filter) & (df.index <= end_filter)]
 
 class BinanceService:
     def __init__(self):
@@ -17,8 +56,32 @@ class BinanceService:
         self.base_url = "https://fapi.binance.com"  # Production API
         self.max_klines_per_request = 1000  # Binance limit per request
         
-    def get_futures_symbols(self):
-        """Get all available futures trading symbols using python-binance"""
+        # In-memory LRU cache for get_klines_cached: key -> (expires_at, df)
+        self._klines_cache = OrderedDict()
+        self._klines_cache_lock = threading.Lock()
+        
+        # Futures symbol list cache: (expires_at, symbols) in memory, JSON file shared across restarts
+        self._symbols_cache_path = os.path.join("optimizer_cache", "futures_symbols.json")
+        self._symbols_mem_cache = None
+        
+    def get_futures_symbols(self, refresh=False):
+        """Get all available futures trading symbols (cached for FUTURES_SYMBOLS_CACHE_TTL, refresh=True bypasses)"""
+        now = time.time()
+        if not refresh:
+            cached = self._symbols_mem_cache
+            if cached and cached[0] > now:
+                return list(cached[1])
+            
+            try:
+                expires_at = os.path.getmtime(self._symbols_cache_path) + Config.FUTURES_SYMBOLS_CACHE_TTL
+                if expires_at > now:
+                    with open(self._symbols_cache_path) as f:
+                        symbols = json.load(f)
+                    self._symbols_mem_cache = (expires_at, symbols)
+                    return list(symbols)
+            except (OSError, ValueError):
+                pass
+        
         try:
             if not self.client:
                 raise Exception("Binance client not initialized")
@@ -42,118 +105,147 @@ class BinanceService:
             
             print(f"Found {len(symbols)} trading symbols")
             
+            self._symbols_mem_cache = (now + Config.FUTURES_SYMBOLS_CACHE_TTL, symbols)
+            self._save_symbols_cache(symbols)
+            
             # Return all symbols (no limit)
-            return symbols
+            return list(symbols)
         except Exception as e:
             print(f"Error in get_futures_symbols: {str(e)}")
             raise Exception(f"Error fetching symbols: {str(e)}")
     
+    def _save_symbols_cache(self, symbols):
+        """Write the symbol list cache file (atomic replace)"""
+        try:
+            os.makedirs(os.path.dirname(self._symbols_cache_path), exist_ok=True)
+            tmp_path = self._symbols_cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(symbols, f)
+            os.replace(tmp_path, self._symbols_cache_path)
+        except Exception as e:
+            print(f"Error saving futures symbols cache: {str(e)}")
+    
     def get_klines(self, symbol, interval, start_date, end_date):
-        """Get candlestick data using python-binance with pagination for large datasets"""
+        """Get candlestick data - completed days from the daily .npy store, the rest from the API"""
         try:
             print(f"Fetching klines for {symbol} from {start_date} to {end_date}")
             
-            # Convert dates to timestamps for pagination
-            start_ts = int(pd.Timestamp(start_date).timestamp() * 1000)
-            end_ts = int(pd.Timestamp(end_date).timestamp() * 1000)
-            
-            all_klines = []
-            current_start = start_ts
-            
-            print(f"Fetching data in batches (max {self.max_klines_per_request} per request)...")
-            
-            while current_start < end_ts:
-                try:
-                    # Get batch of klines
-                    batch_klines = self.client.futures_historical_klines(
-                        symbol=symbol,
-                        interval=interval,
-                        start_str=current_start,
-                        end_str=end_ts,
-                        limit=self.max_klines_per_request
-                    )
-                    
-                    if not batch_klines:
-                        print("No more data available")
-                        break
-                    
-                    print(f"Fetched batch: {len(batch_klines)} klines")
-                    all_klines.extend(batch_klines)
-                    
-                    # Update start time for next batch (use last kline's close time + 1ms)
-                    last_kline_close_time = int(batch_klines[-1][6])  # close_time
-                    current_start = last_kline_close_time + 1
-                    
-                    # Add small delay to avoid rate limiting
-                    time.sleep(0.1)
-                    
-                    # Break if we got less than max limit (means we reached the end)
-                    if len(batch_klines) < self.max_klines_per_request:
-                        break
-                        
-                except Exception as batch_error:
-                    print(f"Error in batch request: {str(batch_error)}")
-                    # Try to continue with next batch
-                    current_start += 60000 * self._get_interval_minutes(interval)  # Skip forward
-                    continue
+            start = pd.Timestamp(start_date)
+            end = pd.Timestamp(end_date)
+            interval_seconds = Config.INTERVAL_SECONDS.get(interval, 3600)
             
-            # Remove duplicates based on timestamp
-            seen_timestamps = set()
-            unique_klines = []
-            for kline in all_klines:
-                timestamp = kline[0]
-                if timestamp not in seen_timestamps:
-                    seen_timestamps.add(timestamp)
-                    unique_klines.append(kline)
+            if interval_seconds <= 86400:
+                df = self._get_klines_by_day(symbol, interval, start, end, interval_seconds)
+            else:
+                # 3d/1w/1M bars span several days, nothing to partition
+                df = self._fetch_klines_frame(symbol, interval, start, end)
             
-            klines = unique_klines
-            
-            if not klines:
+            if df.empty:
                 raise Exception("No data available for the specified date range")
             
-            print(f"Total retrieved: {len(klines)} unique klines")
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_volume', 'trades', 'taker_buy_base',
-                'taker_buy_quote', 'ignore'
-            ])
-            
-            # Convert data types
-            numeric_columns = ['open', 'high', 'low', 'close', 'volume']
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col])
-            
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            
-            # Remove duplicates and sort
-            df = df[~df.index.duplicated(keep='first')]
-            df = df.sort_index()
-            
-            # Filter by exact date range
-            start_filter = pd.Timestamp(start_date)
-            end_filter = pd.Timestamp(end_date)
-            
-            print(f"Filtering data: start={start_filter}, end={end_filter}")
-            print(f"Data range before filter: {df.index.min()} to {df.index.max()}")
-            
-            df = df[(df.index >= start_filter) & (df.index <= end_filter)]
+            print(f"Filtering data: start={start}, end={end}")
+            total_rows = len(df)
+            df = df[(df.index >= start) & (df.index <= end)]
             
             print(f"Data range after filter: {df.index.min()} to {df.index.max()}")
-            print(f"Processed DataFrame with {len(df)} rows (filtered from {len(unique_klines)} total)")
+            print(f"Processed DataFrame with {len(df)} rows (filtered from {total_rows} total)")
             
             return df
         except Exception as e:
             print(f"Error in get_klines: {str(e)}")
             raise Exception(f"Error fetching klines: {str(e)}")
     
+    def _get_klines_by_day(self, symbol, interval, start, end, interval_seconds):
+        """Stitch whole days: stored days are loaded, missing runs of days are fetched in one range each"""
+        today = pd.Timestamp.now(tz='UTC').tz_localize(None).normalize()
+        one_day = pd.Timedelta(days=1)
+        bars_per_day = 86400 // interval_seconds
+        days = pd.date_range(start.normalize(), end.normalize(), freq='D')
+        
+        frames = {}
+        missing_runs = []
+        for day in days:
+            # Today (and later) is still changing - never served from the store
+            cached = daily_klines_store.load(symbol, interval, day) if day < today else None
+            if cached is not None:
+                frames[day] = cached
+            elif missing_runs and missing_runs[-1][-1] == day - one_day:
+                missing_runs[-1].append(day)
+            else:
+                missing_runs.append([day])
+        
+        if frames:
+            print(f"📁 {len(frames)} of {len(days)} days of {symbol} {interval} klines from the daily store")
+        
+        for run in missing_runs:
+            fetched = self._fetch_klines_frame(symbol, interval, run[0], run[-1] + one_day - pd.Timedelta(milliseconds=1))
+            for day in run:
+                day_df = fetched[(fetched.index >= day) & (fetched.index < day + one_day)]
+                frames[day] = day_df
+                # Only complete past days are stored (a failed batch or listing day leaves gaps)
+                if day < today and len(day_df) == bars_per_day:
+                    daily_klines_store.save(day_df, symbol, interval, day)
+        
+        df = pd.concat([frames[day] for day in days])
+        return df.astype(np.dtype(Config.KLINES_FLOAT_DTYPE), copy=False)
+    
+    def _fetch_klines_frame(self, symbol, interval, start, end):
+        """Fetch [start, end] from the futures klines endpoint in concurrent batches"""
+        # Convert dates to timestamps for pagination
+        start_ts = int(start.timestamp() * 1000)
+        end_ts = int(end.timestamp() * 1000)
+        
+        # Windows are known up front, so every batch is requested concurrently
+        # (binance_async imports klines_to_frame from this module, hence the local import)
+        from services.binance_async import fetch_klines_windows
+        
+        interval_ms = self._get_interval_minutes(interval) * 60000
+        print(f"Fetching {start} to {end} in concurrent batches (max {self.max_klines_per_request} per request)...")
+        batches = asyncio.run(fetch_klines_windows(
+            symbol, interval, start_ts, end_ts, interval_ms, limit=self.max_klines_per_request
+        ))
+        
+        all_klines = list(chain.from_iterable(batches))
+        print(f"Fetched {len(batches)} batches: {len(all_klines)} klines")
+        
+        # Duplicate timestamps are dropped by klines_to_frame (Index.duplicated)
+        return klines_to_frame(all_klines, start, end)
+    
+    def get_klines_cached(self, symbol, interval, start_date, end_date):
+        """Get klines through an LRU/TTL cache keyed by (symbol, interval, start, end)"""
+        key = (symbol, interval, str(start_date), str(end_date))
+        now = time.time()
+        
+        with self._klines_cache_lock:
+            entry = self._klines_cache.get(key)
+            if entry and entry[0] > now:
+                self._klines_cache.move_to_end(key)
+                print(f"📦 Klines cache hit: {symbol} {interval} {start_date} -> {end_date}")
+                return entry[1].copy()
+        
+        df = self.get_klines(symbol, interval, start_date, end_date)
+        
+        # Windows that ended before today won't change anymore
+        if pd.Timestamp(end_date).normalize() < pd.Timestamp.now().normalize():
+            ttl = Config.KLINES_CACHE_HISTORICAL_TTL
+        else:
+            ttl = Config.KLINES_CACHE_TTL
+        
+        with self._klines_cache_lock:
+            self._klines_cache[key] = (now + ttl, df)
+            self._klines_cache.move_to_end(key)
+            while len(self._klines_cache) > Config.KLINES_CACHE_SIZE:
+                self._klines_cache.popitem(last=False)
+        
+        return df.copy()
+    
+    def clear_klines_cache(self):
+        """Clear in-memory klines cache"""
+        with self._klines_cache_lock:
+            count = len(self._klines_cache)
+            self._klines_cache.clear()
+        return count
+    
     def _get_interval_minutes(self, interval):
         """Convert interval string to minutes"""
-        interval_map = {
-            '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30,
-            '1h': 60, '2h': 120, '4h': 240, '6h': 360, '8h': 480, '12h': 720,
-            '1d': 1440, '3d': 4320, '1w': 10080, '1M': 43200
-        }
-        return interval_map.get(interval, 60)
\ No newline at end of file
+        return Config.INTERVAL_SECONDS.get(interval, 3600) // 60
\ No newline at end of file
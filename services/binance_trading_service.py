@@ -1,14 +1,59 @@
 import json
+import logging
+import operator
 import os
+import pickle
+import sys
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime
+from typing import Any, Dict, Optional
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
+from requests.adapters import HTTPAdapter
 import threading
 import time
 
+logger = logging.getLogger(__name__)
+
+# Backtest stats used by the auto-trading criteria, with the values assumed when a stat is missing
+BACKTEST_STATS_DEFAULTS = {'win_rate': 0, 'total_return': 0, 'max_drawdown': 100}
+_get_backtest_stats = operator.itemgetter('win_rate', 'total_return', 'max_drawdown')
+
+# dataclass(slots=True) is 3.10+; the deploy scripts' system python3 can be 3.8, where
+# Position simply keeps a __dict__ (a hand-written __slots__ clashes with field defaults)
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(**_SLOTS)
+class Position:
+    """One tracked futures position (close_* / final_* are filled in by close_position)"""
+    symbol: str
+    side: str
+    quantity: float
+    entry_price: float
+    leverage: int
+    margin_used: float
+    order_id: int
+    is_active: bool
+    entry_time: datetime
+    user_id: Optional[int] = None
+    trade_type: str = 'manual'
+    signal_data: Optional[Dict[str, Any]] = None
+    pnl: float = 0
+    final_pnl: Optional[float] = None
+    final_pnl_percent: Optional[float] = None
+    close_price: Optional[float] = None
+    close_time: Optional[datetime] = None
+    close_reason: Optional[str] = None
+    close_order_id: Optional[int] = None
+
 class BinanceTradingService:
     """Service for live trading with Binance API"""
     
+    # Signal value -> order side (anything other than 1 has always meant SELL)
+    _SIDE_MAP = {1: 'BUY', -1: 'SELL'}
+    
     def __init__(self, api_key=None, api_secret=None):
         # Load from .env first, then use provided values
         from config.env_config import EnvConfig
@@ -23,27 +68,59 @@ class BinanceTradingService:
         self.settings_file = "trading_settings/trading_config.json"
         self.ensure_settings_dir()
         
-        # Load trading settings
+        # Load trading settings (mtime of the file they were read from, see _settings)
+        self._settings_mtime = None
         self.trading_settings = self.load_trading_settings()
         
         # Active positions tracking
         self.active_positions = {}
         self.positions_lock = threading.Lock()
+        # Symbols whose position is_active, kept in step with active_positions under positions_lock
+        self._active_symbols = set()
+        
+        # Per-symbol precision rules parsed from futures_exchange_info, refreshed after the TTL
+        self._exchange_info_cache = {}
+        self._exchange_info_ts = 0
+        self._exchange_info_ttl = 3600
+        
+        # Snapshot of that table from a previous run, so a restart can trade before exchange info is refetched
+        self.exchange_info_file = "trading_settings/exchange_info.pkl"
+        self._exchange_info_snapshot_max_age = 24 * 3600
+        self._load_exchange_info_snapshot()
+        
+        # (monotonic time, value) of the last wallet balance read; reset after every fill
+        self._balance_cache = (0.0, 0.0)
+        self._balance_ttl = 2.0
+        
+        # Last leverage successfully set per symbol, so repeat trades skip futures_change_leverage
+        self._leverage_cache = {}
+        
+        # One coin settings reader, reloaded only when coin_settings.json changes (see _get_coin_settings)
+        from services.coin_settings_manager import CoinSettingsManager
+        self._coin_settings_mtime = self._file_mtime(os.path.join("coin_settings", "coin_settings.json"))
+        self._coin_settings_manager = CoinSettingsManager()
+        
+        # Long-lived worker threads for overlapping independent REST calls
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='binance-io')
         
         # Initialize client if credentials provided
         if api_key and api_secret:
             self.connect_to_binance()
         elif self.api_key and self.api_secret:
             # Auto-connect if .env credentials are available
-            print("🔑 Auto-connecting with .env credentials...")
+            logger.info("🔑 Auto-connecting with .env credentials...")
             self.connect_to_binance()
+        
+        # A table restored from the snapshot is served as is; bring it up to date in the background
+        if self._exchange_info_cache and self.is_connected:
+            self._executor.submit(self._refresh_exchange_info_quietly)
     
     def ensure_settings_dir(self):
         """Ensure trading settings directory exists"""
         settings_dir = os.path.dirname(self.settings_file)
         if not os.path.exists(settings_dir):
             os.makedirs(settings_dir)
-            print(f"Created trading settings directory: {settings_dir}")
+            logger.info("Created trading settings directory: %s", settings_dir)
     
     def get_default_trading_settings(self):
         """Get default trading settings"""
@@ -78,9 +155,11 @@ class BinanceTradingService:
         """Load trading settings from file"""
         try:
             if os.path.exists(self.settings_file):
+                mtime = os.stat(self.settings_file).st_mtime
                 with open(self.settings_file, 'r') as f:
                     settings = json.load(f)
-                print(f"📁 Trading settings loaded from {self.settings_file}")
+                self._settings_mtime = mtime
+                logger.info("📁 Trading settings loaded from %s", self.settings_file)
                 return settings
             else:
                 # Create default settings
@@ -88,7 +167,7 @@ class BinanceTradingService:
                 self.save_trading_settings(default_settings)
                 return default_settings
         except Exception as e:
-            print(f"❌ Error loading trading settings: {str(e)}")
+            logger.error("❌ Error loading trading settings: %s", e)
             return self.get_default_trading_settings()
     
     def save_trading_settings(self, settings):
@@ -96,25 +175,45 @@ class BinanceTradingService:
         try:
             with open(self.settings_file, 'w') as f:
                 json.dump(settings, f, indent=2)
-            print(f"💾 Trading settings saved to {self.settings_file}")
+            self._settings_mtime = os.stat(self.settings_file).st_mtime
+            logger.info("💾 Trading settings saved to %s", self.settings_file)
             self.trading_settings = settings
             return True
         except Exception as e:
-            print(f"❌ Error saving trading settings: {str(e)}")
+            logger.error("❌ Error saving trading settings: %s", e)
             return False
     
+    def _settings(self):
+        """Current trading settings, re-read only when the file changed on disk"""
+        try:
+            mtime = os.stat(self.settings_file).st_mtime
+        except OSError:
+            return self.trading_settings
+        
+        if mtime != self._settings_mtime:
+            try:
+                with open(self.settings_file, 'r') as f:
+                    self.trading_settings = json.load(f)
+                self._settings_mtime = mtime
+                logger.info("📁 Trading settings reloaded from %s", self.settings_file)
+            except (OSError, ValueError) as e:
+                # Keep the settings we have (e.g. file caught mid-write)
+                logger.error("❌ Error reloading trading settings: %s", e)
+        
+        return self.trading_settings
+    
     def connect_to_binance(self):
         """Connect to Binance API"""
         try:
             if not self.api_key or not self.api_secret:
-                print("❌ API key and secret required for trading")
+                logger.error("❌ API key and secret required for trading")
                 return False
             
-            print(f"🔑 Connecting with API Key: {self.api_key[:8]}...")
-            print(f"🔐 API Secret configured: {bool(self.api_secret)}")
+            logger.info("🔑 Connecting with API Key: %s...", self.api_key[:8])
+            logger.info("🔐 API Secret configured: %s", bool(self.api_secret))
             
             # Always use production API
-            print("🔗 Using Binance Production API (fapi.binance.com)")
+            logger.info("🔗 Using Binance Production API (fapi.binance.com)")
             self.client = Client(
                 api_key=self.api_key,
                 api_secret=self.api_secret,
@@ -122,48 +221,60 @@ class BinanceTradingService:
                 requests_params={'timeout': 60}
             )
             
+            # Sized keep-alive pool so back-to-back trade calls share connections
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+            self.client.session.mount('https://', adapter)
+            self.client.session.headers['Connection'] = 'keep-alive'
+            
+            # Leverage and balance read through a previous client/account no longer apply
+            self._leverage_cache.clear()
+            self._balance_cache = (0.0, 0.0)
+            
+            # Warm the fapi.binance.com connection while the server time check below runs
+            threading.Thread(target=self._preconnect_futures, daemon=True).start()
+            
             # Test connection
             try:
                 # First test with a simple API call
                 server_time = self.client.get_server_time()
-                print(f"✅ Server connection successful. Server time: {server_time}")
+                logger.info("✅ Server connection successful. Server time: %s", server_time)
                 
                 # Then test futures account access
                 account_info = self.client.futures_account()
-                print(f"✅ Futures account access successful")
+                logger.info("✅ Futures account access successful")
                 
             except BinanceAPIException as api_error:
-                print(f"❌ Binance API Error during connection test:")
-                print(f"   Error Code: {api_error.code}")
-                print(f"   Error Message: {api_error.message}")
+                logger.error("❌ Binance API Error during connection test:")
+                logger.error("   Error Code: %s", api_error.code)
+                logger.error("   Error Message: %s", api_error.message)
                 
                 # Provide specific error guidance
                 if api_error.code == -2015:
-                    print("💡 Solution: Invalid API key, IP not whitelisted, or wrong permissions.")
-                    print("   1. Verify you're using PRODUCTION API keys from https://www.binance.com")
-                    print("   2. Check if your IP is whitelisted in API settings")
-                    print("   3. Ensure API key has 'Enable Reading' and 'Enable Futures' permissions")
-                    print("   4. Go to Binance.com > API Management > Edit API > IP Access Management")
-                    print("   5. Add your current IP: 104.28.245.128 to the whitelist")
-                    print("   6. Make sure 'Restrict access to trusted IPs only' is enabled")
+                    logger.error("💡 Solution: Invalid API key, IP not whitelisted, or wrong permissions.")
+                    logger.error("   1. Verify you're using PRODUCTION API keys from https://www.binance.com")
+                    logger.error("   2. Check if your IP is whitelisted in API settings")
+                    logger.error("   3. Ensure API key has 'Enable Reading' and 'Enable Futures' permissions")
+                    logger.error("   4. Go to Binance.com > API Management > Edit API > IP Access Management")
+                    logger.error("   5. Add your current IP: 104.28.245.128 to the whitelist")
+                    logger.error("   6. Make sure 'Restrict access to trusted IPs only' is enabled")
                 elif api_error.code == -1021:
-                    print("💡 Solution: Timestamp issue. Check your system time.")
+                    logger.error("💡 Solution: Timestamp issue. Check your system time.")
                 elif api_error.code == -2014:
-                    print("💡 Solution: API key format invalid.")
+                    logger.error("💡 Solution: API key format invalid.")
                 elif "IP" in str(api_error.message):
-                    print("💡 Solution: IP not whitelisted. Add your IP (104.28.245.128) to Binance API settings.")
-                    print("   1. Go to https://www.binance.com/en/my/settings/api-management")
-                    print("   2. Click 'Edit' on your API key")
-                    print("   3. Go to 'IP Access Management'")
-                    print("   4. Add IP: 104.28.245.128")
-                    print("   5. Save changes and try again")
+                    logger.error("💡 Solution: IP not whitelisted. Add your IP (104.28.245.128) to Binance API settings.")
+                    logger.error("   1. Go to https://www.binance.com/en/my/settings/api-management")
+                    logger.error("   2. Click 'Edit' on your API key")
+                    logger.error("   3. Go to 'IP Access Management'")
+                    logger.error("   4. Add IP: 104.28.245.128")
+                    logger.error("   5. Save changes and try again")
                 elif "permission" in str(api_error.message).lower():
-                    print("💡 Solution: Enable 'Enable Futures' permission in your API key settings.")
-                    print("   1. Go to https://www.binance.com/en/my/settings/api-management")
-                    print("   2. Click 'Edit' on your API key")
-                    print("   3. Enable 'Enable Reading' checkbox")
-                    print("   4. Enable 'Enable Futures' checkbox")
-                    print("   5. Save changes")
+                    logger.error("💡 Solution: Enable 'Enable Futures' permission in your API key settings.")
+                    logger.error("   1. Go to https://www.binance.com/en/my/settings/api-management")
+                    logger.error("   2. Click 'Edit' on your API key")
+                    logger.error("   3. Enable 'Enable Reading' checkbox")
+                    logger.error("   4. Enable 'Enable Futures' checkbox")
+                    logger.error("   5. Save changes")
                 
                 self.is_connected = False
                 return False
@@ -171,43 +282,50 @@ class BinanceTradingService:
             self.is_connected = True
             
             balance = float(account_info['totalWalletBalance'])
-            print(f"✅ Binance connection successful. Balance: ${balance:.2f}")
+            logger.info("✅ Binance connection successful. Balance: $%.2f", balance)
             
             return True
             
         except BinanceAPIException as e:
-            print(f"❌ Binance API Error:")
-            print(f"   Code: {e.code}")
-            print(f"   Message: {e.message}")
+            logger.error("❌ Binance API Error:")
+            logger.error("   Code: %s", e.code)
+            logger.error("   Message: %s", e.message)
             
             # Enhanced error handling with solutions
             if e.code == -2015:
-                print("💡 Fix: API key invalid, IP not whitelisted, or insufficient permissions")
-                print("   Current IP that needs whitelisting: 104.28.245.128")
+                logger.error("💡 Fix: API key invalid, IP not whitelisted, or insufficient permissions")
+                logger.error("   Current IP that needs whitelisting: 104.28.245.128")
             elif e.code == -1021:
-                print("💡 Fix: System time sync issue - sync your system clock")
+                logger.error("💡 Fix: System time sync issue - sync your system clock")
             elif e.code == -2014:
-                print("💡 Fix: API key format is invalid")
+                logger.error("💡 Fix: API key format is invalid")
             elif "IP" in str(e.message):
-                print("💡 Fix: Your IP address (104.28.245.128) is not whitelisted")
-                print("   1. Go to Binance API Management")
-                print("   2. Edit your API key")
-                print("   3. Add IP address: 104.28.245.128 to whitelist")
-                print("   4. Enable 'Restrict access to trusted IPs only'")
+                logger.error("💡 Fix: Your IP address (104.28.245.128) is not whitelisted")
+                logger.error("   1. Go to Binance API Management")
+                logger.error("   2. Edit your API key")
+                logger.error("   3. Add IP address: 104.28.245.128 to whitelist")
+                logger.error("   4. Enable 'Restrict access to trusted IPs only'")
             elif "permission" in str(e.message).lower():
-                print("💡 Fix: API key permissions insufficient")
-                print("   1. Go to Binance API Management")
-                print("   2. Edit your API key")
-                print("   3. Enable 'Enable Futures' permission")
-                print("   4. Enable 'Enable Reading' permission")
+                logger.error("💡 Fix: API key permissions insufficient")
+                logger.error("   1. Go to Binance API Management")
+                logger.error("   2. Edit your API key")
+                logger.error("   3. Enable 'Enable Futures' permission")
+                logger.error("   4. Enable 'Enable Reading' permission")
             
             self.is_connected = False
             return False
         except Exception as e:
-            print(f"❌ Connection error: {str(e)}")
+            logger.error("❌ Connection error: %s", e)
             self.is_connected = False
             return False
     
+    def _preconnect_futures(self):
+        """Open the keep-alive connection to the futures API ahead of the first real call"""
+        try:
+            self.client.futures_ping()
+        except Exception as e:
+            logger.warning("⚠️ Futures preconnect failed: %s", e)
+    
     def test_connection(self):
         """Test Binance API connection"""
         if not self.client:
@@ -215,25 +333,25 @@ class BinanceTradingService:
         
         try:
             # Test basic connection first
-            print("🔍 Testing basic API connection...")
+            logger.info("🔍 Testing basic API connection...")
             server_time = self.client.get_server_time()
             
             # Test futures access
-            print("🔍 Testing futures account access...")
+            logger.info("🔍 Testing futures account access...")
             account_info = self.client.futures_account()
             balance = float(account_info['totalWalletBalance'])
             
             # Test exchange info access
-            print("🔍 Testing exchange info access...")
+            logger.info("🔍 Testing exchange info access...")
             exchange_info = self.client.futures_exchange_info()
             
             success_msg = f"✅ All tests passed! Balance: ${balance:.2f}"
-            print(success_msg)
+            logger.info(success_msg)
             return True, success_msg
             
         except BinanceAPIException as e:
             error_msg = f"API Error {e.code}: {e.message}"
-            print(f"❌ {error_msg}")
+            logger.error("❌ %s", error_msg)
             
             # Provide specific solutions
             solutions = []
@@ -252,112 +370,206 @@ class BinanceTradingService:
             return False, error_msg
         except Exception as e:
             error_msg = f"Connection error: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error("❌ %s", error_msg)
             return False, error_msg
     
     def get_account_balance(self):
-        """Get account balance"""
+        """Get account balance (reused for a couple of seconds between fills)"""
         try:
             if not self.is_connected:
                 return 0
             
+            now = time.monotonic()
+            cached_at, balance = self._balance_cache
+            if now - cached_at < self._balance_ttl and balance > 0:
+                return balance
+            
             account_info = self.client.futures_account()
-            return float(account_info['totalWalletBalance'])
+            balance = float(account_info['totalWalletBalance'])
+            self._balance_cache = (now, balance)
+            return balance
         except Exception as e:
-            print(f"Error getting balance: {str(e)}")
+            logger.error("Error getting balance: %s", e)
             return 0
     
+    def _get_symbol_info(self, symbol):
+        """Get cached precision rules for symbol (None if the exchange doesn't list it)"""
+        if not self._exchange_info_cache or time.time() - self._exchange_info_ts > self._exchange_info_ttl:
+            self._refresh_exchange_info()
+        
+        return self._exchange_info_cache.get(symbol)
+    
+    def _refresh_exchange_info(self):
+        """Fetch futures_exchange_info, rebuild the per-symbol table and snapshot it to disk"""
+        exchange_info = self.client.futures_exchange_info()
+        
+        cache = {}
+        for s in exchange_info['symbols']:
+            # Defaults used when the symbol has no LOT_SIZE filter
+            min_qty = 0.001
+            step_text = '0.001'
+            for filter_info in s['filters']:
+                if filter_info['filterType'] == 'LOT_SIZE':
+                    min_qty = float(filter_info['minQty'])
+                    step_text = filter_info['stepSize']
+                    break
+            
+            # Step as an integer number of ticks at 10**decimals, e.g. "0.00500" -> 5 ticks at scale 1000
+            step = Decimal(step_text).normalize()
+            step_scale = 10 ** max(0, -step.as_tuple().exponent)
+            quantity_precision = int(s['quantityPrecision'])
+            
+            cache[s['symbol']] = {
+                'quantity_precision': quantity_precision,
+                'price_precision': int(s['pricePrecision']),
+                'min_qty': min_qty,
+                'step_size': float(step),
+                'step_scale': step_scale,
+                'step_ticks': int(step * step_scale),
+                'quantity_format': f"{{:.{quantity_precision}f}}"
+            }
+        
+        self._exchange_info_cache = cache
+        self._exchange_info_ts = time.time()
+        logger.info("📋 Exchange info cached for %s symbols", len(cache))
+        
+        self._save_exchange_info_snapshot()
+    
+    def _refresh_exchange_info_quietly(self):
+        """Background refresh of the exchange info table (failures only logged)"""
+        try:
+            self._refresh_exchange_info()
+        except Exception as e:
+            logger.warning("⚠️ Exchange info refresh failed: %s", e)
+    
+    def _load_exchange_info_snapshot(self):
+        """Restore the per-symbol table saved by a previous run if it is recent enough"""
+        try:
+            if not os.path.exists(self.exchange_info_file):
+                return
+            
+            with open(self.exchange_info_file, 'rb') as f:
+                snapshot = pickle.load(f)
+            
+            if time.time() - snapshot['timestamp'] > self._exchange_info_snapshot_max_age:
+                return
+            
+            # Counted as fresh for the TTL; __init__ refreshes it in the background once connected
+            self._exchange_info_cache = snapshot['symbols']
+            self._exchange_info_ts = time.time()
+            logger.info("📋 Exchange info restored for %s symbols from %s", len(self._exchange_info_cache), self.exchange_info_file)
+        except Exception as e:
+            logger.warning("⚠️ Error loading exchange info snapshot: %s", e)
+    
+    def _save_exchange_info_snapshot(self):
+        """Write the per-symbol table to disk (temp file + swap so a crash never leaves half a file)"""
+        try:
+            tmp_file = f"{self.exchange_info_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump({'timestamp': time.time(), 'symbols': self._exchange_info_cache}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.exchange_info_file)
+        except Exception as e:
+            logger.warning("⚠️ Error saving exchange info snapshot: %s", e)
+    
+    @staticmethod
+    def _file_mtime(path):
+        """Modification time of path, None if it doesn't exist"""
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+    
+    def _get_coin_settings(self, symbol):
+        """Coin settings for symbol, re-reading the settings file only after it changed"""
+        manager = self._coin_settings_manager
+        mtime = self._file_mtime(manager.settings_file)
+        if mtime != self._coin_settings_mtime:
+            manager.coin_settings = manager.load_all_settings()
+            self._coin_settings_mtime = mtime
+        return manager.load_coin_settings(symbol)
+    
     def check_auto_trading_criteria(self, symbol, signal_data):
         """Check if signal meets auto trading criteria"""
         try:
-            if not self.trading_settings['auto_trading']['enabled']:
+            criteria = self._settings()['auto_trading']
+            if not criteria['enabled']:
                 return False, "Auto trading disabled"
             
             # Enhanced position check - allow opposite signals to close existing positions
-            if symbol in self.active_positions and self.active_positions[symbol]['is_active']:
-                existing_position = self.active_positions[symbol]
-                existing_side = existing_position['side']
-                new_signal_side = 'BUY' if signal_data.get('signal_value', 1) == 1 else 'SELL'
+            # (an active symbol always returns here, so the max positions check below only sees new symbols)
+            if symbol in self._active_symbols:
+                existing_side = self.active_positions[symbol].side
+                new_signal_side = self._SIDE_MAP.get(signal_data.get('signal_value', 1), 'SELL')
                 
                 # If opposite signal, allow it to close existing position
-                if ((existing_side == 'BUY' and new_signal_side == 'SELL') or 
-                    (existing_side == 'SELL' and new_signal_side == 'BUY')):
-                    print(f"🔄 Opposite signal detected for {symbol}: {existing_side} → {new_signal_side}")
+                if existing_side != new_signal_side:
+                    logger.info("🔄 Opposite signal detected for %s: %s → %s", symbol, existing_side, new_signal_side)
                     return True, f"Opposite signal - will close existing {existing_side} position"
                 else:
                     # Same direction signal - ignore
                     return False, f"Same direction signal ignored - already have {existing_side} position"
             
             # Check if we already have max positions
-            active_count = len([p for p in self.active_positions.values() if p['is_active']])
-            if active_count >= self.trading_settings['auto_trading']['max_symbols']:
-                # Allow if this is an opposite signal that will close existing position
-                if symbol in self.active_positions and self.active_positions[symbol]['is_active']:
-                    existing_side = self.active_positions[symbol]['side']
-                    new_signal_side = 'BUY' if signal_data.get('signal_value', 1) == 1 else 'SELL'
-                    if existing_side != new_signal_side:
-                        return True, f"Opposite signal allowed to close existing position"
-                
-                return False, f"Max positions reached ({active_count}/{self.trading_settings['auto_trading']['max_symbols']})"
+            active_count = len(self._active_symbols)
+            max_symbols = criteria['max_symbols']
+            if active_count >= max_symbols:
+                return False, f"Max positions reached ({active_count}/{max_symbols})"
             
             # Get coin settings to check historical performance
-            from services.coin_settings_manager import CoinSettingsManager
-            settings_manager = CoinSettingsManager()
-            coin_settings = settings_manager.load_coin_settings(symbol)
-            
-            # Check criteria
-            criteria = self.trading_settings['auto_trading']
+            coin_settings = self._get_coin_settings(symbol)
             
             if coin_settings.get('optimization_score', 0) <= 0:
                 return False, "No optimization data available"
             
-            backtest_stats = coin_settings.get('backtest_stats', {})
+            backtest_stats = {**BACKTEST_STATS_DEFAULTS, **(coin_settings.get('backtest_stats') or {})}
+            win_rate, total_return, max_drawdown = _get_backtest_stats(backtest_stats)
             
             # Check win rate
-            win_rate = backtest_stats.get('win_rate', 0)
-            if win_rate < criteria['min_winrate']:
-                return False, f"Win rate too low: {win_rate:.1f}% < {criteria['min_winrate']}%"
+            min_winrate = criteria['min_winrate']
+            if win_rate < min_winrate:
+                return False, f"Win rate too low: {win_rate:.1f}% < {min_winrate}%"
             
             # Check total return (PnL)
-            total_return = backtest_stats.get('total_return', 0)
-            if total_return < criteria['min_pnl']:
-                return False, f"Total return too low: {total_return:.1f}% < {criteria['min_pnl']}%"
+            min_pnl = criteria['min_pnl']
+            if total_return < min_pnl:
+                return False, f"Total return too low: {total_return:.1f}% < {min_pnl}%"
             
             # Check max drawdown
-            max_drawdown = backtest_stats.get('max_drawdown', 100)
-            if max_drawdown > criteria['max_drawdown']:
-                return False, f"Max drawdown too high: {max_drawdown:.1f}% > {criteria['max_drawdown']}%"
+            max_allowed_drawdown = criteria['max_drawdown']
+            if max_drawdown > max_allowed_drawdown:
+                return False, f"Max drawdown too high: {max_drawdown:.1f}% > {max_allowed_drawdown}%"
             
             return True, "All criteria met"
             
         except Exception as e:
-            print(f"Error checking auto trading criteria: {str(e)}")
+            logger.error("Error checking auto trading criteria: %s", e)
             return False, str(e)
     
     def execute_auto_trade(self, symbol, signal_type, entry_price, signal_data):
         """Execute automatic trade based on criteria"""
         try:
             # Enhanced auto trading logic with opposite signal handling
-            print(f"🤖 Processing auto trade: {symbol} {signal_type} at ${entry_price}")
+            logger.info("🤖 Processing auto trade: %s %s at $%s", symbol, signal_type, entry_price)
             
             # Check if we have existing position for this symbol
-            if symbol in self.active_positions and self.active_positions[symbol]['is_active']:
+            if symbol in self._active_symbols:
                 existing_position = self.active_positions[symbol]
-                existing_side = existing_position['side']
+                existing_side = existing_position.side
                 new_signal_side = signal_type.upper()
                 
                 # If opposite signal, close existing position first
                 if ((existing_side == 'BUY' and new_signal_side == 'SELL') or 
                     (existing_side == 'SELL' and new_signal_side == 'BUY')):
                     
-                    print(f"🔄 Closing existing {existing_side} position due to opposite {new_signal_side} signal")
+                    logger.info("🔄 Closing existing %s position due to opposite %s signal", existing_side, new_signal_side)
                     close_success, close_message = self.close_position(symbol, f"Opposite signal: {new_signal_side}")
                     
                     if close_success:
-                        print(f"✅ Existing position closed: {close_message}")
+                        logger.info("✅ Existing position closed: %s", close_message)
                         # Continue to open new position
                     else:
-                        print(f"❌ Failed to close existing position: {close_message}")
+                        logger.error("❌ Failed to close existing position: %s", close_message)
                         return False, f"Failed to close existing position: {close_message}"
                 else:
                     # Same direction signal - ignore
@@ -368,9 +580,9 @@ class BinanceTradingService:
             if not can_trade:
                 # Special handling for opposite signals
                 if "opposite signal" in reason.lower():
-                    print(f"🔄 Auto trade proceeding for opposite signal: {symbol}")
+                    logger.info("🔄 Auto trade proceeding for opposite signal: %s", symbol)
                 else:
-                    print(f"⏭️ Auto trade skipped for {symbol}: {reason}")
+                    logger.info("⏭️ Auto trade skipped for %s: %s", symbol, reason)
                     return False, reason
             
             if not self.is_connected:
@@ -380,7 +592,7 @@ class BinanceTradingService:
             success, result = self._execute_trade_order(symbol, signal_type, entry_price, 'auto', signal_data)
             
             if success:
-                print(f"🤖 Auto trade executed successfully: {symbol} {signal_type}")
+                logger.info("🤖 Auto trade executed successfully: %s %s", symbol, signal_type)
                 # Add auto trading specific info to result
                 enhanced_result = f"{result}\n\n🤖 **AUTO TRADING ACTIVE**\n• Position will be monitored for opposite signals\n• Automatic close on reverse signal\n• TP/SL managed by strategy"
                 return True, enhanced_result
@@ -388,7 +600,7 @@ class BinanceTradingService:
                 return False, result
             
         except BinanceAPIException as e:
-            print(f"❌ Binance API Error in auto trade: {e.message}")
+            logger.error("❌ Binance API Error in auto trade: %s", e.message)
             
             # Enhanced error handling for auto trade
             error_msg = f"API Error {e.code}: {e.message}"
@@ -401,136 +613,136 @@ class BinanceTradingService:
             
             return False, f"API Error: {e.message}"
         except Exception as e:
-            print(f"❌ Error executing auto trade: {str(e)}")
+            logger.error("❌ Error executing auto trade: %s", e)
             return False, str(e)
     
     def _execute_trade_order(self, symbol, signal_type, entry_price, trade_type='manual', signal_data=None, user_id=None):
         """Common trade execution logic for both manual and auto trading"""
         try:
-            # Get symbol info for precision rules
-            exchange_info = self.client.futures_exchange_info()
-            symbol_info = None
-            for s in exchange_info['symbols']:
-                if s['symbol'] == symbol:
-                    symbol_info = s
-                    break
+            trade_settings = self._settings()['auto_trading' if trade_type == 'auto' else 'manual_trading']
+            leverage = trade_settings['leverage']
+            margin_percent = trade_settings['margin_percent']
+            
+            # Symbol info (precision rules) and balance are independent: fetch them side by side
+            symbol_info_job = self._executor.submit(self._get_symbol_info, symbol)
+            balance = self.get_account_balance()
+            symbol_info = symbol_info_job.result()
             
             if not symbol_info:
                 return False, f"Symbol {symbol} not found in exchange info"
             
-            # Get precision rules
-            quantity_precision = int(symbol_info['quantityPrecision'])
-            price_precision = int(symbol_info['pricePrecision'])
-            
-            # Get minimum quantity from filters
-            min_qty = 0.001  # Default minimum
-            step_size = 0.001  # Default step size
-            
-            for filter_info in symbol_info['filters']:
-                if filter_info['filterType'] == 'LOT_SIZE':
-                    min_qty = float(filter_info['minQty'])
-                    step_size = float(filter_info['stepSize'])
-                    break
+            quantity_precision = symbol_info['quantity_precision']
+            min_qty = symbol_info['min_qty']
+            step_size = symbol_info['step_size']
             
-            print(f"📊 {symbol} precision rules: qty_precision={quantity_precision}, min_qty={min_qty}, step_size={step_size}")
+            logger.info("📊 %s precision rules: qty_precision=%s, min_qty=%s, step_size=%s", symbol, quantity_precision, min_qty, step_size)
             
             # Calculate position size based on trade type
-            balance = self.get_account_balance()
             if balance <= 0:
                 return False, "Insufficient balance"
             
-            if trade_type == 'auto':
-                leverage = self.trading_settings['auto_trading']['leverage']
-                margin_percent = self.trading_settings['auto_trading']['margin_percent']
-            else:  # manual
-                leverage = self.trading_settings['manual_trading']['leverage']
-                margin_percent = self.trading_settings['manual_trading']['margin_percent']
-            
             margin_amount = balance * (margin_percent / 100)
             position_value = margin_amount * leverage
             quantity = position_value / entry_price
             
-            print(f"💰 Calculated quantity before precision: {quantity:.8f}")
+            logger.info("💰 Calculated quantity before precision: %.8f", quantity)
             
             # Apply precision rules
-            # Round to step size
-            quantity = round(quantity / step_size) * step_size
+            # Floor to whole steps in integer ticks (the epsilon absorbs float error like 0.3 * 1000 = 299.999...)
+            step_scale = symbol_info['step_scale']
+            step_ticks = symbol_info['step_ticks']
+            qty_ticks = int(quantity * step_scale + 1e-9) // step_ticks * step_ticks
             
             # Apply quantity precision
-            quantity = round(quantity, quantity_precision)
+            quantity = round(qty_ticks / step_scale, quantity_precision)
+            quantity_text = symbol_info['quantity_format'].format(quantity)
             
-            print(f"💰 Quantity after precision adjustment: {quantity:.8f}")
+            logger.info("💰 Quantity after precision adjustment: %.8f", quantity)
             
             # Validate minimum order size
             if quantity < min_qty:
-                return False, f"Order size too small: {quantity:.{quantity_precision}f} < {min_qty}. Increase margin or balance."
+                return False, f"Order size too small: {quantity_text} < {min_qty}. Increase margin or balance."
             
             # Additional validation for very small quantities
             if quantity <= 0:
-                return False, f"Invalid quantity: {quantity:.{quantity_precision}f}. Check balance and margin settings."
+                return False, f"Invalid quantity: {quantity_text}. Check balance and margin settings."
             
-            # Set leverage for symbol
-            self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
+            # Only touch account leverage once the order is known to go out; errors abort the trade
+            if self._leverage_cache.get(symbol) != leverage:
+                self._set_leverage(symbol, leverage)
             
             # Place market order
             side = 'BUY' if signal_type.upper() == 'BUY' else 'SELL'
             
-            print(f"🔄 Placing {trade_type} order: {side} {quantity:.{quantity_precision}f} {symbol}")
+            logger.info("🔄 Placing %s order: %s %s %s", trade_type, side, quantity_text, symbol)
             
+            # Send the fixed-point text so the request never carries a float repr like 1e-05
             order = self.client.futures_create_order(
                 symbol=symbol,
                 side=side,
                 type='MARKET',
-                quantity=quantity
+                quantity=quantity_text
             )
             
+            # The fill moved margin, next trade must see a fresh balance
+            self._balance_cache = (0.0, 0.0)
+            
             # Get actual fill price
             actual_price = float(order.get('avgPrice', entry_price))
             
             # Store position info
             with self.positions_lock:
-                self.active_positions[symbol] = {
-                    'symbol': symbol,
-                    'side': side,
-                    'quantity': quantity,
-                    'entry_price': actual_price,
-                    'leverage': leverage,
-                    'margin_used': margin_amount,
-                    'order_id': order['orderId'],
-                    'is_active': True,
-                    'entry_time': datetime.now(),
-                    'user_id': user_id,
-                    'trade_type': trade_type,
-                    'signal_data': signal_data,
-                    'pnl': 0  # Initialize PnL
-                }
+                self.active_positions[symbol] = Position(
+                    symbol=symbol,
+                    side=side,
+                    quantity=quantity,
+                    entry_price=actual_price,
+                    leverage=leverage,
+                    margin_used=margin_amount,
+                    order_id=order['orderId'],
+                    is_active=True,
+                    entry_time=datetime.now(),
+                    user_id=user_id,
+                    trade_type=trade_type,
+                    signal_data=signal_data
+                )
+                self._active_symbols.add(symbol)
             
             trade_emoji = "🤖" if trade_type == 'auto' else "💰"
-            print(f"{trade_emoji} {trade_type.title()} trade executed: {side} {quantity:.{quantity_precision}f} {symbol} at ${actual_price:.4f}")
-            return True, f"{trade_emoji} {side} {quantity:.{quantity_precision}f} {symbol} at ${actual_price:.4f}\n💰 Margin: ${margin_amount:.2f} | Leverage: {leverage}x"
+            logger.info("%s %s trade executed: %s %s %s at $%.4f", trade_emoji, trade_type.title(), side, quantity_text, symbol, actual_price)
+            return True, f"{trade_emoji} {side} {quantity_text} {symbol} at ${actual_price:.4f}\n💰 Margin: ${margin_amount:.2f} | Leverage: {leverage}x"
             
         except Exception as e:
-            print(f"❌ Error in trade execution: {str(e)}")
+            logger.error("❌ Error in trade execution: %s", e)
             raise e
     
+    def _set_leverage(self, symbol, leverage):
+        """Set leverage for symbol and remember it (forgotten again if the call fails)"""
+        try:
+            self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
+        except Exception:
+            self._leverage_cache.pop(symbol, None)
+            raise
+        self._leverage_cache[symbol] = leverage
+    
     def execute_manual_trade(self, symbol, signal_type, entry_price, user_id=None):
         """Execute manual trade from Telegram entry button"""
         try:
             if not self.is_connected:
                 return False, "Not connected to Binance"
             
-            if not self.trading_settings['manual_trading']['enabled']:
+            if not self._settings()['manual_trading']['enabled']:
                 return False, "Manual trading disabled"
             
             # Check if we already have a position for this symbol
-            if symbol in self.active_positions and self.active_positions[symbol]['is_active']:
+            if symbol in self._active_symbols:
                 return False, f"Already have active position for {symbol}"
             
             # Use common trade execution logic
             return self._execute_trade_order(symbol, signal_type, entry_price, 'manual', None, user_id)
             
         except BinanceAPIException as e:
-            print(f"❌ Binance API Error in manual trade: {e.message}")
+            logger.error("❌ Binance API Error in manual trade: %s", e.message)
             
             # Provide specific error solutions
             error_msg = f"API Error {e.code}: {e.message}"
@@ -545,7 +757,7 @@ class BinanceTradingService:
             
             return False, error_msg
         except Exception as e:
-            print(f"❌ Error executing manual trade: {str(e)}")
+            logger.error("❌ Error executing manual trade: %s", e)
             return False, str(e)
     
     def close_position(self, symbol, reason="Manual close"):
@@ -555,27 +767,22 @@ class BinanceTradingService:
                 return False, "No active position found"
             
             position = self.active_positions[symbol]
-            if not position['is_active']:
+            if not position.is_active:
                 return False, "Position already closed"
             
-            print(f"🔄 Closing position for {symbol}: {position['side']} - Reason: {reason}")
+            logger.info("🔄 Closing position for %s: %s - Reason: %s", symbol, position.side, reason)
             
             # Get symbol precision for closing
-            exchange_info = self.client.futures_exchange_info()
-            quantity_precision = 6  # Default
-            
-            for s in exchange_info['symbols']:
-                if s['symbol'] == symbol:
-                    quantity_precision = int(s['quantityPrecision'])
-                    break
+            symbol_info = self._get_symbol_info(symbol)
+            quantity_precision = symbol_info['quantity_precision'] if symbol_info else 6  # Default
             
             # Round quantity to proper precision
-            close_quantity = round(position['quantity'], quantity_precision)
+            close_quantity = round(position.quantity, quantity_precision)
             
             # Close position with opposite side
-            close_side = 'SELL' if position['side'] == 'BUY' else 'BUY'
+            close_side = 'SELL' if position.side == 'BUY' else 'BUY'
             
-            print(f"📊 Executing close order: {close_side} {close_quantity:.{quantity_precision}f} {symbol}")
+            logger.info("📊 Executing close order: %s %.*f %s", close_side, quantity_precision, close_quantity, symbol)
             
             order = self.client.futures_create_order(
                 symbol=symbol,
@@ -584,66 +791,90 @@ class BinanceTradingService:
                 quantity=close_quantity
             )
             
+            self._balance_cache = (0.0, 0.0)
+            
             # Calculate PnL for the closed position
             try:
                 fill_price = float(order.get('avgPrice', 0))
                 if fill_price > 0:
-                    entry_price = position['entry_price']
-                    if position['side'] == 'BUY':
+                    entry_price = position.entry_price
+                    if position.side == 'BUY':
                         pnl_percent = ((fill_price - entry_price) / entry_price) * 100
                     else:  # SELL
                         pnl_percent = ((entry_price - fill_price) / entry_price) * 100
                     
-                    pnl_amount = pnl_percent * position['margin_used'] * position['leverage'] / 100
-                    position['final_pnl'] = pnl_amount
-                    position['final_pnl_percent'] = pnl_percent
-                    position['close_price'] = fill_price
+                    pnl_amount = pnl_percent * position.margin_used * position.leverage / 100
+                    position.final_pnl = pnl_amount
+                    position.final_pnl_percent = pnl_percent
+                    position.close_price = fill_price
                     
-                    print(f"💰 Position PnL: {pnl_percent:+.2f}% (${pnl_amount:+.2f})")
+                    logger.info("💰 Position PnL: %+.2f%% ($%+.2f)", pnl_percent, pnl_amount)
             except Exception as pnl_error:
-                print(f"⚠️ Error calculating PnL: {str(pnl_error)}")
+                logger.warning("⚠️ Error calculating PnL: %s", pnl_error)
             
             # Update position
             with self.positions_lock:
-                self.active_positions[symbol]['is_active'] = False
-                self.active_positions[symbol]['close_time'] = datetime.now()
-                self.active_positions[symbol]['close_reason'] = reason
-                self.active_positions[symbol]['close_order_id'] = order['orderId']
+                position.is_active = False
+                position.close_time = datetime.now()
+                position.close_reason = reason
+                position.close_order_id = order['orderId']
+                self._active_symbols.discard(symbol)
             
-            print(f"✅ Position closed: {symbol} - {reason}")
+            logger.info("✅ Position closed: %s - %s", symbol, reason)
             
             # Enhanced close message with PnL info
             close_message = f"Position closed: {symbol}"
-            if 'final_pnl_percent' in position:
-                pnl_emoji = "📈" if position['final_pnl_percent'] >= 0 else "📉"
-                close_message += f" {pnl_emoji} PnL: {position['final_pnl_percent']:+.2f}%"
+            if position.final_pnl_percent is not None:
+                pnl_emoji = "📈" if position.final_pnl_percent >= 0 else "📉"
+                close_message += f" {pnl_emoji} PnL: {position.final_pnl_percent:+.2f}%"
             
             return True, close_message
             
         except BinanceAPIException as e:
-            print(f"❌ Binance API Error closing position: {e.message}")
+            logger.error("❌ Binance API Error closing position: %s", e.message)
             return False, f"API Error: {e.message}"
         except Exception as e:
-            print(f"❌ Error closing position: {str(e)}")
+            logger.error("❌ Error closing position: %s", e)
             return False, str(e)
     
     def get_active_positions(self):
         """Get all active positions"""
         try:
+            # Snapshot under the lock, then do the REST call without holding it
             with self.positions_lock:
-                active_positions = {}
-                for symbol, position in self.active_positions.items():
-                    if position['is_active']:
-                        # Calculate current PnL
-                        position_copy = position.copy()
-                        position_copy['pnl'] = self.get_position_pnl(symbol)
-                        active_positions[symbol] = position_copy
-                
-                return active_positions
+                positions = [replace(p) for p in self.active_positions.values() if p.is_active]
+            
+            # One request prices every open position instead of a ticker call per symbol
+            mark_prices = self._get_mark_prices() if positions else {}
+            
+            active_positions = {}
+            for position in positions:
+                # Calculate current PnL
+                mark_price = mark_prices.get(position.symbol)
+                position_copy = asdict(position)
+                position_copy['pnl'] = self._calculate_pnl(position, mark_price) if mark_price else 0
+                active_positions[position.symbol] = position_copy
+            
+            return active_positions
         except Exception as e:
-            print(f"Error getting active positions: {str(e)}")
+            logger.error("Error getting active positions: %s", e)
             return {}
     
+    def _get_mark_prices(self):
+        """Mark price per symbol from a single futures_position_information call"""
+        try:
+            return {p['symbol']: float(p['markPrice']) for p in self.client.futures_position_information()}
+        except Exception as e:
+            logger.error("Error getting mark prices: %s", e)
+            return {}
+    
+    @staticmethod
+    def _calculate_pnl(position, current_price):
+        """Unrealized PnL of position at current_price"""
+        if position.side == 'BUY':
+            return (current_price - position.entry_price) * position.quantity
+        return (position.entry_price - current_price) * position.quantity  # SELL
+    
     def get_position_pnl(self, symbol):
         """Get current PnL for position"""
         try:
@@ -651,27 +882,17 @@ class BinanceTradingService:
                 return 0
             
             position = self.active_positions[symbol]
-            if not position['is_active']:
+            if not position.is_active:
                 return 0
             
             # Get current price
             ticker = self.client.futures_symbol_ticker(symbol=symbol)
             current_price = float(ticker['price'])
             
-            entry_price = position['entry_price']
-            quantity = position['quantity']
-            side = position['side']
-            
-            # Calculate PnL
-            if side == 'BUY':
-                pnl = (current_price - entry_price) * quantity
-            else:  # SELL
-                pnl = (entry_price - current_price) * quantity
-            
-            return pnl
+            return self._calculate_pnl(position, current_price)
             
         except Exception as e:
-            print(f"Error calculating PnL for {symbol}: {str(e)}")
+            logger.error("Error calculating PnL for %s: %s", symbol, e)
             return 0
     
     def update_trading_settings(self, new_settings):
@@ -700,20 +921,21 @@ class BinanceTradingService:
             return self.save_trading_settings(updated_settings)
             
         except Exception as e:
-            print(f"Error updating trading settings: {str(e)}")
+            logger.error("Error updating trading settings: %s", e)
             return False
     
     def get_trading_status(self):
         """Get trading service status"""
         active_positions = self.get_active_positions()
+        settings = self._settings()
         
         return {
             'is_connected': self.is_connected,
             'balance': self.get_account_balance() if self.is_connected else 0,
             'active_positions_count': len(active_positions),
             'active_positions': active_positions,
-            'auto_trading_enabled': self.trading_settings['auto_trading']['enabled'],
-            'manual_trading_enabled': self.trading_settings['manual_trading']['enabled'],
-            'testnet': self.trading_settings.get('api_settings', {}).get('testnet', False),
-            'settings': self.trading_settings
+            'auto_trading_enabled': settings['auto_trading']['enabled'],
+            'manual_trading_enabled': settings['manual_trading']['enabled'],
+            'testnet': settings.get('api_settings', {}).get('testnet', False),
+            'settings': settings
         }
\ No newline at end of file
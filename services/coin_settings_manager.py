@@ -1,5 +1,7 @@
 import json
 import os
+import atexit
+import threading
 import pandas as pd
 from datetime import datetime
 from typing import Dict, Any, Optional, List
@@ -13,6 +15,13 @@ class CoinSettingsManager:
         self.ensure_settings_dir()
         self.coin_settings = self.load_all_settings()
         
+        # Write-behind persistence: changes are flushed to disk after flush_delay seconds
+        self.flush_delay = 2.0
+        self._lock = threading.RLock()
+        self._dirty_symbols = set()
+        self._flush_timer = None
+        atexit.register(self.flush)
+        
     def ensure_settings_dir(self):
         """Ensure settings directory exists"""
         if not os.path.exists(self.settings_dir):
@@ -46,12 +55,10 @@ class CoinSettingsManager:
             settings['last_updated'] = datetime.now().isoformat()
             settings['symbol'] = symbol
             
-            # Update in memory
-            self.coin_settings[symbol] = settings
-            
-            # Save to file
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.coin_settings, f, indent=2, default=str)
+            # Update in memory, disk write happens on the next flush
+            with self._lock:
+                self.coin_settings[symbol] = settings
+                self._mark_dirty(symbol)
             
             print(f"✅ Settings saved for {symbol}")
             return True
@@ -60,6 +67,41 @@ class CoinSettingsManager:
             print(f"❌ Error saving settings for {symbol}: {str(e)}")
             return False
     
+    def _mark_dirty(self, symbol: str):
+        """Record a pending change and schedule a flush (caller holds the lock)"""
+        self._dirty_symbols.add(symbol)
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self) -> int:
+        """Write pending settings changes to disk, returns number of changed coins"""
+        try:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                
+                if not self._dirty_symbols:
+                    return 0
+                
+                # Write to temp file then swap so readers never see a partial file
+                tmp_file = f"{self.settings_file}.tmp"
+                with open(tmp_file, 'w') as f:
+                    json.dump(self.coin_settings, f, indent=2, default=str)
+                os.replace(tmp_file, self.settings_file)
+                
+                flushed_count = len(self._dirty_symbols)
+                self._dirty_symbols.clear()
+            
+            print(f"💾 Flushed settings for {flushed_count} coins to disk")
+            return flushed_count
+            
+        except Exception as e:
+            print(f"❌ Error flushing coin settings: {str(e)}")
+            return 0
+    
     def load_coin_settings(self, symbol: str) -> Dict[str, Any]:
         """Load settings for a specific coin"""
         if symbol in self.coin_settings:
@@ -225,6 +267,9 @@ class CoinSettingsManager:
                 if self.save_coin_settings(symbol, settings):
                     imported_count += 1
             
+            # One write for the whole import
+            self.flush()
+            
             print(f"📥 Imported settings for {imported_count} coins")
             return True
             
@@ -236,11 +281,9 @@ class CoinSettingsManager:
         """Delete settings for a specific coin"""
         try:
             if symbol in self.coin_settings:
-                del self.coin_settings[symbol]
-                
-                # Save updated settings
-                with open(self.settings_file, 'w') as f:
-                    json.dump(self.coin_settings, f, indent=2, default=str)
+                with self._lock:
+                    del self.coin_settings[symbol]
+                    self._mark_dirty(symbol)
                 
                 print(f"🗑️ Settings deleted for {symbol}")
                 return True
@@ -255,10 +298,10 @@ class CoinSettingsManager:
     def reset_all_settings(self) -> bool:
         """Reset all coin settings to default"""
         try:
-            self.coin_settings = {}
-            
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.coin_settings, f, indent=2)
+            with self._lock:
+                self._dirty_symbols.update(self.coin_settings.keys())
+                self.coin_settings = {}
+                self._mark_dirty('*')
             
             print("🔄 All coin settings reset to default")
             return True
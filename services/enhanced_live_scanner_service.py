@@ -31,12 +31,19 @@ class EnhancedLiveScannerService:
         self.min_signal_strength = 0.3
         self.max_symbols = 50  # Limit to prevent overload
         
+        # Status snapshot served to the API, refreshed by the monitor loop
+        self._status_lock = threading.Lock()
+        self._status_snapshot = {}
+        self.status_refresh_interval = 5  # seconds
+        
         # Apply coin-specific settings to WebSocket service
         self._apply_coin_settings_to_websocket()
         
         # Pass trading service to WebSocket service
         self.websocket_service.trading_service = trading_service
         
+        self._refresh_status_snapshot()
+        
     def _apply_coin_settings_to_websocket(self):
         """Apply coin-specific settings to WebSocket service"""
         try:
@@ -76,6 +83,7 @@ class EnhancedLiveScannerService:
         # Start monitoring thread
         self.scan_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self.scan_thread.start()
+        self._refresh_status_snapshot()
         
     def stop_scanner(self):
         """Stop enhanced live scanner"""
@@ -87,6 +95,8 @@ class EnhancedLiveScannerService:
         
         if self.scan_thread:
             self.scan_thread.join(timeout=10)
+        
+        self._refresh_status_snapshot()
             
     def _get_top_symbols(self):
         """Get top trading symbols by volume"""
@@ -189,8 +199,12 @@ class EnhancedLiveScannerService:
                 else:
                     consecutive_disconnects = 0  # Reset counter on successful connection
                     
-                # Print status every 5 minutes
-                time.sleep(300)  # 5 minutes
+                # Refresh status snapshot while waiting, print status every 5 minutes
+                waited = 0
+                while self.is_running and waited < 300:
+                    self._refresh_status_snapshot()
+                    time.sleep(self.status_refresh_interval)
+                    waited += self.status_refresh_interval
                 if self.is_running:
                     symbols_count = len(self.websocket_service.subscribed_symbols)
                     status = "Connected" if self.websocket_service.is_running else "Disconnected"
@@ -200,24 +214,36 @@ class EnhancedLiveScannerService:
                 print(f"Error in monitor loop: {str(e)}")
                 time.sleep(60)
                 
+    def _refresh_status_snapshot(self):
+        """Rebuild the status snapshot from the WebSocket service"""
+        try:
+            # Get WebSocket health info
+            health_info = self.websocket_service.get_connection_health()
+            monitored_symbols = list(self.websocket_service.subscribed_symbols)
+            
+            snapshot = {
+                'is_running': self.is_running,
+                'websocket_running': self.websocket_service.is_running,
+                'connection_stable': health_info['is_stable'],
+                'time_since_last_message': health_info['time_since_last_message'],
+                'signal_buffer_size': health_info['signal_buffer_size'],
+                'symbols_with_data': health_info['symbols_with_data'],
+                'timeframe': self.timeframe,
+                'symbols_count': len(monitored_symbols),
+                'monitored_symbols': monitored_symbols,
+                'min_signal_strength': self.min_signal_strength,
+                'reconnect_attempts': health_info['reconnect_attempts']
+            }
+            
+            with self._status_lock:
+                self._status_snapshot = snapshot
+        except Exception as e:
+            print(f"Error refreshing scanner status: {str(e)}")
+    
     def get_status(self):
-        """Get scanner status"""
-        # Get WebSocket health info
-        health_info = self.websocket_service.get_connection_health()
-        
-        return {
-            'is_running': self.is_running,
-            'websocket_running': self.websocket_service.is_running,
-            'connection_stable': health_info['is_stable'],
-            'time_since_last_message': health_info['time_since_last_message'],
-            'signal_buffer_size': health_info['signal_buffer_size'],
-            'symbols_with_data': health_info['symbols_with_data'],
-            'timeframe': self.timeframe,
-            'symbols_count': len(self.websocket_service.subscribed_symbols),
-            'monitored_symbols': list(self.websocket_service.subscribed_symbols),
-            'min_signal_strength': self.min_signal_strength,
-            'reconnect_attempts': health_info['reconnect_attempts']
-        }
+        """Get scanner status (precomputed snapshot)"""
+        with self._status_lock:
+            return dict(self._status_snapshot)
         
     def update_settings(self, min_signal_strength=None, max_symbols=None, timeframe=None):
         """Update scanner settings"""
@@ -234,11 +260,13 @@ class EnhancedLiveScannerService:
                 print(f"Timeframe updated to {timeframe}, restart scanner to apply changes")
             
         print(f"Scanner settings updated: min_strength={self.min_signal_strength}, max_symbols={self.max_symbols}, timeframe={self.timeframe}")
+        self._refresh_status_snapshot()
         
     def add_symbol(self, symbol):
         """Add symbol to monitoring"""
         if len(self.websocket_service.subscribed_symbols) < self.max_symbols:
             self.websocket_service.add_symbol(symbol)
+            self._refresh_status_snapshot()
             return True
         else:
             print(f"Cannot add {symbol}: Maximum symbols limit reached ({self.max_symbols})")
@@ -247,6 +275,7 @@ class EnhancedLiveScannerService:
     def remove_symbol(self, symbol):
         """Remove symbol from monitoring"""
         self.websocket_service.remove_symbol(symbol)
+        self._refresh_status_snapshot()
         
     def get_live_data(self, symbol=None):
         """Get live data for symbol(s)"""
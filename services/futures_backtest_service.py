@@ -1,4 +1,3 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime
 
@@ -324,41 +323,39 @@ class FuturesBacktestService:
         return net_pnl, commission
     
     def prepare_chart_data(self, df, signals):
-        """Prepare data for candlestick chart with signals"""
+        """Prepare column-oriented chart data (one list per field) with signals"""
         try:
-            chart_data = []
+            aligned = signals.reindex(df.index)
             
-            for timestamp, row in df.iterrows():
-                signal_info = signals.loc[timestamp] if timestamp in signals.index else None
-                
-                candle = {
-                    'timestamp': timestamp.isoformat(),
-                    'open': float(row['open']),
-                    'high': float(row['high']),
-                    'low': float(row['low']),
-                    'close': float(row['close']),
-                    'volume': float(row['volume']),
-                    'macd': float(row['macd']) if 'macd' in row and not pd.isna(row['macd']) else None,
-                    'macd_signal': float(row['macd_signal']) if 'macd_signal' in row and not pd.isna(row['macd_signal']) else None,
-                    'macd_histogram': float(row['macd_histogram']) if 'macd_histogram' in row and not pd.isna(row['macd_histogram']) else None,
-                    'fast_ma': float(row['fast_ma']) if 'fast_ma' in row and not pd.isna(row['fast_ma']) else None,
-                    'slow_ma': float(row['slow_ma']) if 'slow_ma' in row and not pd.isna(row['slow_ma']) else None,
-                    'very_slow_ma': float(row['very_slow_ma']) if 'very_slow_ma' in row and not pd.isna(row['very_slow_ma']) else None
-                }
-                
-                if signal_info is not None:
-                    candle['signal'] = int(signal_info['signal'])
-                    candle['signal_strength'] = float(signal_info['signal_strength'])
-                else:
-                    candle['signal'] = 0
-                    candle['signal_strength'] = 0
-                
-                chart_data.append(candle)
+            def nullable(column):
+                # NaN -> None so the JSON carries null like the old per-row format
+                if column not in df.columns:
+                    return [None] * len(df)
+                series = df[column].astype(float)
+                return series.astype(object).where(series.notna(), None).tolist()
+            
+            chart_data = {
+                'timestamp': df.index.strftime('%Y-%m-%dT%H:%M:%S').tolist(),
+                'open': df['open'].astype(float).tolist(),
+                'high': df['high'].astype(float).tolist(),
+                'low': df['low'].astype(float).tolist(),
+                'close': df['close'].astype(float).tolist(),
+                'volume': df['volume'].astype(float).tolist(),
+                'macd': nullable('macd'),
+                'macd_signal': nullable('macd_signal'),
+                'macd_histogram': nullable('macd_histogram'),
+                'fast_ma': nullable('fast_ma'),
+                'slow_ma': nullable('slow_ma'),
+                'very_slow_ma': nullable('very_slow_ma'),
+                'signal': aligned['signal'].fillna(0).astype(int).tolist(),
+                'signal_strength': aligned['signal_strength'].fillna(0).astype(float).tolist()
+            }
             
             # Debug: Count signals in chart data
-            buy_count = len([d for d in chart_data if d['signal'] == 1])
-            sell_count = len([d for d in chart_data if d['signal'] == -1])
-            print(f"Futures chart data prepared: {buy_count} buy signals, {sell_count} sell signals out of {len(chart_data)} candles")
+            signal_values = aligned['signal'].fillna(0).to_numpy()
+            buy_count = int((signal_values == 1).sum())
+            sell_count = int((signal_values == -1).sum())
+            print(f"Futures chart data prepared: {buy_count} buy signals, {sell_count} sell signals out of {len(df)} candles")
             
             return chart_data
         except Exception as e:
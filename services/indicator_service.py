@@ -39,8 +39,9 @@ class IndicatorService:
             result = self.macd_sma_strategy.generate_signals(df, strategy_params)
             
             # Count actual signals
-            buy_signals = (result['signal'] == 1).sum()
-            sell_signals = (result['signal'] == -1).sum()
+            signal_values = result['signal'].to_numpy()
+            buy_signals = np.count_nonzero(signal_values == 1)
+            sell_signals = np.count_nonzero(signal_values == -1)
             print(f"Generated {buy_signals} buy signals and {sell_signals} sell signals")
             
             return result
@@ -48,6 +49,23 @@ class IndicatorService:
             print(f"Error in generate_signals: {str(e)}")
             raise Exception(f"Error generating signals: {str(e)}")
     
+    def calculate_indicators_and_signals(self, df, strategy_params=None):
+        """Calculate indicators and signals with a single indicator pass, returns (df, signals)"""
+        try:
+            if df.empty:
+                raise Exception("No data available for indicator calculation")
+            
+            data, signals = self.macd_sma_strategy.calculate_indicators_and_signals(df, strategy_params)
+            
+            signal_values = signals['signal'].to_numpy()
+            print(f"Calculated indicators for {len(data)} data points, "
+                  f"{np.count_nonzero(signal_values == 1)} buy / {np.count_nonzero(signal_values == -1)} sell signals")
+            
+            return data, signals
+        except Exception as e:
+            print(f"Error in calculate_indicators_and_signals: {str(e)}")
+            raise Exception(f"Error calculating indicators and signals: {str(e)}")
+    
     def get_strategy_info(self):
         """Get current strategy information"""
         return self.macd_sma_strategy.get_strategy_info()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Background job manager - runs long-running start tasks off the request thread
+"""
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+class JobManager:
+    """Run callables in a worker pool and keep their status for polling"""
+    
+    def __init__(self, max_workers=2, max_jobs=100):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()  # {job_id: job_info}
+        self.lock = threading.Lock()
+    
+    def submit(self, name, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return its job id"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'name': name,
+            'status': 'queued',
+            'result': None,
+            'error': None,
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None
+        }
+        
+        with self.lock:
+            self.jobs[job_id] = job
+            # Drop oldest finished jobs beyond the limit
+            while len(self.jobs) > self.max_jobs:
+                oldest_id = next(iter(self.jobs))
+                if self.jobs[oldest_id]['status'] in ('queued', 'running'):
+                    break
+                self.jobs.popitem(last=False)
+        
+        self.executor.submit(self._run, job_id, func, args, kwargs)
+        print(f"📥 Job queued: {name} ({job_id})")
+        return job_id
+    
+    def _run(self, job_id, func, args, kwargs):
+        """Execute job and record outcome"""
+        self._update(job_id, status='running', started_at=datetime.now().isoformat())
+        try:
+            result = func(*args, **kwargs)
+            self._update(job_id, status='completed', result=result, finished_at=datetime.now().isoformat())
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {str(e)}")
+            self._update(job_id, status='failed', error=str(e), finished_at=datetime.now().isoformat())
+    
+    def _update(self, job_id, **fields):
+        with self.lock:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+    
+    def get_job(self, job_id):
+        """Get job info copy or None"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+    
+    def has_active_job(self, name):
+        """Check if a job with this name is queued or running"""
+        with self.lock:
+            return any(job['name'] == name and job['status'] in ('queued', 'running')
+                       for job in self.jobs.values())
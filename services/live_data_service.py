@@ -3,6 +3,7 @@ import numpy as np
 from datetime import datetime, timedelta
 import time
 from config.env_config import EnvConfig
+from config.settings import Config
 from services.binance_service import BinanceService
 from services.indicator_service import IndicatorService
 from services.coin_settings_manager import CoinSettingsManager
@@ -78,8 +79,7 @@ class LiveDataService:
             # Get symbol-specific settings
             strategy_params = self.get_symbol_settings(symbol)
             
-            df_with_indicators = self.indicator_service.calculate_indicators(df, strategy_params)
-            signals = self.indicator_service.generate_signals(df_with_indicators, strategy_params)
+            df_with_indicators, signals = self.indicator_service.calculate_indicators_and_signals(df, strategy_params)
             
             # Get last N candles
             recent_data = df_with_indicators.tail(limit).copy()
@@ -248,13 +248,7 @@ class LiveDataService:
     
     def _get_days_for_candles(self, interval, candles):
         """Calculate days needed for number of candles"""
-        interval_minutes = {
-            '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30,
-            '1h': 60, '2h': 120, '4h': 240, '6h': 360, '8h': 480, '12h': 720,
-            '1d': 1440
-        }
-        
-        minutes_needed = candles * interval_minutes.get(interval, 60)
+        minutes_needed = candles * Config.INTERVAL_SECONDS.get(interval, 3600) // 60
         days_needed = max(1, int(minutes_needed / 1440) + 1)
         
         return min(days_needed, 365)  # Max 1 year
\ No newline at end of file
@@ -1,6 +1,56 @@
 import pandas as pd
 import numpy as np
 import talib
+from utils._njit import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def _entry_signals_jit(hist, macd, fast_ma, slow_ma, very_slow_ma, close, lag):
+    """Raw long/short entry signals (1/-1/0) - single pass over ndarrays"""
+    n = hist.shape[0]
+    out = np.zeros(n, dtype=np.int64)
+    for i in range(1, n):
+        if i < lag:
+            continue
+        prev_hist = hist[i - 1]
+        past_close = close[i - lag]
+        if (hist[i] > 0 and prev_hist <= 0 and macd[i] > 0 and
+                fast_ma[i] > slow_ma[i] and past_close > very_slow_ma[i] and
+                not slow_ma[i] < very_slow_ma[i]):
+            out[i] = 1
+        elif (hist[i] < 0 and prev_hist >= 0 and macd[i] < 0 and
+                fast_ma[i] < slow_ma[i] and past_close < very_slow_ma[i] and
+                not slow_ma[i] > very_slow_ma[i]):
+            out[i] = -1
+    return out
+
+
+def _entry_signals_np(hist, macd, fast_ma, slow_ma, very_slow_ma, close, lag):
+    """Vectorized NumPy version of _entry_signals_jit (used without numba)"""
+    n = hist.shape[0]
+    prev_hist = np.full(n, np.nan)
+    prev_hist[1:] = hist[:-1]
+    past_close = np.full(n, np.nan)
+    if lag < n:
+        past_close[lag:] = close[:n - lag]
+    
+    long_condition = (
+        (hist > 0) & (prev_hist <= 0) & (macd > 0) &
+        (fast_ma > slow_ma) & (past_close > very_slow_ma) & ~(slow_ma < very_slow_ma)
+    )
+    short_condition = (
+        (hist < 0) & (prev_hist >= 0) & (macd < 0) &
+        (fast_ma < slow_ma) & (past_close < very_slow_ma) & ~(slow_ma > very_slow_ma)
+    )
+    
+    out = np.zeros(n, dtype=np.int64)
+    out[long_condition] = 1
+    out[short_condition] = -1
+    return out
+
+
+_entry_signals = _entry_signals_jit if NUMBA_AVAILABLE else _entry_signals_np
+
 
 class MACDSMAStrategy:
     def __init__(self, strategy_params=None):
@@ -33,13 +83,15 @@ class MACDSMAStrategy:
             data = df.copy()
             
             # Calculate Simple Moving Averages for MACD (not EMA like default MACD)
-            data['fast_ma'] = talib.SMA(data['close'], timeperiod=self.fast_length)
-            data['slow_ma'] = talib.SMA(data['close'], timeperiod=self.slow_length)
-            data['very_slow_ma'] = talib.SMA(data['close'], timeperiod=self.very_slow_length)
+            # talib works on float64 only; no copy when klines are already float64
+            close = data['close'].to_numpy(dtype=np.float64)
+            data['fast_ma'] = talib.SMA(close, timeperiod=self.fast_length)
+            data['slow_ma'] = talib.SMA(close, timeperiod=self.slow_length)
+            data['very_slow_ma'] = talib.SMA(close, timeperiod=self.very_slow_length)
             
             # Calculate MACD components
             data['macd'] = data['fast_ma'] - data['slow_ma']
-            data['macd_signal'] = talib.SMA(data['macd'], timeperiod=self.signal_length)
+            data['macd_signal'] = talib.SMA(data['macd'].to_numpy(dtype=np.float64), timeperiod=self.signal_length)
             data['macd_histogram'] = data['macd'] - data['macd_signal']
             
             # Fill NaN values
@@ -65,6 +117,21 @@ class MACDSMAStrategy:
             # Calculate indicators first
             data = self.calculate_indicators(df, strategy_params)
             
+            return self._build_signals(data)
+        except Exception as e:
+            raise Exception(f"Error generating MACD SMA signals: {str(e)}")
+    
+    def calculate_indicators_and_signals(self, df, strategy_params=None):
+        """Calculate indicators and signals in one pass, returns (data, signals)"""
+        try:
+            data = self.calculate_indicators(df, strategy_params)
+            return data, self._build_signals(data)
+        except Exception as e:
+            raise Exception(f"Error generating MACD SMA signals: {str(e)}")
+    
+    def _build_signals(self, data):
+        """Build signals DataFrame from already calculated indicators"""
+        try:
             signals = pd.DataFrame(index=data.index)
             signals['price'] = data['close']
             signals['signal'] = 0  # 0: hold, 1: buy (long), -1: sell (short)
@@ -78,37 +145,23 @@ class MACDSMAStrategy:
             very_slow_ma = data['very_slow_ma']
             close = data['close']
             
-            # Calculate crossovers
-            hist_crossover_up = (hist > 0) & (hist.shift(1) <= 0)  # crossover(hist, 0)
-            hist_crossunder_down = (hist < 0) & (hist.shift(1) >= 0)  # crossunder(hist, 0)
-            
-            # Long entry conditions
-            long_condition = (
-                hist_crossover_up &  # Histogram MACD crossover ke atas 0
-                (macd > 0) &  # MACD > 0 (momentum bullish)
-                (fast_ma > slow_ma) &  # Fast MA > Slow MA
-                (close.shift(self.slow_length) > very_slow_ma)  # Harga N bar lalu > SMA 200
-            )
-            
-            # Short entry conditions
-            short_condition = (
-                hist_crossunder_down &  # Histogram MACD cross down ke bawah 0
-                (macd < 0) &  # MACD < 0 (momentum bearish)
-                (fast_ma < slow_ma) &  # Fast MA < Slow MA
-                (close.shift(self.slow_length) < very_slow_ma)  # Harga N bar lalu < SMA 200
+            # Crossovers + entry/cancel conditions on raw ndarrays:
+            # long  = crossover(hist, 0) & macd > 0 & fast > slow & close[N] > SMA200, unless slow < SMA200
+            # short = crossunder(hist, 0) & macd < 0 & fast < slow & close[N] < SMA200, unless slow > SMA200
+            signals['signal'] = _entry_signals(
+                hist.to_numpy(dtype=np.float64),
+                macd.to_numpy(dtype=np.float64),
+                fast_ma.to_numpy(dtype=np.float64),
+                slow_ma.to_numpy(dtype=np.float64),
+                very_slow_ma.to_numpy(dtype=np.float64),
+                close.to_numpy(dtype=np.float64),
+                int(self.slow_length)
             )
             
-            # Cancel conditions
-            cancel_long = slow_ma < very_slow_ma  # Jika MA(26) < SMA(200) → cancel long
-            cancel_short = slow_ma > very_slow_ma  # Jika MA(26) > SMA(200) → cancel short
-            
-            # Apply signals with cancel conditions
-            signals.loc[long_condition & ~cancel_long, 'signal'] = 1
-            signals.loc[short_condition & ~cancel_short, 'signal'] = -1
-            
             # Debug: Print signal counts
-            buy_signals = (signals['signal'] == 1).sum()
-            sell_signals = (signals['signal'] == -1).sum()
+            signal_values = signals['signal'].to_numpy()
+            buy_signals = np.count_nonzero(signal_values == 1)
+            sell_signals = np.count_nonzero(signal_values == -1)
             print(f"Generated signals: {buy_signals} buy, {sell_signals} sell")
             
             # Calculate signal strength based on MACD momentum and histogram strength
@@ -135,8 +188,9 @@ class MACDSMAStrategy:
             signals.loc[weak_signals, 'signal'] = 0
             
             # Debug: Print final signal counts after filtering
-            final_buy_signals = (signals['signal'] == 1).sum()
-            final_sell_signals = (signals['signal'] == -1).sum()
+            signal_values = signals['signal'].to_numpy()
+            final_buy_signals = np.count_nonzero(signal_values == 1)
+            final_sell_signals = np.count_nonzero(signal_values == -1)
             print(f"Final signals after filtering: {final_buy_signals} buy, {final_sell_signals} sell")
             
             # Remove NaN values
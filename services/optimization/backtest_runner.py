@@ -3,6 +3,7 @@ Backtest runner for optimization
 """
 import numpy as np
 from services.optimization.base_optimizer import BaseOptimizer
+from services.backtest_kernel import run_kernel_backtest
 
 class BacktestRunner(BaseOptimizer):
     """Run backtests for optimization"""
@@ -27,8 +28,7 @@ class BacktestRunner(BaseOptimizer):
             }
             
             # Calculate indicators and signals
-            df_with_indicators = self.indicator_service.calculate_indicators(df, strategy_params)
-            signals = self.indicator_service.generate_signals(df_with_indicators, strategy_params)
+            df_with_indicators, signals = self.indicator_service.calculate_indicators_and_signals(df, strategy_params)
             
             # Run backtest
             backtest_results = self.backtest_service.run_backtest(
@@ -63,6 +63,34 @@ class BacktestRunner(BaseOptimizer):
             print(f"Error in single backtest: {str(e)}")
             return None
     
+    def run_single_backtest_kernel(self, close, params, trading_params, best_score=None):
+        """Run backtest for single parameter combination on the compiled kernel (None if pruned)"""
+        try:
+            stats = run_kernel_backtest(close, params, trading_params, best_score)
+            if stats is None:
+                return None
+            return self.build_kernel_result(params, stats)
+            
+        except Exception as e:
+            print(f"Error in single backtest: {str(e)}")
+            return None
+    
+    def build_kernel_result(self, params, stats):
+        """Build optimization result from kernel statistics"""
+        return {
+            'parameters': params,
+            'total_return': stats['total_return'],
+            'win_rate': stats['win_rate'],
+            'total_trades': stats['total_trades'],
+            'total_pnl': stats['total_pnl'],
+            'max_drawdown': stats['max_drawdown'],
+            'final_balance': stats['final_balance'],
+            'winning_trades': stats['winning_trades'],
+            'profit_factor': stats['profit_factor'],
+            'sharpe_ratio': stats['sharpe_ratio'],
+            'score': self._calculate_optimization_score(stats)
+        }
+    
     def _calculate_profit_factor(self, trades):
         """Calculate profit factor"""
         try:
@@ -111,7 +139,7 @@ class BacktestRunner(BaseOptimizer):
             return 0
     
     def _calculate_optimization_score(self, stats):
-        """Calculate optimization score combining multiple metrics"""
+        """Calculate optimization score combining multiple metrics (keep backtest_kernel's SCORE_BOUND_* in sync)"""
         try:
             # Weighted score combining different metrics
             total_return = stats['total_return']
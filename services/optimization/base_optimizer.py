@@ -1,7 +1,6 @@
 """
 Base optimizer class with common functionality
 """
-import pandas as pd
 import numpy as np
 import json
 import os
@@ -12,6 +11,7 @@ import threading
 from services.binance_service import BinanceService
 from services.indicator_service import IndicatorService
 from services.futures_backtest_service import FuturesBacktestService
+from services.optimization.klines_cache import klines_cache
 
 class BaseOptimizer:
     """Base class for optimization functionality"""
@@ -34,44 +34,13 @@ class BaseOptimizer:
             os.makedirs(self.cache_dir)
             print(f"Created cache directory: {self.cache_dir}")
     
-    def get_cache_filename(self, symbol, interval, start_date, end_date):
-        """Generate cache filename for data"""
-        return f"{symbol}_{interval}_{start_date}_{end_date}.csv"
-    
-    def get_cache_filepath(self, symbol, interval, start_date, end_date):
-        """Get full cache file path"""
-        filename = self.get_cache_filename(symbol, interval, start_date, end_date)
-        return os.path.join(self.cache_dir, filename)
-    
     def load_cached_data(self, symbol, interval, start_date, end_date):
         """Load cached market data if available"""
-        try:
-            cache_path = self.get_cache_filepath(symbol, interval, start_date, end_date)
-            
-            if os.path.exists(cache_path):
-                # Check if cache is not too old (max 1 day for historical data)
-                cache_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(cache_path))
-                if cache_age.days <= 1:
-                    print(f"Loading cached data for {symbol} from {cache_path}")
-                    df = pd.read_csv(cache_path, index_col=0, parse_dates=True)
-                    return df
-                else:
-                    print(f"Cache expired for {symbol}, will fetch fresh data")
-                    os.remove(cache_path)  # Remove expired cache
-            
-            return None
-        except Exception as e:
-            print(f"Error loading cached data for {symbol}: {str(e)}")
-            return None
+        return klines_cache.get(symbol, interval, start_date, end_date)
     
     def save_cached_data(self, df, symbol, interval, start_date, end_date):
         """Save market data to cache"""
-        try:
-            cache_path = self.get_cache_filepath(symbol, interval, start_date, end_date)
-            df.to_csv(cache_path)
-            print(f"Saved cached data for {symbol} to {cache_path}")
-        except Exception as e:
-            print(f"Error saving cached data for {symbol}: {str(e)}")
+        klines_cache.put(df, symbol, interval, start_date, end_date)
     
     def get_market_data(self, symbol, interval, start_date, end_date):
         """Get market data with caching"""
@@ -151,6 +120,8 @@ class BaseOptimizer:
                             cleared_count += 1
                             print(f"Removed bulk cached file: {filename}")
             
+            cleared_count += klines_cache.clear(older_than_hours)
+            
             return cleared_count
         except Exception as e:
             print(f"Error clearing cache: {str(e)}")
@@ -0,0 +1,218 @@
+"""
+Klines caches - memory + .npy files per (symbol, interval, start, end) for optimization,
+and per-day .npy files for completed days (historical bars never change)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+class KlinesCache:
+    """Load each symbol's klines once and share them across the whole parameter sweep"""
+
+    def __init__(self, cache_dir=os.path.join("optimizer_cache", "klines"), max_age_hours=24, max_memory_entries=128):
+        self.cache_dir = cache_dir
+        self.max_age_hours = max_age_hours
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()  # key -> (stored_at, (N, 6) float64 array: timestamp ms + OHLCV), LRU order
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+            print(f"Created klines cache directory: {self.cache_dir}")
+
+    def _filepath(self, key):
+        """Get .npy path for a cache key"""
+        digest = hashlib.sha256(json.dumps(key).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.npy")
+
+    @staticmethod
+    def _to_frame(array):
+        """Rebuild an OHLCV DataFrame indexed by timestamp"""
+        index = pd.to_datetime(array[:, 0].astype(np.int64), unit='ms')
+        index.name = 'timestamp'
+        return pd.DataFrame(array[:, 1:], index=index, columns=OHLCV_COLUMNS)
+    
+    @staticmethod
+    def _to_array(df):
+        """Flatten an OHLCV DataFrame into an (N, 6) float64 array: timestamp ms + OHLCV"""
+        timestamps = df.index.asi8 // 1_000_000  # ns -> ms
+        return np.column_stack([timestamps.astype(np.float64)] +
+                               [df[col].to_numpy(dtype=np.float64) for col in OHLCV_COLUMNS])
+
+    def _is_fresh(self, stored_at):
+        """Check an entry's age against max_age_hours"""
+        return (time.time() - stored_at) / 3600 <= self.max_age_hours
+
+    def _remember(self, mem_key, array, stored_at):
+        """Add an entry to the in-memory LRU (caller holds the lock)"""
+        self._memory[mem_key] = (stored_at, array)
+        self._memory.move_to_end(mem_key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _memory_lookup(self, mem_key):
+        """Get a fresh in-memory array and mark it recently used, dropping it if expired (caller holds the lock)"""
+        entry = self._memory.get(mem_key)
+        if entry is None:
+            return None
+        stored_at, array = entry
+        if not self._is_fresh(stored_at):
+            del self._memory[mem_key]
+            return None
+        self._memory.move_to_end(mem_key)
+        return array
+
+    def get(self, symbol, interval, start_date, end_date):
+        """Get cached klines DataFrame, or None on miss"""
+        key = [symbol, interval, str(start_date), str(end_date)]
+        mem_key = tuple(key)
+
+        with self._lock:
+            array = self._memory_lookup(mem_key)
+            if array is not None:
+                self.hits += 1
+                return self._to_frame(array)
+
+        path = self._filepath(key)
+        try:
+            if os.path.exists(path):
+                stored_at = os.path.getmtime(path)
+                if self._is_fresh(stored_at):
+                    array = np.load(path, mmap_mode='r')
+                    with self._lock:
+                        # Age from the file, so a disk hit does not restart the entry's lifetime
+                        self._remember(mem_key, array, stored_at)
+                        self.disk_hits += 1
+                    print(f"📁 Loaded cached klines for {symbol} from {path}")
+                    return self._to_frame(array)
+
+                print(f"Cache expired for {symbol}, will fetch fresh data")
+                os.remove(path)
+        except Exception as e:
+            print(f"Error loading cached klines for {symbol}: {str(e)}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def contains(self, symbol, interval, start_date, end_date):
+        """Check for a fresh entry without loading it or touching the hit counters"""
+        key = [symbol, interval, str(start_date), str(end_date)]
+        with self._lock:
+            entry = self._memory.get(tuple(key))
+            if entry is not None and self._is_fresh(entry[0]):
+                return True
+        path = self._filepath(key)
+        return os.path.exists(path) and self._is_fresh(os.path.getmtime(path))
+
+    def put(self, df, symbol, interval, start_date, end_date):
+        """Store klines as an (N, 6) float64 array in memory and on disk"""
+        try:
+            key = [symbol, interval, str(start_date), str(end_date)]
+            array = self._to_array(df)
+
+            path = self._filepath(key)
+            tmp_path = path + '.tmp.npy'
+            np.save(tmp_path, array)
+            os.replace(tmp_path, path)
+
+            with self._lock:
+                self._remember(tuple(key), array, time.time())
+        except Exception as e:
+            print(f"Error saving cached klines for {symbol}: {str(e)}")
+
+    def stats(self):
+        """Get hit/miss counters and cache size"""
+        with self._lock:
+            memory_entries = len(self._memory)
+            memory_bytes = sum(array.nbytes for _, array in self._memory.values())
+            hits, disk_hits, misses = self.hits, self.disk_hits, self.misses
+
+        disk_files = 0
+        disk_bytes = 0
+        if os.path.exists(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename.endswith('.npy'):
+                    disk_files += 1
+                    disk_bytes += os.path.getsize(os.path.join(self.cache_dir, filename))
+
+        lookups = hits + disk_hits + misses
+        return {
+            'hits': hits,
+            'disk_hits': disk_hits,
+            'misses': misses,
+            'hit_rate': round((hits + disk_hits) / lookups * 100, 2) if lookups else 0,
+            'memory_entries': memory_entries,
+            'memory_bytes': memory_bytes,
+            'disk_files': disk_files,
+            'disk_bytes': disk_bytes
+        }
+
+    def clear(self, older_than_hours=24):
+        """Remove kline files older than specified hours, returns count removed"""
+        cleared_count = 0
+        if os.path.exists(self.cache_dir):
+            now = time.time()
+            for filename in os.listdir(self.cache_dir):
+                if not filename.endswith('.npy'):
+                    continue
+                filepath = os.path.join(self.cache_dir, filename)
+                if (now - os.path.getmtime(filepath)) / 3600 > older_than_hours:
+                    os.remove(filepath)
+                    cleared_count += 1
+                    print(f"Removed cached klines file: {filename}")
+
+        # Memory entries may point at removed mmap files, reload from disk/API next time
+        with self._lock:
+            self._memory.clear()
+
+        return cleared_count
+
+class DailyKlinesStore:
+    """Completed UTC days of klines as symbol/interval/YYYYMMDD.npy, so old bars are fetched once"""
+
+    def __init__(self, cache_dir=os.path.join("optimizer_cache", "klines_daily")):
+        self.cache_dir = cache_dir
+
+    def _day_path(self, symbol, interval, day):
+        """Get .npy path for one day"""
+        return os.path.join(self.cache_dir, symbol, interval, f"{day:%Y%m%d}.npy")
+
+    def load(self, symbol, interval, day):
+        """Get one day's klines DataFrame, or None if not stored"""
+        path = self._day_path(symbol, interval, day)
+        try:
+            return KlinesCache._to_frame(np.load(path))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading daily klines for {symbol} {day:%Y-%m-%d}: {str(e)}")
+            return None
+
+    def save(self, df, symbol, interval, day):
+        """Store one completed day's klines"""
+        try:
+            path = self._day_path(symbol, interval, day)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.tmp.npy'
+            np.save(tmp_path, KlinesCache._to_array(df))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving daily klines for {symbol} {day:%Y-%m-%d}: {str(e)}")
+
+# Shared by all optimizers so every sweep and the stats route see the same cache
+klines_cache = KlinesCache()
+
+# Shared by every BinanceService instance
+daily_klines_store = DailyKlinesStore()
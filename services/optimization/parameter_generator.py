@@ -2,7 +2,10 @@
 Parameter combination generator for optimization
 """
 import itertools
+from datetime import datetime
+
 import numpy as np
+from config.settings import Config
 
 class ParameterGenerator:
     """Generate parameter combinations for optimization"""
@@ -83,6 +86,18 @@ class ParameterGenerator:
             
             total_combinations = len(symbols) * combinations_per_symbol
             
+            # Candles per symbol straight from the date span, no date_range materialization
+            candles_per_symbol = None
+            interval_seconds = Config.INTERVAL_SECONDS.get(optimization_params.get('interval', '1h'))
+            start_date = optimization_params.get('start_date')
+            end_date = optimization_params.get('end_date')
+            if interval_seconds and start_date and end_date:
+                try:
+                    span = datetime.fromisoformat(end_date) - datetime.fromisoformat(start_date)
+                    candles_per_symbol = max(0, int(span.total_seconds() // interval_seconds))
+                except ValueError:
+                    pass
+            
             # Estimate time (rough calculation)
             # Assume ~0.1 seconds per backtest on average
             estimated_seconds_per_combination = 0.1
@@ -96,8 +111,10 @@ class ParameterGenerator:
             return {
                 'total_symbols': len(symbols),
                 'combinations_per_symbol': combinations_per_symbol,
+                'candles_per_symbol': candles_per_symbol,
                 'total_combinations': total_combinations,
                 'max_workers': max_workers,
+                'search_strategy': optimization_params.get('search_strategy', Config.OPTIMIZER_SEARCH_STRATEGY),
                 'estimated_time': {
                     'total_seconds': int(total_estimated_seconds),
                     'hours': hours,
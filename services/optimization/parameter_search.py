@@ -0,0 +1,108 @@
+"""
+Model-based (TPE) parameter search for optimization
+"""
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.optimization.parameter_generator import ParameterGenerator
+
+try:
+    import optuna
+    from optuna.samplers import TPESampler
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    OPTUNA_AVAILABLE = True
+except ImportError:
+    OPTUNA_AVAILABLE = False
+
+DEFAULT_N_TRIALS = 60
+
+INT_PARAMS = ('macd_fast', 'macd_slow', 'macd_signal', 'sma_length')
+FLOAT_PARAMS = ('tp_base', 'stop_loss')
+
+class TPESearch:
+    """Sample a fixed budget of parameter sets instead of sweeping the full grid"""
+
+    def __init__(self, param_ranges, n_trials=DEFAULT_N_TRIALS, seed=None):
+        self.param_ranges = param_ranges
+        self.n_trials = max(1, int(n_trials))
+        self.seed = seed
+
+    def run(self, evaluate, n_jobs=1, should_stop=None, on_trial=None):
+        """Evaluate up to n_trials parameter sets, returns results sorted by score"""
+        if OPTUNA_AVAILABLE:
+            results = self._run_tpe(evaluate, n_jobs, should_stop, on_trial)
+        else:
+            results = self._run_random(evaluate, n_jobs, should_stop, on_trial)
+
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results
+
+    def _suggest(self, trial):
+        """Suggest one parameter set from param_ranges"""
+        params = {}
+        for name in INT_PARAMS:
+            r = self.param_ranges[name]
+            params[name] = trial.suggest_int(name, int(r['min']), int(r['max']), step=int(r['step']))
+        for name in FLOAT_PARAMS:
+            r = self.param_ranges[name]
+            params[name] = round(trial.suggest_float(name, float(r['min']), float(r['max']), step=float(r['step'])), 2)
+        return params
+
+    def _run_tpe(self, evaluate, n_jobs, should_stop, on_trial):
+        """Run an Optuna TPE study, memoizing repeated parameter sets"""
+        study = optuna.create_study(direction='maximize', sampler=TPESampler(seed=self.seed))
+        evaluated = {}
+        lock = threading.Lock()
+
+        def objective(trial):
+            if should_stop and should_stop():
+                study.stop()
+                raise optuna.TrialPruned()
+
+            params = self._suggest(trial)
+            if params['macd_fast'] >= params['macd_slow']:
+                raise optuna.TrialPruned()
+
+            # TPE revisits points on a discrete grid, reuse the earlier backtest
+            key = tuple(params[name] for name in INT_PARAMS + FLOAT_PARAMS)
+            with lock:
+                result = evaluated.get(key)
+            if result is None and key not in evaluated:
+                result = evaluate(params)
+                with lock:
+                    evaluated[key] = result
+
+            if on_trial:
+                on_trial()
+
+            if result is None:
+                raise optuna.TrialPruned()
+            return result['score']
+
+        study.optimize(objective, n_trials=self.n_trials, n_jobs=max(1, n_jobs), catch=(Exception,))
+        return [result for result in evaluated.values() if result is not None]
+
+    def _run_random(self, evaluate, n_jobs, should_stop, on_trial):
+        """Fallback when optuna is not installed: random sample of the valid grid"""
+        combinations = ParameterGenerator.generate_parameter_combinations(self.param_ranges)
+        rng = random.Random(self.seed)
+        sample = rng.sample(combinations, min(self.n_trials, len(combinations)))
+
+        results = []
+        with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+            futures = [executor.submit(evaluate, params) for params in sample]
+            for future in as_completed(futures):
+                if should_stop and should_stop():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                try:
+                    result = future.result()
+                    if result is not None:
+                        results.append(result)
+                except Exception as e:
+                    print(f"  Error in backtest: {str(e)}")
+                if on_trial:
+                    on_trial()
+        return results
@@ -0,0 +1,86 @@
+"""
+SQLite store for per-coin optimization results - rows are written as symbols finish
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+class ResultsStore:
+    """Persist each symbol's best result so a crash keeps finished work and status can page through it"""
+
+    def __init__(self, db_path=os.path.join("optimizer_cache", "results.db")):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        # Autocommit + WAL: each insert is durable on its own and readers never block the writer
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'run_id TEXT, symbol TEXT, params_hash TEXT, metric REAL, '
+            'created_at REAL, params_json TEXT, '
+            'PRIMARY KEY (run_id, symbol, params_hash)) WITHOUT ROWID'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_results_metric ON results (run_id, metric)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_results_created ON results (run_id, created_at)')
+
+    @staticmethod
+    def new_run_id():
+        """Generate a run id for one optimization run"""
+        return datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+    @staticmethod
+    def _params_hash(params):
+        """Stable hash of a parameter set"""
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def add(self, run_id, symbol, result):
+        """Insert (or replace) one symbol result"""
+        try:
+            row = (run_id, symbol, self._params_hash(result.get('parameters', {})),
+                   float(result.get('score', 0)), time.time(), json.dumps(result, default=str))
+            with self._lock:
+                self._conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)', row)
+        except Exception as e:
+            print(f"Error saving optimization result for {symbol}: {str(e)}")
+
+    def count(self, run_id):
+        """Number of stored results for a run"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM results WHERE run_id = ?', (run_id,)).fetchone()[0]
+
+    def recent(self, run_id, limit=5):
+        """Most recently finished results as [(symbol, result), ...], oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT symbol, params_json FROM results WHERE run_id = ? ORDER BY created_at DESC LIMIT ?',
+                (run_id, limit)
+            ).fetchall()
+        return [(symbol, json.loads(params_json)) for symbol, params_json in reversed(rows)]
+
+    def page(self, run_id, limit=50, offset=0):
+        """Results ordered by score, as [(symbol, result), ...]"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT symbol, params_json FROM results WHERE run_id = ? ORDER BY metric DESC LIMIT ? OFFSET ?',
+                (run_id, limit, offset)
+            ).fetchall()
+        return [(symbol, json.loads(params_json)) for symbol, params_json in rows]
+
+    def iter_results(self, run_id):
+        """All results of a run as (symbol, result) pairs"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT symbol, params_json FROM results WHERE run_id = ? ORDER BY created_at', (run_id,)
+            ).fetchall()
+        for symbol, params_json in rows:
+            yield symbol, json.loads(params_json)
@@ -9,6 +9,7 @@ import threading
 from services.binance_service import BinanceService
 from services.indicator_service import IndicatorService
 from services.futures_backtest_service import FuturesBacktestService
+from services.optimization.klines_cache import klines_cache
 
 class OptimizerService:
     def __init__(self):
@@ -176,8 +177,7 @@ class OptimizerService:
             }
             
             # Calculate indicators and signals
-            df_with_indicators = self.indicator_service.calculate_indicators(df, strategy_params)
-            signals = self.indicator_service.generate_signals(df_with_indicators, strategy_params)
+            df_with_indicators, signals = self.indicator_service.calculate_indicators_and_signals(df, strategy_params)
             
             # Run backtest
             backtest_results = self.backtest_service.run_backtest(
@@ -477,6 +477,8 @@ class OptimizerService:
                 
                 for filename in os.listdir(self.cache_dir):
                     filepath = os.path.join(self.cache_dir, filename)
+                    if os.path.isdir(filepath):
+                        continue
                     file_time = datetime.fromtimestamp(os.path.getmtime(filepath))
                     age_hours = (current_time - file_time).total_seconds() / 3600
                     
@@ -485,6 +487,9 @@ class OptimizerService:
                         cleared_count += 1
                         print(f"Removed cached file: {filename}")
             
+            # Per-symbol kline arrays used by the optimizers
+            cleared_count += klines_cache.clear(older_than_hours)
+            
             return cleared_count
         except Exception as e:
             print(f"Error clearing cache: {str(e)}")
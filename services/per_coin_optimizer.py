@@ -1,17 +1,31 @@
 """
 Per-coin optimizer service - Main orchestrator
 """
+import asyncio
 import json
 import os
 import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+import numpy as np
 
 from services.optimization.base_optimizer import BaseOptimizer
 from services.optimization.parameter_generator import ParameterGenerator
 from services.optimization.backtest_runner import BacktestRunner
+from services.optimization.parameter_search import TPESearch, DEFAULT_N_TRIALS
+from services.backtest_kernel import (
+    KERNEL_AVAILABLE, KERNEL_FLOAT_DTYPE, to_close_array, eval_params_shared, check_float32_parity
+)
+from services.optimization.klines_cache import klines_cache
+from services.optimization.results_store import ResultsStore
+from services.binance_async import fetch_many_klines
 from services.coin_settings_manager import CoinSettingsManager
+from config.settings import Config
 from utils.date_utils import validate_date_range
 
 class PerCoinOptimizer(BaseOptimizer):
@@ -29,14 +43,25 @@ class PerCoinOptimizer(BaseOptimizer):
         self.total_symbols = 0
         self.current_symbol_progress = 0
         self.total_combinations = 0
-        self.best_results = {}  # Results per symbol
+        self.search_strategy = Config.OPTIMIZER_SEARCH_STRATEGY  # 'grid' tests every combination, 'tpe' samples n_trials per symbol
+        self.param_ranges = {}
+        self.n_trials = DEFAULT_N_TRIALS
+        self.prune_grid = False  # Opt-in: grid trials that can no longer beat the symbol's best score are abandoned early
+        self.results_store = ResultsStore(os.path.join(self.cache_dir, "results.db"))  # Best result per symbol
+        self.run_id = None
         self.optimization_thread = None
+        self.process_pool = None  # Kernel backtests run here when numba is available
+        self.kernel_dtype = np.dtype(np.float64)
         
         # Queue management
         self.symbols_queue = []
         self.completed_symbols = []
         self.failed_symbols = []
         
+        # Popular symbols ranking cache (cleared hourly)
+        self.popular_symbols_ttl = 3600
+        self._popular_symbols_expires = 0
+        
         # Pre-calculated combinations cache
         self.combinations_cache = {}
         self.combinations_cache_file = os.path.join(self.cache_dir, "parameter_combinations.json")
@@ -44,14 +69,6 @@ class PerCoinOptimizer(BaseOptimizer):
         # Symbol data cache
         self.symbols_data_cache = {}
         self.symbols_cache_file = os.path.join(self.cache_dir, "symbols_data_cache.json")
-        self.bulk_data_cache_dir = os.path.join(self.cache_dir, "bulk_symbol_data")
-        self.ensure_bulk_cache_dir()
-    
-    def ensure_bulk_cache_dir(self):
-        """Ensure bulk cache directory exists"""
-        if not os.path.exists(self.bulk_data_cache_dir):
-            os.makedirs(self.bulk_data_cache_dir)
-            print(f"Created bulk cache directory: {self.bulk_data_cache_dir}")
         
     def get_all_available_symbols(self):
         """Get all available symbols"""
@@ -62,89 +79,22 @@ class PerCoinOptimizer(BaseOptimizer):
             print(f"Error getting all symbols: {str(e)}")
             return []
     
-    def get_bulk_cache_key(self, symbols, interval, start_date, end_date):
-        """Generate cache key for bulk symbol data"""
-        symbols_hash = str(hash(tuple(sorted(symbols))))
-        return f"bulk_{symbols_hash}_{interval}_{start_date}_{end_date}"
-    
-    def save_bulk_symbol_data(self, symbols_data, cache_key):
-        """Save bulk symbol data to cache"""
-        try:
-            cache_file = os.path.join(self.bulk_data_cache_dir, f"{cache_key}.json")
-            
-            # Convert DataFrames to dict for JSON serialization
-            serializable_data = {}
-            for symbol, df in symbols_data.items():
-                if df is not None and not df.empty:
-                    # Convert DataFrame to dict with timestamp as string
-                    df_dict = df.reset_index().to_dict('records')
-                    # Convert timestamps to string
-                    for record in df_dict:
-                        if 'timestamp' in record:
-                            record['timestamp'] = record['timestamp'].isoformat()
-                    serializable_data[symbol] = df_dict
-            
-            with open(cache_file, 'w') as f:
-                json.dump({
-                    'data': serializable_data,
-                    'timestamp': datetime.now().isoformat(),
-                    'symbols_count': len(serializable_data)
-                }, f, indent=2)
-            
-            print(f"💾 Saved bulk data for {len(serializable_data)} symbols to cache")
-            return True
-            
-        except Exception as e:
-            print(f"Error saving bulk symbol data: {str(e)}")
-            return False
-    
-    def load_bulk_symbol_data(self, cache_key):
-        """Load bulk symbol data from cache"""
-        try:
-            cache_file = os.path.join(self.bulk_data_cache_dir, f"{cache_key}.json")
-            
-            if not os.path.exists(cache_file):
-                return None
-            
-            # Check cache age (max 1 day)
-            cache_age = datetime.now() - datetime.fromtimestamp(os.path.getmtime(cache_file))
-            if cache_age.days > 1:
-                print(f"Bulk cache expired, removing: {cache_file}")
-                os.remove(cache_file)
-                return None
-            
-            with open(cache_file, 'r') as f:
-                cache_data = json.load(f)
-            
-            # Convert back to DataFrames
-            symbols_data = {}
-            for symbol, records in cache_data['data'].items():
-                if records:
-                    import pandas as pd
-                    df = pd.DataFrame(records)
-                    # Convert timestamp back to datetime
-                    if 'timestamp' in df.columns:
-                        df['timestamp'] = pd.to_datetime(df['timestamp'])
-                        df.set_index('timestamp', inplace=True)
-                    symbols_data[symbol] = df
-            
-            print(f"📁 Loaded bulk data for {len(symbols_data)} symbols from cache")
-            return symbols_data
-            
-        except Exception as e:
-            print(f"Error loading bulk symbol data: {str(e)}")
-            return None
-    
     def fetch_all_symbols_data_bulk(self, symbols, interval, start_date, end_date, max_workers=8):
-        """Fetch market data for all symbols in parallel with caching"""
+        """Fetch market data for all symbols in parallel (per-symbol klines cache)"""
         try:
-            # Check cache first
-            cache_key = self.get_bulk_cache_key(symbols, interval, start_date, end_date)
-            cached_data = self.load_bulk_symbol_data(cache_key)
-            
-            if cached_data:
-                print(f"🚀 Using cached bulk data for {len(cached_data)} symbols")
-                return cached_data
+            # Cold symbols are fetched concurrently over one async session first; the
+            # threaded loop below then reads them from the klines cache and retries failures
+            missing_symbols = [s for s in symbols if not klines_cache.contains(s, interval, start_date, end_date)]
+            if missing_symbols:
+                print(f"⚡ Async prefetch of {len(missing_symbols)} uncached symbols...")
+                try:
+                    fetched = asyncio.run(fetch_many_klines(missing_symbols, interval, start_date, end_date))
+                    for symbol, df in fetched.items():
+                        if df is not None:
+                            self.save_cached_data(df, symbol, interval, start_date, end_date)
+                    print(f"  ✅ Prefetched {sum(df is not None for df in fetched.values())}/{len(missing_symbols)} symbols")
+                except Exception as e:
+                    print(f"  ⚠️ Async prefetch failed, falling back to threaded fetch: {str(e)}")
             
             print(f"🔄 Fetching market data for {len(symbols)} symbols in parallel with {max_workers} workers...")
             symbols_data = {}
@@ -176,9 +126,6 @@ class PerCoinOptimizer(BaseOptimizer):
                         symbols_data[symbol] = None
                         completed += 1
             
-            # Save to cache
-            self.save_bulk_symbol_data(symbols_data, cache_key)
-            
             # Filter out failed symbols
             valid_symbols_data = {k: v for k, v in symbols_data.items() if v is not None and not v.empty}
             
@@ -221,50 +168,62 @@ class PerCoinOptimizer(BaseOptimizer):
             return None
     
     def get_popular_symbols(self, count=50):
-        """Get popular symbols (top by volume/market cap)"""
+        """Get popular symbols (top by volume/market cap), ranking cached for an hour"""
         try:
-            # Popular symbols list (you can enhance this with real-time volume data)
-            popular_symbols = [
-                'BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'SOLUSDT', 'DOTUSDT',
-                'LINKUSDT', 'AVAXUSDT', 'MATICUSDT', 'ATOMUSDT', 'NEARUSDT',
-                'UNIUSDT', 'LTCUSDT', 'BCHUSDT', 'XLMUSDT', 'VETUSDT',
-                'FILUSDT', 'TRXUSDT', 'ETCUSDT', 'XMRUSDT', 'EOSUSDT',
-                'AAVEUSDT', 'MKRUSDT', 'COMPUSDT', 'YFIUSDT', 'SUSHIUSDT',
-                'SNXUSDT', 'CRVUSDT', 'BALUSDT', '1INCHUSDT', 'ENJUSDT',
-                'MANAUSDT', 'SANDUSDT', 'CHZUSDT', 'GALAUSDT', 'AXSUSDT',
-                'FLOWUSDT', 'FTMUSDT', 'HBARUSDT', 'ICPUSDT', 'THETAUSDT',
-                'ALGOUSDT', 'EGLDUSDT', 'ZILUSDT', 'KSMUSDT', 'WAVESUSDT',
-                'OMGUSDT', 'QTUMUSDT', 'BATUSDT', 'ZRXUSDT', 'STORJUSDT',
-                'BNBUSDT', 'XRPUSDT', 'DOGEUSDT', 'SHIBUSDT', 'PEPEUSDT',
-                'WIFUSDT', 'BONKUSDT', 'FLOKIUSDT', 'ORDIUSDT', 'INJUSDT',
-                'TIAUSDT', 'SUIUSDT', 'APTUSDT', 'ARBUSDT', 'OPUSDT',
-                'STXUSDT', 'RNDRUSDT', 'FETUSDT', 'AGIXUSDT', 'OCEANUSDT',
-                'GRTUSDT', 'BANDUSDT', 'RLCUSDT', 'NUUSDT', 'CTSIUSDT',
-                'STORJUSDT', 'SKLUSDT', 'ANKRUSDT', 'CHRUSDT', 'LITUSDT',
-                'MTLUSDT', 'OGNUSDT', 'NKNUSDT', 'SCUSDT', 'DGBUSDT',
-                'BTTUSDT', 'HOTUSDT', 'IOTXUSDT', 'ONEUSDT', 'ZILUSDT',
-                'ICXUSDT', 'QTUMAUSDT', 'ONTUSDT', 'ZECUSDT', 'DASHUSDT',
-                'XTZUSDT', 'RVNUSDT', 'DCRUSDT', 'BATUSDT', 'ENJUSDT'
-            ]
-            
-            # Get available symbols
-            all_symbols = self.get_all_available_symbols()
-            available_symbols = set(all_symbols)
-            
-            # Filter popular symbols that are available
-            filtered_symbols = [s for s in popular_symbols if s in available_symbols]
-            
-            # If we need more symbols, add from available symbols
-            if len(filtered_symbols) < count:
-                remaining_symbols = [s for s in all_symbols if s not in filtered_symbols]
-                filtered_symbols.extend(remaining_symbols[:count - len(filtered_symbols)])
-            
-            return filtered_symbols[:count]
+            now = time.time()
+            if now >= self._popular_symbols_expires:
+                self._popular_symbols.cache_clear()
+                self._popular_symbols_expires = now + self.popular_symbols_ttl
+            
+            return list(self._popular_symbols(count))
             
         except Exception as e:
             print(f"Error getting popular symbols: {str(e)}")
             return ['BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'SOLUSDT', 'DOTUSDT']
     
+    @lru_cache(maxsize=8)
+    def _popular_symbols(self, count):
+        """Rank popular symbols against available symbols (tuple so cached results stay immutable)"""
+        # Popular symbols list (you can enhance this with real-time volume data)
+        popular_symbols = [
+            'BTCUSDT', 'ETHUSDT', 'ADAUSDT', 'SOLUSDT', 'DOTUSDT',
+            'LINKUSDT', 'AVAXUSDT', 'MATICUSDT', 'ATOMUSDT', 'NEARUSDT',
+            'UNIUSDT', 'LTCUSDT', 'BCHUSDT', 'XLMUSDT', 'VETUSDT',
+            'FILUSDT', 'TRXUSDT', 'ETCUSDT', 'XMRUSDT', 'EOSUSDT',
+            'AAVEUSDT', 'MKRUSDT', 'COMPUSDT', 'YFIUSDT', 'SUSHIUSDT',
+            'SNXUSDT', 'CRVUSDT', 'BALUSDT', '1INCHUSDT', 'ENJUSDT',
+            'MANAUSDT', 'SANDUSDT', 'CHZUSDT', 'GALAUSDT', 'AXSUSDT',
+            'FLOWUSDT', 'FTMUSDT', 'HBARUSDT', 'ICPUSDT', 'THETAUSDT',
+            'ALGOUSDT', 'EGLDUSDT', 'ZILUSDT', 'KSMUSDT', 'WAVESUSDT',
+            'OMGUSDT', 'QTUMUSDT', 'BATUSDT', 'ZRXUSDT', 'STORJUSDT',
+            'BNBUSDT', 'XRPUSDT', 'DOGEUSDT', 'SHIBUSDT', 'PEPEUSDT',
+            'WIFUSDT', 'BONKUSDT', 'FLOKIUSDT', 'ORDIUSDT', 'INJUSDT',
+            'TIAUSDT', 'SUIUSDT', 'APTUSDT', 'ARBUSDT', 'OPUSDT',
+            'STXUSDT', 'RNDRUSDT', 'FETUSDT', 'AGIXUSDT', 'OCEANUSDT',
+            'GRTUSDT', 'BANDUSDT', 'RLCUSDT', 'NUUSDT', 'CTSIUSDT',
+            'STORJUSDT', 'SKLUSDT', 'ANKRUSDT', 'CHRUSDT', 'LITUSDT',
+            'MTLUSDT', 'OGNUSDT', 'NKNUSDT', 'SCUSDT', 'DGBUSDT',
+            'BTTUSDT', 'HOTUSDT', 'IOTXUSDT', 'ONEUSDT', 'ZILUSDT',
+            'ICXUSDT', 'QTUMAUSDT', 'ONTUSDT', 'ZECUSDT', 'DASHUSDT',
+            'XTZUSDT', 'RVNUSDT', 'DCRUSDT', 'BATUSDT', 'ENJUSDT'
+        ]
+        
+        # Get available symbols
+        all_symbols = self.get_all_available_symbols()
+        if not all_symbols:
+            raise Exception("No available symbols")
+        available_symbols = set(all_symbols)
+        
+        # Filter popular symbols that are available
+        filtered_symbols = [s for s in popular_symbols if s in available_symbols]
+        
+        # If we need more symbols, add from available symbols
+        if len(filtered_symbols) < count:
+            remaining_symbols = [s for s in all_symbols if s not in filtered_symbols]
+            filtered_symbols.extend(remaining_symbols[:count - len(filtered_symbols)])
+        
+        return tuple(filtered_symbols[:count])
+    
     def _get_combinations_cache_key(self, param_ranges):
         """Generate cache key for parameter combinations"""
         return str(sorted(param_ranges.items()))
@@ -317,12 +276,15 @@ class PerCoinOptimizer(BaseOptimizer):
     def get_optimization_queue_estimate(self, symbols, optimization_params):
         """Get optimization time estimate"""
         try:
-            # Get or generate combinations
-            combinations = self._get_or_generate_combinations(optimization_params['param_ranges'])
-            
-            # Use the actual combinations count
             optimization_params_copy = optimization_params.copy()
-            optimization_params_copy['combinations_count'] = len(combinations)
+            
+            if optimization_params.get('search_strategy', Config.OPTIMIZER_SEARCH_STRATEGY) == 'tpe':
+                # TPE runs a fixed trial budget per symbol regardless of grid size
+                optimization_params_copy['combinations_count'] = optimization_params.get('n_trials', DEFAULT_N_TRIALS)
+            else:
+                # Get or generate combinations and use the actual count
+                combinations = self._get_or_generate_combinations(optimization_params['param_ranges'])
+                optimization_params_copy['combinations_count'] = len(combinations)
             
             return ParameterGenerator.get_optimization_queue_estimate(symbols, optimization_params_copy)
         except Exception as e:
@@ -363,17 +325,15 @@ class PerCoinOptimizer(BaseOptimizer):
             self.symbols_queue = symbols.copy()
             self.completed_symbols = []
             self.failed_symbols = []
-            self.best_results = {}
+            self.run_id = ResultsStore.new_run_id()
             self.total_symbols = len(symbols)
             self.current_symbol_index = 0
             self.current_symbol_progress = 0
             
-            # Get or generate parameter combinations (with caching)
-            combinations = self._get_or_generate_combinations(optimization_params['param_ranges'])
-            self.total_combinations = len(combinations)
+            combinations = self._prepare_search(optimization_params)
             
             print(f"🚀 Starting per-coin optimization for {self.total_symbols} symbols")
-            print(f"📊 Testing {self.total_combinations} parameter combinations per symbol")
+            print(f"📊 Testing {self.total_combinations} parameter combinations per symbol ({self.search_strategy})")
             print(f"⚡ Total combinations: {self.total_symbols * self.total_combinations:,}")
             
             # Start optimization in separate thread
@@ -390,6 +350,22 @@ class PerCoinOptimizer(BaseOptimizer):
             self.is_running = False
             return False, f"Error starting per-coin optimization: {str(e)}"
     
+    def _prepare_search(self, optimization_params):
+        """Set up the search strategy, returns grid combinations (None for TPE)"""
+        self.search_strategy = optimization_params.get('search_strategy', Config.OPTIMIZER_SEARCH_STRATEGY)
+        self.param_ranges = optimization_params['param_ranges']
+        self.prune_grid = bool(optimization_params.get('early_stopping', False))
+        
+        if self.search_strategy == 'tpe':
+            self.n_trials = int(optimization_params.get('n_trials', DEFAULT_N_TRIALS))
+            self.total_combinations = self.n_trials
+            return None
+        
+        # Get or generate parameter combinations (with caching)
+        combinations = self._get_or_generate_combinations(self.param_ranges)
+        self.total_combinations = len(combinations)
+        return combinations
+    
     def _filter_unoptimized_symbols(self, symbols):
         """Filter out symbols that already have optimization results"""
         try:
@@ -436,17 +412,15 @@ class PerCoinOptimizer(BaseOptimizer):
             self.symbols_queue = symbols.copy()
             self.completed_symbols = []
             self.failed_symbols = []
-            self.best_results = {}
+            self.run_id = ResultsStore.new_run_id()
             self.total_symbols = len(symbols)
             self.current_symbol_index = 0
             self.current_symbol_progress = 0
             
-            # Get or generate parameter combinations (with caching)
-            combinations = self._get_or_generate_combinations(optimization_params['param_ranges'])
-            self.total_combinations = len(combinations)
+            combinations = self._prepare_search(optimization_params)
             
             print(f"🚀 Starting FORCE per-coin optimization for {self.total_symbols} symbols")
-            print(f"📊 Testing {self.total_combinations} parameter combinations per symbol")
+            print(f"📊 Testing {self.total_combinations} parameter combinations per symbol ({self.search_strategy})")
             print(f"⚡ Total combinations: {self.total_symbols * self.total_combinations:,}")
             
             # Start optimization in separate thread
@@ -474,11 +448,13 @@ class PerCoinOptimizer(BaseOptimizer):
             end_date = optimization_params['end_date']
             trading_params = optimization_params['trading_params']
             max_workers = optimization_params.get('max_workers', 4)
+            # Fetching is network-bound, so use more threads than the CPU-bound backtest pool
+            fetch_workers = optimization_params.get('fetch_workers', 8)
             
             # Fetch all symbols data in bulk (parallel)
             print("📊 Fetching market data for all symbols in parallel...")
             bulk_symbols_data = self.fetch_all_symbols_data_bulk(
-                symbols, interval, start_date, end_date, max_workers=1  # Sequential processing
+                symbols, interval, start_date, end_date, max_workers=max(1, min(fetch_workers, len(symbols)))
             )
             
             if not bulk_symbols_data:
@@ -492,6 +468,16 @@ class PerCoinOptimizer(BaseOptimizer):
             # Update total symbols count
             self.total_symbols = len(valid_symbols)
             
+            if KERNEL_AVAILABLE:
+                self.kernel_dtype = self._select_kernel_dtype(
+                    bulk_symbols_data[valid_symbols[0]], combinations, trading_params
+                ) if valid_symbols else np.dtype(np.float64)
+            
+            # Backtests are CPU-bound, give them real cores instead of GIL-bound threads
+            if KERNEL_AVAILABLE and optimization_params.get('use_processes', True):
+                self.process_pool = self._create_process_pool(max_workers)
+                print(f"⚡ Running kernel backtests in {max_workers} worker processes")
+            
             # Process symbols in batches of 10 for optimization
             self._process_symbols_in_batches(valid_symbols, bulk_symbols_data, combinations, trading_params, max_workers)
             
@@ -505,9 +491,41 @@ class PerCoinOptimizer(BaseOptimizer):
         except Exception as e:
             print(f"❌ Error in per-coin optimization: {str(e)}")
         finally:
+            if self.process_pool is not None:
+                self.process_pool.shutdown(wait=True, cancel_futures=True)
+                self.process_pool = None
             self.is_running = False
             self.current_symbol = ""
     
+    def _select_kernel_dtype(self, df, combinations, trading_params):
+        """Use the configured kernel dtype only if float32 matches float64 on a sample symbol"""
+        if KERNEL_FLOAT_DTYPE != np.float32:
+            return np.dtype(np.float64)
+        
+        try:
+            if combinations:
+                params = combinations[0]
+            else:
+                params = {name: r['min'] for name, r in self.param_ranges.items()}
+            
+            ok, stats64, stats32 = check_float32_parity(to_close_array(df, np.float64), params, trading_params)
+            if ok:
+                print("✅ float32 kernel matches float64 baseline, using float32 prices")
+                return np.dtype(np.float32)
+            
+            print(f"⚠️ float32 kernel drifted from float64 (final balance {stats32['final_balance']:.4f} vs "
+                  f"{stats64['final_balance']:.4f}), using float64 prices")
+        except Exception as e:
+            print(f"⚠️ float32 parity check failed: {str(e)}, using float64 prices")
+        
+        return np.dtype(np.float64)
+    
+    def _create_process_pool(self, max_workers):
+        """Create worker process pool for kernel backtests"""
+        # Workers only hold the kernel and a shared-memory view per task, so they are not
+        # recycled (max_tasks_per_child forces spawn, which re-imports app.py per worker)
+        return ProcessPoolExecutor(max_workers=max_workers)
+    
     def _process_symbols_in_batches(self, valid_symbols, bulk_symbols_data, combinations, trading_params, max_workers=8):
         """Process symbols in batches with enhanced concurrent optimization"""
         try:
@@ -553,8 +571,8 @@ class PerCoinOptimizer(BaseOptimizer):
                             success, result = future.result()
                             
                             if success and result:
-                                # Store best result
-                                self.best_results[symbol] = result
+                                # Store best result (persisted right away, survives a crash)
+                                self.results_store.add(self.run_id, symbol, result)
                                 
                                 # Save to coin settings
                                 save_success = self.coin_settings_manager.save_optimization_result(symbol, result)
@@ -616,8 +634,69 @@ class PerCoinOptimizer(BaseOptimizer):
             print(f"❌ Error optimizing {symbol}: {str(e)}")
             return False, None
     
+    @contextmanager
+    def _symbol_evaluator(self, df, trading_params, prune=False):
+        """Backtest function for one symbol - compiled kernel when numba is available
+        
+        With prune=True the kernel abandons trials that can no longer reach the best score
+        seen so far for this symbol; pruned trials evaluate to None like failed ones.
+        """
+        if not KERNEL_AVAILABLE:
+            yield lambda params: self.backtest_runner.run_single_backtest(df, params, trading_params)
+            return
+        
+        best = {'score': None}
+        best_lock = threading.Lock()
+        
+        def track(result):
+            if prune and result is not None:
+                with best_lock:
+                    if best['score'] is None or result['score'] > best['score']:
+                        best['score'] = result['score']
+            return result
+        
+        def best_score():
+            return best['score'] if prune else None
+        
+        # Extract close prices once, every parameter set reuses the same array
+        close = to_close_array(df, self.kernel_dtype)
+        pool = self.process_pool
+        if pool is None:
+            yield lambda params: track(self.backtest_runner.run_single_backtest_kernel(
+                close, params, trading_params, best_score()))
+            return
+        
+        # Workers attach to this block by name instead of unpickling the prices per task
+        shm = shared_memory.SharedMemory(create=True, size=close.nbytes)
+        try:
+            shared_close = np.ndarray(close.shape, dtype=close.dtype, buffer=shm.buf)
+            shared_close[:] = close
+            del shared_close
+            
+            def evaluate(params):
+                try:
+                    stats, error = pool.submit(
+                        eval_params_shared, shm.name, close.shape, close.dtype.str, params, trading_params,
+                        best_score()
+                    ).result()
+                except Exception as e:
+                    stats, error = None, str(e)
+                if stats is None:
+                    if error is not None:
+                        print(f"Error in single backtest: {error}")
+                    return None
+                return track(self.backtest_runner.build_kernel_result(params, stats))
+            
+            yield evaluate
+        finally:
+            shm.close()
+            shm.unlink()
+    
     def _optimize_single_symbol(self, symbol, df, combinations, trading_params, max_workers=4):
         """Optimize single symbol"""
+        if self.search_strategy == 'tpe':
+            return self._optimize_single_symbol_tpe(symbol, df, trading_params, max_workers)
+        
         try:
             results = []
             completed = 0
@@ -625,10 +704,11 @@ class PerCoinOptimizer(BaseOptimizer):
             
             print(f"  🔄 Testing {total_combinations} parameter combinations for {symbol}")
             
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            with self._symbol_evaluator(df, trading_params, prune=self.prune_grid) as evaluate, \
+                    ThreadPoolExecutor(max_workers=max_workers) as executor:
                 # Submit all tasks for this symbol
                 future_to_params = {
-                    executor.submit(self.backtest_runner.run_single_backtest, df, params, trading_params): params
+                    executor.submit(evaluate, params): params
                     for params in combinations
                 }
                 
@@ -667,6 +747,35 @@ class PerCoinOptimizer(BaseOptimizer):
             print(f"Error optimizing {symbol}: {str(e)}")
             return []
     
+    def _optimize_single_symbol_tpe(self, symbol, df, trading_params, max_workers=4):
+        """Optimize single symbol with a TPE trial budget"""
+        try:
+            print(f"  🧠 Running {self.n_trials} TPE trials for {symbol}")
+            
+            progress = {'completed': 0}
+            
+            def on_trial():
+                progress['completed'] += 1
+                self.current_symbol_progress = progress['completed']
+            
+            search = TPESearch(self.param_ranges, self.n_trials)
+            with self._symbol_evaluator(df, trading_params) as evaluate:
+                results = search.run(
+                    evaluate,
+                    n_jobs=max_workers,
+                    should_stop=lambda: not self.is_running,
+                    on_trial=on_trial
+                )
+            
+            if results:
+                print(f"  ✅ {symbol} optimization completed: {len(results)} valid results")
+            
+            return results
+            
+        except Exception as e:
+            print(f"Error optimizing {symbol}: {str(e)}")
+            return []
+    
     def _save_per_coin_results(self, symbols, optimization_params):
         """Save per-coin optimization results"""
         try:
@@ -681,6 +790,7 @@ class PerCoinOptimizer(BaseOptimizer):
                 'total_symbols': len(symbols),
                 'completed_symbols': len(self.completed_symbols),
                 'failed_symbols': len(self.failed_symbols),
+                'run_id': self.run_id,
                 'symbols_processed': symbols,
                 'completed_list': self.completed_symbols,
                 'failed_list': self.failed_symbols,
@@ -688,7 +798,7 @@ class PerCoinOptimizer(BaseOptimizer):
             }
             
             # Add best results summary
-            for symbol, result in self.best_results.items():
+            for symbol, result in self.results_store.iter_results(self.run_id):
                 summary_data['best_results_summary'][symbol] = {
                     'score': result['score'],
                     'total_return': result['total_return'],
@@ -745,6 +855,18 @@ class PerCoinOptimizer(BaseOptimizer):
                 'failed_symbols': len(self.failed_symbols),
                 'completed_list': self.completed_symbols[-10:],  # Last 10 completed
                 'failed_list': self.failed_symbols[-10:],  # Last 10 failed
-                'best_results_count': len(self.best_results),
-                'recent_results': list(self.best_results.items())[-5:] if self.best_results else []  # Last 5 results
-            }
\ No newline at end of file
+                'run_id': self.run_id,
+                'best_results_count': self.results_store.count(self.run_id),
+                'recent_results': self.results_store.recent(self.run_id, 5)  # Last 5 results
+            }
+    
+    def get_results(self, limit=50, offset=0, run_id=None):
+        """Get one page of best results (by score) for a run, defaults to the latest run"""
+        run_id = run_id or self.run_id
+        return {
+            'run_id': run_id,
+            'total': self.results_store.count(run_id),
+            'limit': limit,
+            'offset': offset,
+            'results': self.results_store.page(run_id, limit, offset)
+        }
\ No newline at end of file
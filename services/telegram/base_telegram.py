@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import io
 from datetime import datetime
@@ -11,6 +12,10 @@ class BaseTelegramService:
         self.chat_id = chat_id or "YOUR_CHAT_ID"
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
         
+        # Keep-alive session so repeated Telegram calls reuse TLS connections
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+        
         # Validate and fix chat_id format
         self.chat_id = self._validate_chat_id(self.chat_id)
         
@@ -47,13 +52,13 @@ class BaseTelegramService:
             
             # Delete webhook to enable getUpdates polling for callbacks
             url = f"{self.base_url}/deleteWebhook"
-            response = requests.post(url)
+            response = self.session.post(url)
             print(f"Webhook deleted: {response.json()}")
             
             # Keep commands empty but allow callbacks
             url = f"{self.base_url}/setMyCommands"
             data = {'commands': json.dumps([])}
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             print(f"Commands cleared: {response.json()}")
             
             print("✅ Bot configured for enhanced mode with callback support")
@@ -72,13 +77,13 @@ class BaseTelegramService:
             
             # Delete webhook to enable getUpdates polling for callbacks
             url = f"{self.base_url}/deleteWebhook"
-            response = requests.post(url)
+            response = self.session.post(url)
             print(f"Webhook deleted for broadcast mode: {response.json()}")
             
             # Clear commands for broadcast mode
             url = f"{self.base_url}/setMyCommands"
             data = {'commands': json.dumps([])}
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             print(f"Commands cleared for broadcast mode: {response.json()}")
             
             # Set bot description for broadcast mode
@@ -94,7 +99,7 @@ class BaseTelegramService:
 ⚠️ For educational purposes only - DYOR before trading."""
             }
             
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if response.json().get('ok'):
                 print("✅ Bot description set for broadcast mode")
             
@@ -114,7 +119,7 @@ class BaseTelegramService:
             url = f"{self.base_url}/getUpdates"
             params = {'timeout': 1, 'allowed_updates': ['callback_query']}
             
-            response = requests.get(url, params=params, timeout=2)
+            response = self.session.get(url, params=params, timeout=2)
             if response.status_code == 200:
                 data = response.json()
                 if data.get('ok') and data.get('result'):
@@ -125,7 +130,7 @@ class BaseTelegramService:
                     # Acknowledge updates
                     if data['result']:
                         last_update_id = data['result'][-1]['update_id']
-                        requests.get(f"{self.base_url}/getUpdates", 
+                        self.session.get(f"{self.base_url}/getUpdates", 
                                    params={'offset': last_update_id + 1})
             
         except Exception as e:
@@ -140,7 +145,7 @@ class BaseTelegramService:
             
             # Answer callback query to remove loading state
             answer_url = f"{self.base_url}/answerCallbackQuery"
-            requests.post(answer_url, data={'callback_query_id': query_id})
+            self.session.post(answer_url, data={'callback_query_id': query_id})
             
             # Process callback data
             if callback_data.startswith('entry_'):
@@ -211,7 +216,7 @@ class BaseTelegramService:
                 data.update(extra_params)
             
             print(f"🔍 Sending message to chat_id: {self.chat_id}")
-            response = requests.post(url, data=data, timeout=30)
+            response = self.session.post(url, data=data, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -283,7 +288,7 @@ class BaseTelegramService:
                 data.update(extra_params)
             
             print(f"🔍 Sending photo to chat_id: {self.chat_id}")
-            response = requests.post(url, files=files, data=data, timeout=60)
+            response = self.session.post(url, files=files, data=data, timeout=60)
             
             if response.status_code == 200:
                 result = response.json()
@@ -346,7 +351,7 @@ Always do your own research before trading.
             
             # Test bot API
             url = f"{self.base_url}/getMe"
-            response = requests.get(url)
+            response = self.session.get(url)
             result = response.json()
             
             if result.get('ok'):
@@ -354,7 +359,7 @@ Always do your own research before trading.
                 
                 # Test chat access with a simple API call first
                 chat_url = f"{self.base_url}/getChat"
-                chat_response = requests.post(chat_url, data={'chat_id': self.chat_id})
+                chat_response = self.session.post(chat_url, data={'chat_id': self.chat_id})
                 chat_result = chat_response.json()
                 
                 if not chat_result.get('ok'):
@@ -411,7 +416,7 @@ Always do your own research before trading.
 ⚠️ For educational purposes only - DYOR before trading."""
             }
             
-            response = requests.post(url, data=data)
+            response = self.session.post(url, data=data)
             if response.json().get('ok'):
                 print("✅ Bot description set for enhanced broadcast mode")
             
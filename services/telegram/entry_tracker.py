@@ -14,6 +14,10 @@ class TelegramEntryTracker:
         self.tracking_thread = None
         self.is_tracking = False
         
+        # Status snapshot served to the API, rebuilt whenever entries change
+        self._status_lock = threading.Lock()
+        self._status_snapshot = {'total_entries': 0, 'active_entries': 0, 'symbols': []}
+        
         # Start tracking thread
         self._start_tracking_thread()
     
@@ -61,6 +65,7 @@ class TelegramEntryTracker:
                 'entry_time': datetime.now(),
                 'last_price': entry_price
             }
+            self._publish_status()
             
             # Send confirmation message
             confirmation_msg = f"""
@@ -179,11 +184,11 @@ class TelegramEntryTracker:
             
             # Enhanced logic for opposite signals
             has_existing_position = (symbol in self.trading_service.active_positions and 
-                                   self.trading_service.active_positions[symbol]['is_active'])
+                                   self.trading_service.active_positions[symbol].is_active)
             
             if has_existing_position:
                 existing_position = self.trading_service.active_positions[symbol]
-                existing_side = existing_position['side']
+                existing_side = existing_position.side
                 new_signal_side = signal_type.upper()
                 
                 # Check if this is an opposite signal
@@ -283,6 +288,7 @@ class TelegramEntryTracker:
                 
                 # Mark as inactive
                 self.active_entries[symbol]['is_active'] = False
+                self._publish_status()
                 
                 # Send completion message
                 completion_msg = f"""
@@ -301,7 +307,7 @@ Thank you for using our signal service!
                 self.base_service._send_message(completion_msg.strip())
                 
                 # Remove from active entries after a delay
-                threading.Timer(300, lambda: self.active_entries.pop(symbol, None)).start()
+                threading.Timer(300, self._remove_entry, args=(symbol,)).start()
                 
                 print(f"✅ Entry tracking completed for {symbol}")
                 return True
@@ -352,6 +358,9 @@ Thank you for using our signal service!
                         print(f"Error checking {symbol}: {str(e)}")
                         continue
                 
+                # TP/SL checks may have deactivated entries
+                self._publish_status()
+                
                 time.sleep(10)  # Check every 10 seconds
                 
             except Exception as e:
@@ -520,11 +529,23 @@ Thank you for using our signal service!
         except:
             return "N/A"
     
+    def _remove_entry(self, symbol):
+        """Drop a finished entry and refresh the status snapshot"""
+        self.active_entries.pop(symbol, None)
+        self._publish_status()
+    
+    def _publish_status(self):
+        """Rebuild the status snapshot from active_entries"""
+        entries = list(self.active_entries.values())
+        snapshot = {
+            'total_entries': len(entries),
+            'active_entries': sum(1 for entry in entries if entry['is_active']),
+            'symbols': [entry['symbol'] for entry in entries]
+        }
+        with self._status_lock:
+            self._status_snapshot = snapshot
+    
     def get_active_entries_status(self):
-        """Get status of all active entries"""
-        active_count = sum(1 for entry in self.active_entries.values() if entry['is_active'])
-        return {
-            'total_entries': len(self.active_entries),
-            'active_entries': active_count,
-            'symbols': list(self.active_entries.keys())
-        }
\ No newline at end of file
+        """Get status of all active entries (precomputed snapshot)"""
+        with self._status_lock:
+            return dict(self._status_snapshot)
\ No newline at end of file
@@ -77,8 +77,7 @@ class TelegramService(BaseTelegramService):
                 'sma_length': 150
             }
             
-            df_with_indicators = indicator_service.calculate_indicators(df, strategy_params)
-            signals = indicator_service.generate_signals(df_with_indicators, strategy_params)
+            df_with_indicators, signals = indicator_service.calculate_indicators_and_signals(df, strategy_params)
             
             # Run quick backtest to get win rate
             tp_sl_params = {
@@ -145,10 +144,10 @@ class TelegramService(BaseTelegramService):
             if self.trading_service and self.trading_service.is_connected:
                 # Check if we have existing position
                 has_existing_position = (symbol in self.trading_service.active_positions and 
-                                       self.trading_service.active_positions[symbol]['is_active'])
+                                       self.trading_service.active_positions[symbol].is_active)
                 
                 if has_existing_position:
-                    existing_side = self.trading_service.active_positions[symbol]['side']
+                    existing_side = self.trading_service.active_positions[symbol].side
                     new_signal_side = signal_data['signal']
                     
                     # If opposite signal, show close button instead
@@ -8,6 +8,7 @@ import pandas as pd
 from services.indicator_service import IndicatorService
 from services.telegram_service import TelegramService
 from services.coin_settings_manager import CoinSettingsManager
+from config.settings import Config
 
 class WebSocketService:
     def __init__(self, telegram_bot_token=None, telegram_chat_id=None, trading_service=None):
@@ -453,13 +454,7 @@ class WebSocketService:
         
     def _get_days_for_timeframe(self, timeframe, candles_needed):
         """Calculate days needed for timeframe and number of candles"""
-        timeframe_minutes = {
-            '1m': 1, '3m': 3, '5m': 5, '15m': 15, '30m': 30,
-            '1h': 60, '2h': 120, '4h': 240, '6h': 360, '8h': 480, '12h': 720,
-            '1d': 1440
-        }
-        
-        minutes_per_candle = timeframe_minutes.get(timeframe, 60)
+        minutes_per_candle = Config.INTERVAL_SECONDS.get(timeframe, 3600) // 60
         total_minutes = candles_needed * minutes_per_candle
         days = max(1, int(total_minutes / 1440) + 1)
         
@@ -480,8 +475,7 @@ class WebSocketService:
             # Get symbol-specific settings
             symbol_settings = self.get_symbol_settings(symbol)
             
-            df_with_indicators = self.indicator_service.calculate_indicators(df, symbol_settings)
-            signals = self.indicator_service.generate_signals(df_with_indicators, symbol_settings)
+            df_with_indicators, signals = self.indicator_service.calculate_indicators_and_signals(df, symbol_settings)
             
             if signals.empty:
                 return
@@ -509,8 +503,8 @@ class WebSocketService:
                     # Check if this is an opposite signal for existing position
                     if symbol in self.trading_service.active_positions:
                         existing_position = self.trading_service.active_positions[symbol]
-                        if existing_position['is_active']:
-                            existing_side = existing_position['side']
+                        if existing_position.is_active:
+                            existing_side = existing_position.side
                             new_signal_side = 'BUY' if latest_signal['signal'] == 1 else 'SELL'
                             
                             # If opposite signal, prioritize auto trading
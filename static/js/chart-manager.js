@@ -4,15 +4,21 @@ class ChartManager {
     }
     
     displayChart(chartData, tpSlLevels, symbolSelect, intervalSelect) {
-        const timestamps = chartData.map(d => d.timestamp);
-        const opens = chartData.map(d => d.open);
-        const highs = chartData.map(d => d.high);
-        const lows = chartData.map(d => d.low);
-        const closes = chartData.map(d => d.close);
+        // chartData is column-oriented: { timestamp: [...], open: [...], ... }
+        const timestamps = chartData.timestamp;
+        const opens = chartData.open;
+        const highs = chartData.high;
+        const lows = chartData.low;
+        const closes = chartData.close;
         
-        // Buy and sell signals
-        const buySignals = chartData.filter(d => d.signal === 1 && d.signal !== null && d.signal !== undefined);
-        const sellSignals = chartData.filter(d => d.signal === -1 && d.signal !== null && d.signal !== undefined);
+        // Buy and sell signals (only signal candles are materialized as objects)
+        const signalAt = i => ({ timestamp: timestamps[i], high: highs[i], low: lows[i], close: closes[i] });
+        const buySignals = [];
+        const sellSignals = [];
+        chartData.signal.forEach((signal, i) => {
+            if (signal === 1) buySignals.push(signalAt(i));
+            else if (signal === -1) sellSignals.push(signalAt(i));
+        });
         
         console.log(`Found ${buySignals.length} buy signals and ${sellSignals.length} sell signals`);
         console.log('Buy signals:', buySignals.slice(0, 3));
@@ -122,9 +128,10 @@ class ChartManager {
             
             if (entryIndex >= 0) {
                 // Look for next signal after this entry
-                for (let i = entryIndex + 1; i < chartData.length; i++) {
-                    if (chartData[i].signal !== 0 && chartData[i].signal !== null && chartData[i].signal !== undefined) {
-                        endTime = chartData[i].timestamp;
+                for (let i = entryIndex + 1; i < timestamps.length; i++) {
+                    const signal = chartData.signal[i];
+                    if (signal !== 0 && signal !== null && signal !== undefined) {
+                        endTime = timestamps[i];
                         break;
                     }
                 }
@@ -190,9 +197,9 @@ class ChartManager {
     }
     
     _addEmaTraces(traces, chartData, timestamps) {
-        const fastMA = chartData.map(d => d.fast_ma).filter(v => v !== null);
-        const slowMA = chartData.map(d => d.slow_ma).filter(v => v !== null);
-        const verySlowMA = chartData.map(d => d.very_slow_ma).filter(v => v !== null);
+        const fastMA = chartData.fast_ma.filter(v => v !== null);
+        const slowMA = chartData.slow_ma.filter(v => v !== null);
+        const verySlowMA = chartData.very_slow_ma.filter(v => v !== null);
         
         if (fastMA.length > 0) {
             traces.push({
@@ -1,22 +1,36 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+@lru_cache(maxsize=1024)
+def _parse_date_range(start_date, end_date):
+    """Parse a YYYY-MM-DD pair once, returns (start, end) or None if invalid"""
+    try:
+        start = datetime.fromisoformat(start_date)
+        end = datetime.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        return None
+    return start, end
 
 def validate_date_range(start_date, end_date):
     """Validate date range inputs"""
+    # The frontend re-sends the same pair for start / start-force / estimate
     try:
-        start = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        
-        # Check if start date is before end date
-        if start >= end:
-            return False
-        
-        # Check if end date is not in the future
-        if end > datetime.now():
-            return False
-        
-        return True
-    except ValueError:
+        parsed = _parse_date_range(start_date, end_date)
+    except TypeError:  # unhashable input
+        return False
+    if parsed is None:
+        return False
+    start, end = parsed
+    
+    # Check if start date is before end date
+    if start >= end:
+        return False
+    
+    # Check if end date is not in the future (not cached - depends on the clock)
+    if end > datetime.now():
         return False
+    
+    return True
 
 def format_timestamp(timestamp):
     """Format timestamp for display"""
@@ -0,0 +1,12 @@
+import numpy as np
+
+def frame_to_columns(df, columns=None, time_key='time'):
+    """Convert DataFrame to column-oriented dict (epoch ms time + one list per column)"""
+    if columns is None:
+        columns = list(df.columns)
+    
+    data = {time_key: (np.asarray(df.index.values, dtype='datetime64[ms]').astype(np.int64)).tolist()}
+    for col in columns:
+        if col in df.columns:
+            data[col] = df[col].to_numpy().tolist()
+    return data
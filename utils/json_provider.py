@@ -0,0 +1,30 @@
+"""Optional orjson-backed Flask JSON provider - Flask's stdlib provider is kept when orjson is not installed"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Numpy arrays/scalars from the backtest code serialize directly; datetimes go through
+# Flask's default handler so the output format stays the same as before
+ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY |
+                  orjson.OPT_PASSTHROUGH_DATETIME) if ORJSON_AVAILABLE else 0
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson straight to bytes"""
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response without the intermediate str"""
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,43 @@
+"""Process-wide logging - called once by the entry point (app_production.py, or app.py's dev server)"""
+import atexit
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+
+_listener = None
+
+def setup_logging(log_dir=Path(__file__).parent.parent / "logs"):
+    """Route all records through a queue; file/stdout writes happen on a background listener thread"""
+    global _listener
+    if _listener is not None:
+        return
+    
+    log_dir = Path(log_dir)
+    log_dir.mkdir(exist_ok=True)
+    
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_dir / "app.log")
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    
+    # Request and trading threads only enqueue records; the listener does the blocking I/O
+    log_queue = queue.Queue(-1)
+    _listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    
+    # QueueHandler formats record.msg before enqueueing; keep it to the bare message
+    # so the listener's formatter adds the timestamp/level prefix only once
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[queue_handler]
+    )
+    
+    # Reduce noise from some libraries
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+    logging.getLogger('requests').setLevel(logging.WARNING)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+WSGI entry point for gunicorn
+Jalankan dengan: gunicorn -c gunicorn.conf.py wsgi:application
+(atau langsung: gunicorn -k gevent --workers 1 --worker-connections 1000 wsgi:application)
+"""
+import os
+import sys
+from pathlib import Path
+
+project_dir = str(Path(__file__).parent.absolute())
+if project_dir not in sys.path:
+    sys.path.insert(0, project_dir)
+os.chdir(project_dir)
+
+from app_production import app
+
+application = app